@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+Measure the clients end to end against the local fake pagure.
+
+    $ python -m benchmarks.bench_client
+    $ python -m benchmarks.bench_client --latency 0.02 --save after.json \\
+          --compare before.json
+
+Each case runs the same job on a fresh client and reports its wall clock
+time, the API calls it made per second and the p50/p95/p99 latencies of
+those calls, as seen by the hooks of the client. Without latency, the
+numbers are the overhead of libpagure itself (URL building, headers,
+requests, decoding). With latency, they show what the concurrent paths
+gain.
+
+``--save`` writes the results as JSON, ``--compare`` prints the ratio of
+each case to a previous run.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from timeit import default_timer
+
+from libpagure import Hook, Pagure, Transport
+
+from .server import FakePagure
+
+try:
+    import asyncio
+    from libpagure import AsyncPagure
+except ImportError:
+    AsyncPagure = None
+
+
+class Latencies(Hook):
+    """ Record the latency of every API call. """
+
+    def __init__(self):
+        super(Latencies, self).__init__()
+        self.values = []
+
+    def after_response(self, call, response):
+        self.values.append(call.elapsed)
+
+    def on_error(self, call, error):
+        if call.status is None:
+            self.values.append(call.elapsed)
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def sync_cases(calls):
+    ids = list(range(1, calls + 1))
+    return [
+        ('api_version', lambda pg: [pg.api_version() for _ in ids]),
+        ('issue_info', lambda pg: [pg.issue_info(number) for number in ids]),
+        ('list_issues', lambda pg: [
+            pg.list_issues() for _ in range(max(1, calls // 10))]),
+        ('iter_issues all pages', lambda pg: list(
+            pg.iter_issues(per_page=100))),
+        ('stream_issues all', lambda pg: list(pg.stream_issues())),
+        ('list_all_projects 4 threads', lambda pg: pg.list_all_projects(
+            per_page=100, max_workers=4)),
+        ('issues_info_many 8 threads', lambda pg: pg.issues_info_many(
+            ids, max_workers=8)),
+        ('comment_issue', lambda pg: [
+            pg.comment_issue(number, 'bench') for number in ids]),
+    ]
+
+
+def async_cases(calls):
+    ids = list(range(1, calls + 1))
+
+    async def issue_info(pg):
+        return [await pg.issue_info(number) for number in ids]
+
+    async def gather(pg):
+        return await asyncio.gather(*[pg.issue_info(number)
+                                      for number in ids])
+
+    async def list_all_projects(pg):
+        return await pg.list_all_projects(per_page=100, max_workers=4)
+
+    async def issues_info_many(pg):
+        return await pg.issues_info_many(ids, max_workers=8)
+
+    return [
+        ('async issue_info', issue_info),
+        ('async issue_info gather', gather),
+        ('async list_all_projects 4 tasks', list_all_projects),
+        ('async issues_info_many 8 tasks', issues_info_many),
+    ]
+
+
+def result(name, elapsed, latencies):
+    return {
+        'name': name,
+        'seconds': elapsed,
+        'calls': len(latencies),
+        'calls_per_second': len(latencies) / elapsed if elapsed else None,
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+    }
+
+
+def run_sync(url, name, job):
+    latencies = Latencies()
+    pg = Pagure(pagure_repository='bench', instance_url=url,
+                pagure_token='a token', hooks=[latencies],
+                transport=Transport(pool_maxsize=16,
+                                    per_thread_sessions=True))
+    start = default_timer()
+    job(pg)
+    elapsed = default_timer() - start
+    pg.transport.close()
+    return result(name, elapsed, latencies.values)
+
+
+def run_async(url, name, job):
+    latencies = Latencies()
+
+    async def main():
+        async with AsyncPagure(pagure_repository='bench', instance_url=url,
+                               pagure_token='a token',
+                               hooks=[latencies]) as pg:
+            start = default_timer()
+            await job(pg)
+            return default_timer() - start
+
+    elapsed = asyncio.run(main())
+    return result(name, elapsed, latencies.values)
+
+
+def run(latency=0.0, calls=200, total=1000, comments=5, only=None):
+    """
+    Run the cases against a fresh fake pagure.
+    :return: the list of the results
+    """
+    results = []
+    with FakePagure(latency=latency, total=total,
+                    comments=comments) as server:
+        cases = [(name, job, run_sync) for name, job in sync_cases(calls)]
+        if AsyncPagure is not None and sys.version_info >= (3, 7):
+            cases += [(name, job, run_async)
+                      for name, job in async_cases(calls)]
+        for name, job, runner in cases:
+            if only and not any(word in name for word in only):
+                continue
+            results.append(runner(server.url, name, job))
+    return results
+
+
+def report(results, previous=None):
+    previous = dict((item['name'], item) for item in previous or [])
+    print('{:<34} {:>8} {:>7} {:>9} {:>8} {:>8} {:>8}{}'.format(
+        'case', 'seconds', 'calls', 'calls/s', 'p50 ms', 'p95 ms', 'p99 ms',
+        '  vs previous' if previous else ''))
+    for item in results:
+        line = '{:<34} {:8.3f} {:7d} {:9.1f} {:8.2f} {:8.2f} {:8.2f}'.format(
+            item['name'], item['seconds'], item['calls'],
+            item['calls_per_second'] or 0, (item['p50'] or 0) * 1000,
+            (item['p95'] or 0) * 1000, (item['p99'] or 0) * 1000)
+        before = previous.get(item['name'])
+        if before is not None and item['seconds']:
+            line += '  x{:.2f}'.format(before['seconds'] / item['seconds'])
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds the fake server waits per answer')
+    parser.add_argument('--calls', type=int, default=200,
+                        help='number of calls of the per item cases')
+    parser.add_argument('--total', type=int, default=1000,
+                        help='number of issues, requests and projects')
+    parser.add_argument('--comments', type=int, default=5,
+                        help='number of comments per issue and request')
+    parser.add_argument('--only', nargs='*',
+                        help='only run the cases containing these words')
+    parser.add_argument('--save', help='write the results to this file')
+    parser.add_argument('--compare', help='a file saved by a previous run')
+    args = parser.parse_args()
+
+    results = run(args.latency, args.calls, args.total, args.comments,
+                  args.only)
+    previous = None
+    if args.compare:
+        with open(args.compare) as stream:
+            previous = json.load(stream)['results']
+    report(results, previous)
+
+    if args.save:
+        with open(args.save, 'w') as stream:
+            json.dump({
+                'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'settings': {'latency': args.latency, 'calls': args.calls,
+                             'total': args.total,
+                             'comments': args.comments},
+                'results': results,
+            }, stream, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Compare the JSON decoders available to Pagure on realistic answers.
+
+    $ python -m benchmarks.bench_decode
+
+``requests .json()`` is what _call_api used to do: decode the body to
+text, then parse the text. The other rows decode the bytes directly.
+"""
+
+import json
+import timeit
+
+import requests
+
+from libpagure.decoders import orjson, orjson_decoder, stdlib_decoder
+
+from . import payloads
+
+
+def requests_json(content):
+    response = requests.Response()
+    response._content = content
+    response.encoding = None
+    return response.json()
+
+
+def bench(decoder, content, number):
+    best = min(timeit.repeat(lambda: decoder(content), repeat=5,
+                             number=number))
+    return best / number
+
+
+def main():
+    cases = [
+        ('list_projects, 100 full projects', payloads.projects_page()),
+        ('list_issues, 100 issues x 5 comments', payloads.issues_page()),
+        ('list_requests, 100 PRs x 5 comments', payloads.requests_page()),
+    ]
+    decoders = [('requests .json()', requests_json),
+                ('json.loads(bytes)', stdlib_decoder)]
+    if orjson is not None:
+        decoders.append(('orjson.loads(bytes)', orjson_decoder))
+    else:
+        print('orjson is not installed, only the json module is measured')
+
+    for name, payload in cases:
+        content = json.dumps(payload).encode('utf-8')
+        print('{} ({:.0f} KiB)'.format(name, len(content) / 1024.0))
+        reference = None
+        for decoder_name, decoder in decoders:
+            elapsed = bench(decoder, content, number=20)
+            reference = reference or elapsed
+            print('    {:<22} {:8.2f} ms  x{:.2f}'.format(
+                decoder_name, elapsed * 1000, reference / elapsed))
+
+
+if __name__ == '__main__':
+    main()
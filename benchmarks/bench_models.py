@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Compare the memory held by the answers as dicts and as models.
+
+    $ python -m benchmarks.bench_models
+
+Each case decodes pages of realistic answers and keeps every element, as
+a job collecting them would, then reports what is still allocated. The
+models are measured before and after their nested values were read,
+since those are only turned into models on first access.
+"""
+
+import gc
+import json
+import tracemalloc
+
+from libpagure.models import Issue, Project, PullRequest
+
+from . import payloads
+
+
+def measure(pages, key, convert, touch=None):
+    """ Return the bytes held by the elements of the pages. """
+    gc.collect()
+    tracemalloc.start()
+    kept = []
+    for content in pages:
+        kept.extend(convert(item) for item in json.loads(content)[key])
+    if touch is not None:
+        for item in kept:
+            touch(item)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, len(kept)
+
+
+def touch_issue(issue):
+    issue.user, issue.assignee
+    for comment in issue.comments:
+        comment.user
+
+
+def touch_request(request):
+    request.user, request.project.user, request.repo_from.user
+    for comment in request.comments:
+        comment.user
+
+
+def main(total=5000):
+    cases = [
+        ('projects', 'projects', payloads.projects_page, Project, None),
+        ('issues', 'issues', payloads.issues_page, Issue, touch_issue),
+        ('requests', 'requests', payloads.requests_page, PullRequest,
+         touch_request),
+    ]
+    for name, key, page, model, touch in cases:
+        pages = [json.dumps(page(number, total=total)).encode('utf-8')
+                 for number in range(1, total // 100 + 1)]
+        reference, count = measure(pages, key, lambda item: item)
+        print('{} {} ({:.1f} MiB of JSON)'.format(
+            count, name, sum(map(len, pages)) / 1048576.0))
+        rows = [
+            ('dicts', reference),
+            (model.__name__, measure(pages, key, model.from_dict)[0]),
+            ('{}, nested read'.format(model.__name__),
+             measure(pages, key, model.from_dict, touch)[0]),
+        ]
+        for label, size in rows:
+            print('    {:<28} {:8.1f} MiB  {:6.0f} B/item  x{:.2f}'.format(
+                label, size / 1048576.0, float(size) / count,
+                float(reference) / size))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Measure what a short lived process, like a git hook, pays for libpagure.
+
+    $ python -m benchmarks.bench_startup --save before.json
+    $ python -m benchmarks.bench_startup --compare before.json
+
+Each case runs in a fresh interpreter, ``--repeat`` times, and the median
+is reported: the time spent importing, the time spent until the answer of
+a first API call is decoded, import included, and the wall clock time of
+the whole process. The API call is made to the local fake pagure of
+``benchmarks.server``, with the default requests session and, when it is
+available, with LiteTransport.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from timeit import default_timer
+
+from .server import FakePagure
+
+#: what each case runs, {url} being replaced with the URL of the server
+CASES = [
+    ('import libpagure', """
+import libpagure
+"""),
+    ('first call, requests', """
+import libpagure
+imported = default_timer()
+pg = libpagure.Pagure(pagure_repository='bench', instance_url='{url}')
+pg.api_version()
+"""),
+    ('first call, LiteTransport', """
+import libpagure
+imported = default_timer()
+pg = libpagure.Pagure(pagure_repository='bench', instance_url='{url}',
+                      transport=libpagure.LiteTransport())
+pg.api_version()
+"""),
+    ('import requests, for reference', """
+import requests
+"""),
+]
+
+_TEMPLATE = """
+from timeit import default_timer
+start = default_timer()
+imported = None
+{code}
+end = default_timer()
+print('{{}} {{}}'.format((imported or end) - start, end - start))
+"""
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def run_case(code, url, repeat):
+    """
+    Run a case in fresh interpreters.
+    :return: the lists of the import times, total times and process times
+    """
+    script = _TEMPLATE.format(code=code.strip().format(url=url))
+    imports, totals, processes = [], [], []
+    for _ in range(repeat):
+        start = default_timer()
+        output = subprocess.check_output([sys.executable, '-c', script])
+        processes.append(default_timer() - start)
+        imported, total = output.decode('utf-8').split()
+        imports.append(float(imported))
+        totals.append(float(total))
+    return imports, totals, processes
+
+
+def run(repeat=10, only=None):
+    """
+    Run the cases, skipping those this tree can not run.
+    :return: the list of the results
+    """
+    results = []
+    with FakePagure() as server:
+        for name, code in CASES:
+            if only and not any(word in name for word in only):
+                continue
+            try:
+                imports, totals, processes = run_case(code, server.url,
+                                                      repeat)
+            except subprocess.CalledProcessError:
+                continue
+            results.append({
+                'name': name,
+                'import': median(imports),
+                'total': median(totals),
+                'process': median(processes),
+            })
+    return results
+
+
+def report(results, previous=None):
+    previous = dict((item['name'], item) for item in previous or [])
+    print('{:<32} {:>10} {:>10} {:>10}{}'.format(
+        'case', 'import ms', 'total ms', 'process ms',
+        '  vs previous' if previous else ''))
+    for item in results:
+        line = '{:<32} {:10.1f} {:10.1f} {:10.1f}'.format(
+            item['name'], item['import'] * 1000, item['total'] * 1000,
+            item['process'] * 1000)
+        before = previous.get(item['name'])
+        if before is not None and item['total']:
+            line += '  x{:.2f}'.format(before['total'] / item['total'])
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=10,
+                        help='number of interpreters started per case')
+    parser.add_argument('--only', nargs='*',
+                        help='only run the cases containing these words')
+    parser.add_argument('--save', help='write the results to this file')
+    parser.add_argument('--compare', help='a file saved by a previous run')
+    args = parser.parse_args()
+
+    results = run(args.repeat, args.only)
+    previous = None
+    if args.compare:
+        with open(args.compare) as stream:
+            previous = json.load(stream)['results']
+    report(results, previous)
+
+    if args.save:
+        with open(args.save, 'w') as stream:
+            json.dump({
+                'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'settings': {'repeat': args.repeat},
+                'results': results,
+            }, stream, indent=2)
+
+
+if __name__ == '__main__':
+    main()
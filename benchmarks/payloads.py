@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Realistic pagure API answers of configurable size, shaped like the ones
+of pagure.io, for the benchmarks.
+"""
+
+import random
+
+
+def user(name):
+    return {'name': name, 'fullname': name.title(), 'url_path': name}
+
+
+def comment(comment_id, rng):
+    return {
+        'id': comment_id,
+        'comment': ' '.join(rng.choice(WORDS) for _ in range(40)),
+        'date_created': str(1500000000 + comment_id),
+        'edited_on': None,
+        'editor': None,
+        'notification': False,
+        'parent': None,
+        'reactions': {},
+        'user': user('user{}'.format(comment_id % 50)),
+    }
+
+
+def project(project_id, rng):
+    name = 'project-{}'.format(project_id)
+    return {
+        'id': project_id,
+        'name': name,
+        'namespace': rng.choice([None, 'rpms', 'modules']),
+        'fullname': name,
+        'url_path': name,
+        'description': ' '.join(rng.choice(WORDS) for _ in range(15)),
+        'date_created': str(1400000000 + project_id),
+        'date_modified': str(1500000000 + project_id),
+        'milestones': {},
+        'priorities': {},
+        'tags': rng.sample(TAGS, 3),
+        'close_status': ['Fixed', 'Invalid', 'Duplicate'],
+        'custom_keys': [],
+        'parent': None,
+        'user': user('owner{}'.format(project_id % 100)),
+        'access_users': {
+            'owner': ['owner{}'.format(project_id % 100)],
+            'admin': [], 'commit': ['dev1', 'dev2'], 'ticket': [],
+        },
+        'access_groups': {'admin': [], 'commit': ['packagers'],
+                          'ticket': []},
+    }
+
+
+def issue(issue_id, rng, comments=5):
+    return {
+        'id': issue_id,
+        'title': ' '.join(rng.choice(WORDS) for _ in range(8)),
+        'content': ' '.join(rng.choice(WORDS) for _ in range(120)),
+        'status': rng.choice(['Open', 'Closed']),
+        'close_status': None,
+        'date_created': str(1500000000 + issue_id),
+        'last_updated': str(1500100000 + issue_id),
+        'closed_at': None,
+        'private': False,
+        'priority': rng.choice([None, 1, 2]),
+        'milestone': rng.choice([None, '1.0', '2.0']),
+        'tags': rng.sample(TAGS, 2),
+        'depends': [], 'blocks': [],
+        'assignee': rng.choice([None, user('dev1')]),
+        'user': user('user{}'.format(issue_id % 50)),
+        'custom_fields': [{'name': 'severity', 'key_type': 'list',
+                           'value': 'high'}],
+        'comments': [comment(issue_id * 100 + i, rng)
+                     for i in range(comments)],
+    }
+
+
+def pull_request(request_id, rng, comments=5):
+    return {
+        'id': request_id,
+        'uid': '{:032x}'.format(request_id),
+        'title': ' '.join(rng.choice(WORDS) for _ in range(8)),
+        'initial_comment': ' '.join(rng.choice(WORDS) for _ in range(60)),
+        'status': rng.choice(['Open', 'Merged', 'Closed']),
+        'branch': 'main',
+        'branch_from': 'feature-{}'.format(request_id),
+        'commit_start': '{:040x}'.format(request_id),
+        'commit_stop': '{:040x}'.format(request_id + 1),
+        'date_created': str(1500000000 + request_id),
+        'last_updated': str(1500100000 + request_id),
+        'updated_on': str(1500100000 + request_id),
+        'closed_at': None,
+        'closed_by': None,
+        'assignee': None,
+        'tags': [],
+        'threshold_reached': None,
+        'cached_merge_status': 'FFORWARD',
+        'user': user('user{}'.format(request_id % 50)),
+        'project': project(request_id % 10, rng),
+        'repo_from': project(request_id % 10 + 1, rng),
+        'comments': [comment(request_id * 100 + i, rng)
+                     for i in range(comments)],
+    }
+
+
+def paginated(key, items, page, per_page, total):
+    pages = max(1, -(-total // per_page))
+    return {
+        'args': {'page': page, 'per_page': per_page},
+        key: items,
+        'total_{}'.format(key): total,
+        'pagination': {
+            'page': page, 'pages': pages, 'per_page': per_page,
+            'first': None, 'last': None, 'prev': None,
+            'next': None if page >= pages else 'next',
+        },
+    }
+
+
+def projects_page(page=1, per_page=100, total=1000, seed=0):
+    rng = random.Random(seed + page)
+    start = (page - 1) * per_page
+    ids = range(start + 1, min(total, start + per_page) + 1)
+    return paginated('projects', [project(i, rng) for i in ids],
+                     page, per_page, total)
+
+
+def issues_page(page=1, per_page=100, total=1000, comments=5, seed=0):
+    rng = random.Random(seed + page)
+    start = (page - 1) * per_page
+    ids = range(start + 1, min(total, start + per_page) + 1)
+    return paginated('issues', [issue(i, rng, comments) for i in ids],
+                     page, per_page, total)
+
+
+def requests_page(page=1, per_page=100, total=1000, comments=5, seed=0):
+    rng = random.Random(seed + page)
+    start = (page - 1) * per_page
+    ids = range(start + 1, min(total, start + per_page) + 1)
+    return paginated('requests', [pull_request(i, rng, comments)
+                                  for i in ids],
+                     page, per_page, total)
+
+
+WORDS = ('pagure forge git branch commit merge issue ticket fix crash '
+         'build package release review patch test docs update the a of '
+         'to in for with on is it that this').split()
+TAGS = ['bug', 'easyfix', 'RFE', 'docs', 'security', 'packaging',
+        'triaged', 'blocker']
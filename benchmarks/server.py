@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+"""
+A local stand-in for a pagure instance, serving the answers of
+``benchmarks.payloads`` over HTTP so that the clients can be measured, and
+tested, end to end without the network::
+
+    with FakePagure(latency=0.02, total=2000) as server:
+        pg = Pagure(pagure_repository='foo', instance_url=server.url)
+        pg.list_issues()
+
+    $ python -m benchmarks.server --port 8080 --latency 0.05
+
+Every repository holds the same generated issues and pull requests, the
+lists are paginated like pagure does (``page`` and ``per_page``, at most
+100 per page) and every answer carries an ETag honoured by
+``If-None-Match``. The writes answer a message and change nothing.
+
+The answers are generated once and kept encoded, so the server spends as
+little time as possible and what is measured is the client. ``latency``
+seconds, plus up to ``jitter``, are waited before each answer.
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+
+try:
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlsplit
+except ImportError:  # Python 2
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import parse_qs, urlsplit
+
+    class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+        daemon_threads = True
+
+
+class _Server(ThreadingHTTPServer):
+    # room for the connections opened at once by the concurrent clients
+    request_queue_size = 128
+    daemon_threads = True
+
+from . import payloads
+
+# the prefix of the repositories: namespace, fork, or both
+_REPO = r'(?:fork/[^/]+/)?(?:[^/]+/)?[^/]+'
+
+#: (method, path regex, name of the FakePagure method answering)
+ROUTES = [
+    ('GET', r'version', 'version'),
+    ('GET', r'error_codes', 'error_codes'),
+    ('GET', r'users', 'users'),
+    ('GET', r'groups', 'groups'),
+    ('GET', r'projects', 'projects'),
+    ('POST', r'new', 'message'),
+    ('GET', r'user/(?P<username>[^/]+)', 'user'),
+    ('GET', r'user/[^/]+/activity/stats', 'activity_stats'),
+    ('GET', r'user/[^/]+/activity/[^/]+', 'activities'),
+    ('GET', r'user/[^/]+/requests/(?:filed|actionable)', 'requests'),
+    ('GET', _REPO + r'/issues', 'issues'),
+    ('GET', _REPO + r'/issue/(?P<number>\d+)', 'issue'),
+    ('GET', _REPO + r'/issue/(?P<number>\d+)/comment/(?P<comment>\d+)',
+     'comment'),
+    ('POST', _REPO + r'/new_issue', 'new_issue'),
+    ('POST', _REPO + r'/issue/\d+/(?:comment|status|milestone)', 'message'),
+    ('GET', _REPO + r'/pull-requests', 'requests'),
+    ('GET', _REPO + r'/pull-request/(?P<number>\d+)', 'request'),
+    ('POST', _REPO + r'/pull-request/\d+/(?:merge|close|comment|flag)',
+     'message'),
+    ('GET', _REPO + r'/git/branches', 'branches'),
+    ('GET', _REPO + r'/tags', 'tags'),
+    ('GET', _REPO + r'/git/tags', 'git_tags'),
+]
+_ROUTES = [(method, re.compile('^/api/0/{}/?$'.format(pattern)), name)
+           for method, pattern, name in ROUTES]
+
+
+class NotFound(Exception):
+    pass
+
+
+class FakePagure(object):
+    """ A pagure instance serving generated data from a thread. """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0,
+                 total=1000, comments=5, seed=0):
+        """
+        Create the server, it is started by start or the with statement.
+        :param host: the address to listen on
+        :param port: the port to listen on, any free one by default
+        :param latency: the seconds waited before each answer
+        :param jitter: the maximum seconds added at random to the latency
+        :param total: the number of projects, issues and pull requests
+        :param comments: the number of comments of each issue and request
+        :param seed: the seed of the generated data
+        :return:
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.total = total
+        self.comments = comments
+        self.seed = seed
+        #: the number of requests served, by route name
+        self.hits = {}
+        self._answers = {}
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._thread = None
+        self.server = _Server((host, port), _handler(self))
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def serve_forever(self):
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+
+    def answer(self, method, path, query):
+        """
+        Get the answer of a request.
+        :return: (status, encoded body, ETag), the same objects every time
+            for the same request
+        """
+        for route_method, pattern, name in _ROUTES:
+            match = pattern.match(path)
+            if match is not None and route_method == method:
+                break
+        else:
+            name, match = None, None
+        with self._lock:
+            self.hits[name] = self.hits.get(name, 0) + 1
+
+        key = (method, path, tuple(sorted(
+            (k, tuple(v)) for k, v in query.items())))
+        answer = self._answers.get(key)
+        if answer is None:
+            try:
+                if name is None:
+                    raise NotFound('Not found')
+                status, output = 200, getattr(self, 'answer_' + name)(
+                    query, **match.groupdict())
+            except NotFound as err:
+                status, output = 404, {'error': str(err),
+                                       'error_code': 'ENOTFOUND'}
+            body = json.dumps(output).encode('utf-8')
+            etag = '"{}"'.format(hashlib.sha1(body).hexdigest())
+            answer = (status, body, etag)
+            # generating is deterministic, a race only wastes some time
+            if method == 'GET':
+                self._answers[key] = answer
+        return answer
+
+    def delay(self):
+        if self.latency or self.jitter:
+            with self._lock:
+                jitter = self._random.uniform(0, self.jitter)
+            time.sleep(self.latency + jitter)
+
+    def _page(self, query):
+        page = int(query.get('page', ['1'])[0])
+        per_page = min(100, int(query.get('per_page', ['20'])[0]))
+        return page, per_page
+
+    def _paginated(self, query, key, generate):
+        page, per_page = self._page(query)
+        start = (page - 1) * per_page
+        rng = random.Random(self.seed + page)
+        items = [generate(number, rng) for number in
+                 range(start + 1, min(self.total, start + per_page) + 1)]
+        return payloads.paginated(key, items, page, per_page, self.total)
+
+    def _number(self, number):
+        number = int(number)
+        if not 1 <= number <= self.total:
+            raise NotFound('Issue not found')
+        return number
+
+    def answer_version(self, query):
+        return {'version': '5'}
+
+    def answer_error_codes(self, query):
+        return {'ENOTFOUND': 'Not found', 'EINVALIDTOK': 'Invalid token'}
+
+    def answer_users(self, query):
+        return {'total_users': 50, 'users': [
+            'user{}'.format(number) for number in range(50)]}
+
+    def answer_groups(self, query):
+        return {'total_groups': 2, 'groups': ['packagers', 'admins']}
+
+    def answer_projects(self, query):
+        return self._paginated(query, 'projects', payloads.project)
+
+    def answer_user(self, query, username):
+        return {'user': payloads.user(username), 'repos': [], 'forks': []}
+
+    def answer_activity_stats(self, query):
+        return {'2020-01-{:02d}'.format(day): day for day in range(1, 29)}
+
+    def answer_activities(self, query):
+        return {'activities': [{'date': '2020-01-01', 'type': 'created',
+                                'description_mk': 'created an issue'}]}
+
+    def answer_issues(self, query):
+        comments = self.comments
+        return self._paginated(query, 'issues', lambda number, rng:
+                               payloads.issue(number, rng, comments))
+
+    def answer_issue(self, query, number):
+        number = self._number(number)
+        return payloads.issue(number, random.Random(self.seed + number),
+                              self.comments)
+
+    def answer_comment(self, query, number, comment):
+        return payloads.comment(int(comment), random.Random(int(comment)))
+
+    def answer_new_issue(self, query):
+        return {'message': 'Issue created', 'issue': payloads.issue(
+            self.total + 1, random.Random(self.seed), 0)}
+
+    def answer_requests(self, query):
+        comments = self.comments
+        return self._paginated(query, 'requests', lambda number, rng:
+                               payloads.pull_request(number, rng, comments))
+
+    def answer_request(self, query, number):
+        number = self._number(number)
+        return payloads.pull_request(
+            number, random.Random(self.seed + number), self.comments)
+
+    def answer_branches(self, query):
+        return {'total_branches': 2, 'branches': ['main', 'stable']}
+
+    def answer_tags(self, query):
+        return {'total_tags': len(payloads.TAGS), 'tags': payloads.TAGS}
+
+    def answer_git_tags(self, query):
+        return {'total_tags': 2, 'tags': ['1.0', '2.0']}
+
+    def answer_message(self, query):
+        return {'message': 'Done'}
+
+
+def _handler(fake):
+
+    class Handler(BaseHTTPRequestHandler):
+        # keep the connections alive, as pagure.io does
+        protocol_version = 'HTTP/1.1'
+        # the headers and the body are written apart, do not wait for the
+        # acknowledgement of the first before sending the second
+        disable_nagle_algorithm = True
+
+        def _answer(self, method, head=False):
+            url = urlsplit(self.path)
+            query = parse_qs(url.query)
+            length = int(self.headers.get('Content-Length') or 0)
+            if length:
+                body = self.rfile.read(length)
+                if method == 'POST':
+                    query.update(parse_qs(body.decode('utf-8')))
+            status, body, etag = fake.answer(method, url.path, query)
+            fake.delay()
+            if status == 200 and self.headers.get('If-None-Match') == etag:
+                status, body = 304, b''
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', etag)
+            self.end_headers()
+            if not head:
+                self.wfile.write(body)
+
+        def do_GET(self):
+            self._answer('GET')
+
+        def do_HEAD(self):
+            self._answer('GET', head=True)
+
+        def do_POST(self):
+            self._answer('POST')
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds waited before each answer')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='maximum random seconds added to the latency')
+    parser.add_argument('--total', type=int, default=1000,
+                        help='number of projects, issues and requests')
+    parser.add_argument('--comments', type=int, default=5,
+                        help='number of comments per issue and request')
+    args = parser.parse_args()
+    server = FakePagure(args.host, args.port, args.latency, args.jitter,
+                        args.total, args.comments)
+    print('Serving a fake pagure on {}'.format(server.url))
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,86 @@
 # -*- coding: utf-8 -*-
+"""
+The public names of the package are imported from their modules on first
+use, so that ``import libpagure`` stays cheap for the short lived
+processes: requests is only imported once a client needs it, aiohttp once
+AsyncPagure is used, see LiteTransport to do without requests.
+"""
 
-from .libpagure import *  # noqa
+import sys
+
+#: the public names and the modules defining them
+_EXPORTS = {
+    'LOG': 'libpagure',
+    'NullHandler': 'libpagure',
+    'Pagure': 'libpagure',
+    'PagedList': 'libpagure',
+    'PageTiming': 'libpagure',
+    'page_count': 'libpagure',
+    'APIError': 'exceptions',
+    'TransportError': 'exceptions',
+    'Operation': 'bulk',
+    'fan_out': 'bulk',
+    'run_operations': 'bulk',
+    'ResponseCache': 'cache',
+    'TTLCache': 'cache',
+    'AsyncSingleFlight': 'coalesce',
+    'SingleFlight': 'coalesce',
+    'DiskCache': 'diskcache',
+    'Projection': 'fields',
+    'Call': 'hooks',
+    'Hook': 'hooks',
+    'LiteTransport': 'lite',
+    'MetricsCollector': 'metrics',
+    'Comment': 'models',
+    'Issue': 'models',
+    'Project': 'models',
+    'PullRequest': 'models',
+    'User': 'models',
+    'FileTokenBucket': 'ratelimit',
+    'RateLimiter': 'ratelimit',
+    'TokenBucket': 'ratelimit',
+    'RetryPolicy': 'retry',
+    'InMemoryExporter': 'tracing',
+    'JSONFileExporter': 'tracing',
+    'Tracer': 'tracing',
+    'Transport': 'transport',
+}
+# only available with aiohttp, and not part of the star imports
+_OPTIONAL_EXPORTS = {
+    'AsyncPagure': 'aio',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def _load(name):
+    import importlib
+    module = _EXPORTS.get(name) or _OPTIONAL_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(
+            __name__, name))
+    try:
+        value = getattr(importlib.import_module('.' + module, __name__),
+                        name)
+    except (ImportError, SyntaxError):
+        if name not in _OPTIONAL_EXPORTS:
+            raise
+        # aiohttp is not installed or this Python has no asyncio support
+        raise AttributeError('{} needs aiohttp, see the async extra'.format(
+            name))
+    globals()[name] = value
+    return value
+
+
+if sys.version_info >= (3, 7):
+    __getattr__ = _load
+
+    def __dir__():
+        return sorted(set(globals()) | set(_EXPORTS))
+else:
+    # no lazy module attributes before Python 3.7
+    for _name in list(_EXPORTS) + list(_OPTIONAL_EXPORTS):
+        try:
+            _load(_name)
+        except AttributeError:
+            pass
@@ -0,0 +1,1226 @@
+# -*- coding: utf-8 -*-
+"""
+asyncio flavour of the Pagure client.
+
+``AsyncPagure`` exposes the same methods as ``Pagure`` as coroutines and
+runs them on top of aiohttp, so a single event loop can keep many API
+calls in flight at once::
+
+    async with AsyncPagure(pagure_repository="foo") as pg:
+        issues, prs = await asyncio.gather(pg.list_issues(),
+                                           pg.list_requests())
+
+aiohttp is an optional dependency, install it with ``libpagure[async]``.
+"""
+
+import asyncio
+import copy
+import functools
+import inspect
+from timeit import default_timer
+
+import aiohttp
+
+from .bulk import BulkResult
+from .cache import cache_key
+from .decoders import default_decoder
+from .exceptions import APIError
+from .hooks import Hooks
+from .libpagure import (
+    LOG, STREAM_CHUNK_SIZE, PagedList, PageTiming, Pagure, _last_page,
+    page_count)
+from .models import Comment, Issue, Project, PullRequest
+from .streaming import ArrayStream
+from . import tracing
+
+
+def _encode_fields(fields):
+    """ Turn a params/data dict into a list of string pairs.
+
+    aiohttp is stricter than requests about what it accepts, so mimic the
+    requests encoding: None values are dropped, lists are sent as repeated
+    keys and everything else is converted to a string.
+    """
+    if not fields:
+        return None
+    encoded = []
+    for key, value in fields.items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple)):
+            encoded.extend((key, str(item)) for item in value)
+        else:
+            encoded.append((key, str(value)))
+    return encoded
+
+
+def _traced(func):
+    """ Wrap the coroutines and the asynchronous generators in a span,
+    the other methods are left to tracing.traced.
+    """
+    name = func.__name__
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            if self.tracer is None:
+                return await func(self, *args, **kwargs)
+            with self.tracer.span(name):
+                return await func(self, *args, **kwargs)
+
+    elif inspect.isasyncgenfunction(func):
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            if self.tracer is None:
+                async for item in func(self, *args, **kwargs):
+                    yield item
+                return
+            tracer = self.tracer
+            span = tracer.start(name)
+            iterator = func(self, *args, **kwargs)
+            try:
+                while True:
+                    with tracer.use(span):
+                        try:
+                            item = await iterator.__anext__()
+                        except StopAsyncIteration:
+                            return
+                    yield item
+            finally:
+                await iterator.aclose()
+                tracer.finish(span)
+
+    else:
+        wrapper = tracing._traced(func)
+
+    return wrapper
+
+
+@tracing.traced(exclude=('create_basic_url', 'for_repo', 'close'),
+                wrap=_traced)
+class AsyncPagure(object):
+
+    def __init__(
+            self,
+            pagure_token=None,
+            pagure_repository=None,
+            fork_username=None,
+            namespace=None,
+            instance_url="https://pagure.io",
+            insecure=False,
+            session=None,
+            limit=100,
+            json_decoder=None,
+            models=False,
+            hooks=None,
+            tracer=None,
+            single_flight=None):
+        """
+        Create an instance.
+        :param pagure_token: pagure API token
+        :param pagure_repository: pagure project name
+        :param fork_username: if this is a fork, it's the username
+             of the fork creator
+        :param instance_url: the URL of pagure instance name
+        :param session: an existing aiohttp.ClientSession to use, the
+            caller then stays in charge of closing it
+        :param limit: the maximum number of simultaneous connections
+            of the session created by this instance
+        :param json_decoder: the function decoding the body of the answers
+            from bytes, see libpagure.decoders
+        :param models: whether to return the objects of libpagure.models
+            rather than dicts, see Pagure
+        :param hooks: a list of Hook called around every API call, see
+            libpagure.hooks
+        :param tracer: a Tracer recording the calls, see libpagure.tracing
+        :param single_flight: an AsyncSingleFlight through which the
+            identical GET requests made at the same time share one request,
+            see libpagure.coalesce
+        :return:
+        """
+        self.token = pagure_token
+        self.repo = pagure_repository
+        self.username = fork_username
+        self.namespace = namespace
+        self.instance = instance_url
+        self.insecure = insecure
+        self.limit = limit
+        self.json_decoder = json_decoder or default_decoder
+        self.models = models
+        self.hooks = Hooks(hooks)
+        self.tracer = tracer
+        self.single_flight = single_flight
+        self.session = session
+        self._own_session = session is None
+        self._session_owner = self
+        if self.token:
+            self.header = {"Authorization": "token " + self.token}
+        else:
+            self.header = None
+
+    # The URL layout is the same for both clients.
+    create_basic_url = Pagure.create_basic_url
+    _projects_payload = staticmethod(Pagure._projects_payload)
+    _issues_payload = staticmethod(Pagure._issues_payload)
+    _span = Pagure._span
+    _element_hook = Pagure._element_hook
+    _project = Pagure._project
+    _project_one = Pagure._project_one
+    _with_fields = staticmethod(Pagure._with_fields)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """
+        Close the HTTP session if it was created by this instance.
+        :return:
+        """
+        if self._own_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def for_repo(self, pagure_repository, fork_username=None, namespace=None):
+        """
+        Get a client for another repository of the same instance.
+        See Pagure.for_repo, the returned client uses the HTTP session of
+        this one and closing it is left to this one.
+        :return: an AsyncPagure instance
+        """
+        view = copy.copy(self)
+        view.repo = pagure_repository
+        view.username = fork_username
+        view.namespace = namespace
+        view._own_session = False
+        return view
+
+    def _get_session(self):
+        # aiohttp sessions must be created from within a running loop
+        owner = self._session_owner
+        if owner.session is None:
+            connector = aiohttp.TCPConnector(limit=owner.limit)
+            owner.session = aiohttp.ClientSession(connector=connector)
+        return owner.session
+
+    async def _call_api(self, url, method='GET', params=None, data=None):
+        """ Method used to call the API.
+        It returns the raw JSON returned by the API or raises an exception
+        if something goes wrong.
+
+        :arg url: the URL to call
+        :kwarg method: the HTTP method to use when calling the specified
+            URL, can be GET, POST, DELETE, UPDATE...
+            Defaults to GET
+        :kwarg params: the params to specify to a GET request
+        :kwarg data: the data to send to a POST request
+
+        """
+        if self.single_flight is not None and method == 'GET':
+            return await self.single_flight.do(
+                cache_key(url, params, self.header),
+                lambda: self._request_api(url, method, params, data))
+        return await self._request_api(url, method, params, data)
+
+    async def _request_api(self, url, method='GET', params=None, data=None):
+        """ Send a request to the API and decode its answer.
+        See _call_api, which coalesces the identical requests.
+        """
+        call = self.hooks.start(self, method, url, params)
+        try:
+            with self._span('http', method=method, url=url,
+                            attempt=1) as span:
+                async with self._request(method, url, params, data) as req:
+                    status_code = req.status
+                    content = await req.read()
+                span.set(status=status_code)
+        except Exception as err:
+            self.hooks.error(call, err)
+            raise
+        self.hooks.response(call, status_code, len(content), 1, req)
+
+        try:
+            with self._span('decode', size=len(content)):
+                return self._decode(status_code, content)
+        except Exception as err:
+            self.hooks.error(call, err)
+            raise
+
+    def _request(self, method, url, params=None, data=None):
+        return self._get_session().request(
+            method=method,
+            url=url,
+            params=_encode_fields(params),
+            headers=self.header,
+            data=_encode_fields(data),
+            ssl=False if self.insecure else None)
+
+    def _decode(self, status_code, content):
+        """ Decode the body of a response, raising the API errors. """
+        output = None
+        try:
+            output = self.json_decoder(content)
+        except Exception as err:
+            LOG.debug(content)
+            raise Exception('Error while decoding JSON: {0}'.format(err))
+
+        if status_code != 200:
+            LOG.error(output)
+            if 'error_code' in output:
+                raise APIError(output['error'])
+        return output
+
+    async def _stream_api(self, url, key, params=None, fields=None,
+                          model=None):
+        """ Call the API and stream the elements of a top level array.
+        See Pagure._stream_api.
+        """
+        call = self.hooks.start(self, 'GET', url, params)
+        try:
+            req = await self._request('GET', url, params)
+        except Exception as err:
+            self.hooks.error(call, err)
+            raise
+        self.hooks.response(call, req.status, req.content_length, 1, req)
+        async with req:
+            if req.status != 200:
+                # _decode raises the errors of the API, any other answer
+                # is not the array expected either
+                try:
+                    self._decode(req.status, await req.read())
+                    raise APIError('Unexpected HTTP status {}'.format(
+                        req.status))
+                except Exception as err:
+                    self.hooks.error(call, err)
+                    raise
+
+            stream = ArrayStream(
+                key, object_hook=self._element_hook(fields, model))
+            async for chunk in req.content.iter_chunked(STREAM_CHUNK_SIZE):
+                for item in stream.feed(chunk):
+                    yield item
+                if stream.done:
+                    break
+            for item in stream.close():
+                yield item
+
+    async def _iter_pages(self, url, params, key, fields=None, model=None):
+        """ Follow the pages of a paginated endpoint.
+        See Pagure._iter_pages.
+        """
+        hook = self._element_hook(fields, model)
+        page = 1
+        while True:
+            page_params = dict(params)
+            page_params['page'] = page
+            with self._span('page', page=page) as span:
+                return_value = await self._call_api(url, params=page_params)
+                items = return_value[key]
+                if hook is not None:
+                    items = [hook(item) for item in items]
+                span.set(items=len(items))
+            last = _last_page(return_value, key, page, len(items))
+            del return_value
+
+            for item in items:
+                yield item
+
+            if last:
+                return
+            page += 1
+
+    async def _fetch_page(self, url, params, key, page):
+        """ Fetch a single page and time it.
+        See Pagure._fetch_page.
+        """
+        page_params = dict(params)
+        page_params['page'] = page
+        with self._span('page', page=page) as span:
+            start = default_timer()
+            return_value = await self._call_api(url, params=page_params)
+            timing = PageTiming(page, default_timer() - start,
+                                len(return_value[key]))
+            span.set(items=timing.count)
+        return return_value, timing
+
+    async def _list_all_pages(self, url, params, key, max_workers,
+                              model=None):
+        """ Fetch every page of a paginated endpoint.
+        See Pagure._list_all_pages, at most ``max_workers`` pages are
+        in flight at the same time.
+        """
+        hook = self._element_hook(None, model)
+        if hook is not None:
+            result = await self._list_all_pages(url, params, key, max_workers)
+            return PagedList([hook(item) for item in result],
+                             result.page_timings)
+
+        return_value, timing = await self._fetch_page(url, params, key, 1)
+        result = PagedList(return_value[key], [timing])
+        pages = page_count(return_value, key)
+
+        if pages is None:
+            page = 1
+            while not _last_page(return_value, key, page, timing.count):
+                page += 1
+                return_value, timing = await self._fetch_page(
+                    url, params, key, page)
+                result.extend(return_value[key])
+                result.page_timings.append(timing)
+            return result
+        del return_value
+
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def fetch(page):
+            async with semaphore:
+                return await self._fetch_page(url, params, key, page)
+
+        tasks = [asyncio.ensure_future(fetch(page))
+                 for page in range(2, pages + 1)]
+        try:
+            fetched = await asyncio.gather(*tasks)
+        finally:
+            # do not fetch the remaining pages once one failed
+            for task in tasks:
+                task.cancel()
+        for return_value, timing in fetched:
+            result.extend(return_value[key])
+            result.page_timings.append(timing)
+        return result
+
+    async def _imap_unordered(self, func, items, max_workers):
+        """ Call a coroutine function on every item, concurrently.
+        See libpagure.bulk.imap_unordered.
+        """
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def call(item):
+            async with semaphore:
+                try:
+                    return item, await func(item), None
+                except Exception as err:
+                    return item, None, err
+
+        for future in asyncio.as_completed([call(item) for item in items]):
+            yield await future
+
+    async def _collect(self, results):
+        collected = BulkResult()
+        async for item, result, error in results:
+            if error is None:
+                collected[item] = result
+            else:
+                collected.errors[item] = error
+        return collected
+
+    async def api_version(self):
+        """
+        Get Pagure API version.
+        :return:
+        """
+        request_url = "{}/api/0/version".format(self.instance)
+        return_value = await self._call_api(request_url)
+        return return_value['version']
+
+    async def list_users(self, pattern=None):
+        """
+        List all users registered on this Pagure instance.
+        :param pattern: filters the starting letters of the return value
+        :return:
+        """
+        request_url = "{}/api/0/users".format(self.instance)
+        params = None
+        if pattern:
+            params = {'pattern': pattern}
+        return_value = await self._call_api(request_url, params=params)
+        return return_value['users']
+
+    async def stream_users(self, pattern=None):
+        """
+        Stream the users registered on this Pagure instance.
+        See Pagure.stream_users, use it with ``async for``.
+        """
+        request_url = "{}/api/0/users".format(self.instance)
+        params = None
+        if pattern:
+            params = {'pattern': pattern}
+        async for item in self._stream_api(request_url, 'users',
+                                           params=params):
+            yield item
+
+    async def list_tags(self, pattern=None):
+        """
+        List all tags made on this project.
+        :param pattern: filters the starting letters of the return value
+        :return:
+        """
+        request_url = "{}tags".format(self.create_basic_url())
+
+        params = None
+        if pattern:
+            params = {'pattern': pattern}
+
+        return_value = await self._call_api(request_url, params=params)
+        return return_value['tags']
+
+    async def list_groups(self, pattern=None):
+        """
+        List all groups on this Pagure instance.
+        :param pattern: filters the starting letters of the return value
+        :return:
+        """
+        request_url = "{}/api/0/groups".format(self.instance)
+        params = None
+        if pattern:
+            params = {'pattern': pattern}
+
+        return_value = await self._call_api(request_url, params=params)
+        return return_value['groups']
+
+    async def error_codes(self):
+        """
+        Get a dictionary of all error codes.
+        :return:
+        """
+        request_url = "{}/api/0/error_codes".format(self.instance)
+        return_value = await self._call_api(request_url)
+        return return_value
+
+    async def list_requests(self, status=None, assignee=None, author=None,
+                            fields=None):
+        """
+        Get all pull requests of a project.
+        :param status: filters the status of the requests
+        :param assignee: filters the assignee of the requests
+        :param author: filters the author of the requests
+        :param fields: the fields to keep in each request, see
+            libpagure.fields. Defaults to all of them
+        :return:
+        """
+        request_url = "{}pull-requests".format(self.create_basic_url())
+
+        payload = {}
+        if status is not None:
+            payload['status'] = status
+        if assignee is not None:
+            payload['assignee'] = assignee
+        if author is not None:
+            payload['author'] = author
+
+        return_value = await self._call_api(request_url, params=payload)
+        return self._project(return_value['requests'], fields, PullRequest)
+
+    async def iter_requests(self, status=None, assignee=None, author=None,
+                            per_page=None, fields=None):
+        """
+        Iterate over all pull requests of a project.
+        See Pagure.iter_requests, use it with ``async for``.
+        :return: an asynchronous generator of pull requests
+        """
+        request_url = "{}pull-requests".format(self.create_basic_url())
+
+        payload = {}
+        if status is not None:
+            payload['status'] = status
+        if assignee is not None:
+            payload['assignee'] = assignee
+        if author is not None:
+            payload['author'] = author
+        if per_page is not None:
+            payload['per_page'] = str(per_page)
+
+        async for item in self._iter_pages(request_url, payload, 'requests',
+                                           fields=fields, model=PullRequest):
+            yield item
+
+    async def stream_requests(self, status=None, assignee=None, author=None,
+                              fields=None):
+        """
+        Stream the pull requests of a project.
+        See Pagure.stream_requests, use it with ``async for``.
+        """
+        request_url = "{}pull-requests".format(self.create_basic_url())
+
+        payload = {}
+        if status is not None:
+            payload['status'] = status
+        if assignee is not None:
+            payload['assignee'] = assignee
+        if author is not None:
+            payload['author'] = author
+
+        async for item in self._stream_api(request_url, 'requests',
+                                           params=payload, fields=fields,
+                                           model=PullRequest):
+            yield item
+
+    async def request_info(self, request_id, fields=None):
+        """
+        Get information of a single pull request.
+        :param request_id: the id of the request
+        :param fields: the fields to keep in the request, see
+            libpagure.fields. Defaults to all of them
+        :return:
+        """
+        request_url = "{}pull-request/{}".format(self.create_basic_url(),
+                                                 request_id)
+
+        return_value = await self._call_api(request_url)
+        return self._project_one(return_value, fields, PullRequest)
+
+    async def iter_requests_info(self, request_ids, max_workers=8,
+                                 fields=None):
+        """
+        Get information of many pull requests, concurrently.
+        See Pagure.iter_requests_info, use it with ``async for``.
+        """
+        async for result in self._imap_unordered(
+                self._with_fields(self.request_info, fields), request_ids,
+                max_workers):
+            yield result
+
+    async def requests_info_many(self, request_ids, max_workers=8,
+                                 fields=None):
+        """
+        Get information of many pull requests, concurrently.
+        See Pagure.requests_info_many.
+        """
+        return await self._collect(
+            self.iter_requests_info(request_ids, max_workers, fields))
+
+    async def merge_request(self, request_id):
+        """
+        Merge a pull request.
+        :param request_id: the id of the request
+        :return:
+        """
+        request_url = "{}pull-request/{}/merge".format(self.create_basic_url(),
+                                                       request_id)
+
+        return_value = await self._call_api(request_url, method='POST')
+
+        LOG.debug(return_value)
+
+    async def close_request(self, request_id):
+        """
+        Close a pull request.
+        :param request_id: the id of the request
+        :return:
+        """
+        request_url = "{}pull-request/{}/close".format(self.create_basic_url(),
+                                                       request_id)
+
+        return_value = await self._call_api(request_url, method='POST')
+
+        LOG.debug(return_value)
+
+    async def comment_request(self, request_id, body, commit=None,
+                              filename=None, row=None):
+        """
+        Create a comment on the request.
+        :param request_id: the id of the request
+        :param body: the comment body
+        :param commit: which commit to comment on
+        :param filename: which file to comment on
+        :param row: which line of code to comment on
+        :return:
+        """
+        request_url = ("{}pull-request/{}/comment"
+                       .format(self.create_basic_url(), request_id))
+
+        payload = {'comment': body}
+        if commit is not None:
+            payload['commit'] = commit
+        if filename is not None:
+            payload['filename'] = filename
+        if row is not None:
+            payload['row'] = row
+
+        return_value = await self._call_api(request_url,
+                                            method='POST', data=payload)
+
+        LOG.debug(return_value)
+
+    async def flag_request(self, request_id, username, percent, comment, url,
+                           uid=None, commit=None):
+        """
+        Add or edit a flag of the request.
+        :param request_id: the id of the request
+        :param username: the name of the application to be displayed
+        :param percent: the percentage of completion to be displayed
+        :param comment: a short message summarizing the flag
+        :param url: a relevant URL
+        :param uid: a unique id used to identify the flag.
+            If not provided, pagure will generate one
+        :param commit: which commit to flag on
+        :return:
+        """
+        request_url = "{}pull-request/{}/flag".format(self.create_basic_url(),
+                                                      request_id)
+
+        payload = {'username': username, 'percent': percent,
+                   'comment': comment, 'url': url}
+        if commit is not None:
+            payload['commit'] = commit
+        if uid is not None:
+            payload['uid'] = uid
+
+        return_value = await self._call_api(request_url,
+                                            method='POST', data=payload)
+
+        LOG.debug(return_value)
+
+    async def create_issue(self, title, content, priority=None,
+                           milestone=None, tags=None, assignee=None,
+                           private=None):
+        """
+        Create a new issue.
+        :param title: the title of the issue
+        :param content: the description of the issue
+        :param priority: the priority of the ticket
+        :param milestone: the milestone of the ticket
+        :param tags: comma sperated list of tag for the ticket
+        :param assignee: the assignee of the ticket
+        :param private: whether create this issue as private
+        :return:
+        """
+        request_url = "{}new_issue".format(self.create_basic_url())
+
+        payload = {'title': title, 'issue_content': content}
+
+        if priority is not None:
+            payload['priority'] = priority
+        if milestone is not None:
+            payload['milestone'] = milestone
+        if tags is not None:
+            payload['tag'] = tags
+        if assignee is not None:
+            payload['assignee'] = assignee
+        if private is not None:
+            payload['private'] = private
+
+        return_value = await self._call_api(request_url,
+                                            method='POST', data=payload)
+
+        LOG.debug(return_value)
+
+    async def list_issues(
+            self, status=None, tags=None, assignee=None, author=None,
+            milestones=None, priority=None, no_stones=None, since=None,
+            order=None, fields=None
+    ):
+        """
+        List all issues of a project.
+        :param status: filters the status of the issues
+        :param tags: filers the tags of the issues
+        :param assignee: filters the assignee of the issues
+        :param author: filters the author of the issues
+        :param milestones: filters the milestones of the issues (list of
+            strings)
+        :param priority: filters the priority of the issues
+        :param no_stones: If True returns only the issues having no milestone,
+            if False returns only the issues having a milestone
+        :param since: Filters the issues updated after this date.
+            The date can either be provided as an unix date or in the format
+            Y-M-D
+        :param order: Set the ordering of the issues. This can be asc or desc.
+            Default: desc
+        :param fields: the fields to keep in each issue, see
+            libpagure.fields. Defaults to all of them
+        :return:
+        """
+        request_url = "{}issues".format(self.create_basic_url())
+
+        payload = self._issues_payload(status, tags, assignee, author,
+                                       milestones, priority, no_stones, since,
+                                       order)
+
+        return_value = await self._call_api(request_url, params=payload)
+
+        return self._project(return_value['issues'], fields, Issue)
+
+    async def iter_issues(
+            self, status=None, tags=None, assignee=None, author=None,
+            milestones=None, priority=None, no_stones=None, since=None,
+            order=None, per_page=None, fields=None
+    ):
+        """
+        Iterate over all issues of a project.
+        See Pagure.iter_issues, use it with ``async for``.
+        :return: an asynchronous generator of issues
+        """
+        request_url = "{}issues".format(self.create_basic_url())
+
+        payload = self._issues_payload(status, tags, assignee, author,
+                                       milestones, priority, no_stones, since,
+                                       order)
+        if per_page is not None:
+            payload['per_page'] = str(per_page)
+
+        async for item in self._iter_pages(request_url, payload, 'issues',
+                                           fields=fields, model=Issue):
+            yield item
+
+    async def stream_issues(
+            self, status=None, tags=None, assignee=None, author=None,
+            milestones=None, priority=None, no_stones=None, since=None,
+            order=None, fields=None
+    ):
+        """
+        Stream the issues of a project.
+        See Pagure.stream_issues, use it with ``async for``.
+        """
+        request_url = "{}issues".format(self.create_basic_url())
+
+        payload = self._issues_payload(status, tags, assignee, author,
+                                       milestones, priority, no_stones, since,
+                                       order)
+
+        async for item in self._stream_api(request_url, 'issues',
+                                           params=payload, fields=fields,
+                                           model=Issue):
+            yield item
+
+    async def issue_info(self, issue_id, fields=None):
+        """
+        Get info about a single issue.
+        :param issue_id: the id of the issue
+        :param fields: the fields to keep in the issue, see
+            libpagure.fields. Defaults to all of them
+        :return:
+        """
+        request_url = "{}issue/{}".format(self.create_basic_url(), issue_id)
+
+        return_value = await self._call_api(request_url)
+
+        return self._project_one(return_value, fields, Issue)
+
+    async def iter_issues_info(self, issue_ids, max_workers=8, fields=None):
+        """
+        Get info about many issues, concurrently.
+        See Pagure.iter_issues_info, use it with ``async for``.
+        """
+        async for result in self._imap_unordered(
+                self._with_fields(self.issue_info, fields), issue_ids,
+                max_workers):
+            yield result
+
+    async def issues_info_many(self, issue_ids, max_workers=8, fields=None):
+        """
+        Get info about many issues, concurrently.
+        See Pagure.issues_info_many.
+        """
+        return await self._collect(
+            self.iter_issues_info(issue_ids, max_workers, fields))
+
+    async def get_list_comment(self, issue_id, comment_id):
+        """
+        Get a specific comment of an issue.
+        :param issue_id: the id of the issue
+        :param comment_id: the id of the comment
+        :return:
+        """
+        request_url = "{}issue/{}/comment/{}".format(self.create_basic_url(),
+                                                     issue_id, comment_id)
+
+        return_value = await self._call_api(request_url)
+
+        return self._project_one(return_value, model=Comment)
+
+    async def change_issue_status(self, issue_id, new_status,
+                                  close_status=None):
+        """
+        Change the status of an issue.
+        :param issue_id: the id of the issue
+        :param new_status: the new status fo the issue
+        :param close_status: optional param to add reason why issue
+            has been closed (like wontfix, fixed, duplicate, ...)
+        :return:
+        """
+        request_url = "{}issue/{}/status".format(self.create_basic_url(),
+                                                 issue_id)
+
+        payload = {'status': new_status}
+        if close_status is not None:
+            payload['close_status'] = close_status
+
+        return_value = await self._call_api(request_url,
+                                            method='POST', data=payload)
+
+        LOG.debug(return_value)
+
+    async def change_issue_milestone(self, issue_id, milestone):
+        """
+        Change the milestone of an issue.
+        :param issue_id: the id of the issue
+        :param milestone: the new milestone for the issue
+            (set None to remove milestone)
+        :return:
+        """
+        request_url = "{}issue/{}/milestone".format(self.create_basic_url(),
+                                                    issue_id)
+
+        payload = {} if milestone is None else {'milestone': milestone}
+
+        return_value = await self._call_api(request_url,
+                                            method='POST', data=payload)
+
+        LOG.debug(return_value)
+
+    async def comment_issue(self, issue_id, body):
+        """
+        Comment to an issue.
+        :param issue_id: the id of the comment
+        :param body: the comment body
+        :return:
+        """
+        request_url = "{}issue/{}/comment".format(self.create_basic_url(),
+                                                  issue_id)
+
+        payload = {'comment': body}
+
+        return_value = await self._call_api(request_url,
+                                            method='POST', data=payload)
+
+        LOG.debug(return_value)
+
+    async def project_tags(self):
+        """
+        List all git tags made to the project.
+        :return:
+        """
+        request_url = "{}git/tags".format(self.create_basic_url())
+
+        return_value = await self._call_api(request_url)
+
+        return return_value['tags']
+
+    async def list_projects(self, tags=None, pattern=None, username=None,
+                            owner=None, namespace=None, fork=None, short=None,
+                            page=None, per_page=None):
+        """
+        Lisk all projects on this Pagure instance.
+        :param tags: filters the tags of the project
+        :param pattern: filters the projects by the pattern string
+        :param username: filters the username of the project administrators
+        :param owner: filters the projects by ownership
+        :param namespace: filters the projects by namespace
+        :param fork: filters whether it is a fork (True) or not (False)
+        :param short: whether to return the entrie JSON or just a sub-set
+        :param page: specifies that pagination should be turned on and that
+            this specific page should be displayed
+        :param per_page: the number of projects to return per page.
+            The maximum is 100
+        :return:
+        """
+        request_url = "{}/api/0/projects".format(self.instance)
+
+        payload = self._projects_payload(tags, pattern, username, owner,
+                                         namespace, fork, short)
+        if page is not None:
+            payload['page'] = str(page)
+        if per_page is not None:
+            payload['per_page'] = str(per_page)
+
+        return_value = await self._call_api(request_url, params=payload)
+
+        return self._project(return_value['projects'], model=Project)
+
+    async def iter_projects(self, tags=None, pattern=None, username=None,
+                            owner=None, namespace=None, fork=None, short=None,
+                            per_page=None):
+        """
+        Iterate over all projects on this Pagure instance.
+        See Pagure.iter_projects, use it with ``async for``.
+        :return: an asynchronous generator of projects
+        """
+        request_url = "{}/api/0/projects".format(self.instance)
+
+        payload = self._projects_payload(tags, pattern, username, owner,
+                                         namespace, fork, short)
+        if per_page is not None:
+            payload['per_page'] = str(per_page)
+
+        async for item in self._iter_pages(request_url, payload, 'projects',
+                                           model=Project):
+            yield item
+
+    async def stream_projects(self, tags=None, pattern=None, username=None,
+                              owner=None, namespace=None, fork=None,
+                              short=None, page=None, per_page=None):
+        """
+        Stream the projects on this Pagure instance.
+        See Pagure.stream_projects, use it with ``async for``.
+        """
+        request_url = "{}/api/0/projects".format(self.instance)
+
+        payload = self._projects_payload(tags, pattern, username, owner,
+                                         namespace, fork, short)
+        if page is not None:
+            payload['page'] = str(page)
+        if per_page is not None:
+            payload['per_page'] = str(per_page)
+
+        async for item in self._stream_api(request_url, 'projects',
+                                           params=payload, model=Project):
+            yield item
+
+    async def list_all_projects(self, tags=None, pattern=None, username=None,
+                                owner=None, namespace=None, fork=None,
+                                short=None, per_page=100, max_workers=4):
+        """
+        List all projects on this Pagure instance, fetching the pages
+        concurrently.
+        See Pagure.list_all_projects.
+        """
+        request_url = "{}/api/0/projects".format(self.instance)
+
+        payload = self._projects_payload(tags, pattern, username, owner,
+                                         namespace, fork, short)
+        if per_page is not None:
+            payload['per_page'] = str(per_page)
+
+        return await self._list_all_pages(request_url, payload, 'projects',
+                                          max_workers, model=Project)
+
+    async def user_info(self, username):
+        """
+        Get info of a specific user.
+        :param username: the username of the user to get info about
+        :return:
+        """
+        request_url = "{}/api/0/user/{}".format(self.instance, username)
+
+        return_value = await self._call_api(request_url)
+
+        return return_value
+
+    async def user_activity_stats(self, username, format=None):
+        """
+        Retrieve the activity stats about a specific user over the last year.
+
+        Params:
+            username (string): filters the username of the user whose
+                               activity you are interested in.
+            format (string): Allows changing the of the date/time returned
+                             from iso format to unix timestamp Can be:
+                             timestamp or isoformat
+        Returns:
+            dict: A dictionary of activities done by a given user for all the
+                  projects for a given Pagure instance.
+        """
+        request_url = "{}/api/0/user/{}/activity/stats".format(
+            self.instance, username)
+
+        payload = {}
+        if username is not None:
+            payload['username'] = username
+        if format is not None:
+            payload['format'] = format
+
+        return_value = await self._call_api(request_url, params=payload)
+
+        return return_value
+
+    async def user_activity_stats_by_date(self, username, date, grouped=None):
+        """
+         Retrieve activity information about a specific user on the
+         specified date.
+
+        Params:
+            username (string): filters the username of the user whose
+                               activity you are interested in.
+            date (string): filters by the date of interest, best provided in
+                           ISO format: YYYY-MM-DD
+            grouped (boolean): filters whether or not to group the commits
+
+        Returns:
+            list: A list of activities done by a given user on some particular
+                  date for all the projects for given Pagure instance.
+        """
+        request_url = "{}/api/0/user/{}/activity/{}".format(
+            self.instance, username, date)
+
+        payload = {}
+        if username is not None:
+            payload['username'] = username
+        if date is not None:
+            payload['date'] = date
+        if grouped is not None:
+            payload['grouped'] = grouped
+
+        return_value = await self._call_api(request_url, params=payload)
+
+        return return_value['activities']
+
+    async def list_pull_requests(self, username, page, status=None):
+        """
+        List pull-requests filed by user.
+
+        Params:
+            username (string): filters the username of the user whose
+                               activity you are interested in.
+            page (integer): the page requested. Defaults to 1.
+            status (string): filter the status of pull requests. Default: Open,
+                             can be Closed, Merged, All.
+
+        Returns:
+            list: A list of Pull-Requests filed by a given user for all the
+                  projects for given Pagure instance.
+        """
+        request_url = "{}/api/0/user/{}/requests/filed".format(
+            self.instance, username)
+
+        payload = {}
+        if username is not None:
+            payload['username'] = username
+        if page is not None:
+            payload['page'] = page
+        if status is not None:
+            payload['status'] = status
+
+        return_value = await self._call_api(request_url, params=payload)
+
+        return self._project(return_value['requests'], model=PullRequest)
+
+    async def iter_pull_requests(self, username, status=None):
+        """
+        Iterate over the pull-requests filed by user.
+        See Pagure.iter_pull_requests, use it with ``async for``.
+        """
+        request_url = "{}/api/0/user/{}/requests/filed".format(
+            self.instance, username)
+
+        payload = {'username': username}
+        if status is not None:
+            payload['status'] = status
+
+        async for item in self._iter_pages(request_url, payload, 'requests',
+                                           model=PullRequest):
+            yield item
+
+    async def list_all_pull_requests(self, username, status=None,
+                                     max_workers=4):
+        """
+        List all the pull-requests filed by user, fetching the pages
+        concurrently.
+        See Pagure.list_all_pull_requests.
+        """
+        request_url = "{}/api/0/user/{}/requests/filed".format(
+            self.instance, username)
+
+        payload = {'username': username}
+        if status is not None:
+            payload['status'] = status
+
+        return await self._list_all_pages(request_url, payload, 'requests',
+                                          max_workers, model=PullRequest)
+
+    async def list_prs_actionable_by_user(self, username, page, status=None):
+        """
+        List PRs actionable by user.
+
+        Params:
+            username (string): filters the username of the user whose
+                               activity you are interested in.
+            page (integer): the page requested. Defaults to 1.
+            status (string): filter the status of pull requests. Default: Open,
+                             can be Closed, Merged, All.
+
+        Returns:
+            list: A list of Pull-Requests a user is able to action for all the
+                  projects for given Pagure instance.
+        """
+        request_url = "{}/api/0/user/{}/requests/actionable".format(
+            self.instance, username)
+
+        payload = {}
+        if username is not None:
+            payload['username'] = username
+        if page is not None:
+            payload['page'] = page
+        if status is not None:
+            payload['status'] = status
+
+        return_value = await self._call_api(request_url, params=payload)
+
+        return self._project(return_value['requests'], model=PullRequest)
+
+    async def iter_prs_actionable_by_user(self, username, status=None):
+        """
+        Iterate over the pull-requests actionable by user.
+        See Pagure.iter_prs_actionable_by_user, use it with ``async for``.
+        """
+        request_url = "{}/api/0/user/{}/requests/actionable".format(
+            self.instance, username)
+
+        payload = {'username': username}
+        if status is not None:
+            payload['status'] = status
+
+        async for item in self._iter_pages(request_url, payload, 'requests',
+                                           model=PullRequest):
+            yield item
+
+    async def list_all_prs_actionable_by_user(self, username, status=None,
+                                              max_workers=4):
+        """
+        List all the pull-requests actionable by user, fetching the pages
+        concurrently.
+        See Pagure.list_all_prs_actionable_by_user.
+        """
+        request_url = "{}/api/0/user/{}/requests/actionable".format(
+            self.instance, username)
+
+        payload = {'username': username}
+        if status is not None:
+            payload['status'] = status
+
+        return await self._list_all_pages(request_url, payload, 'requests',
+                                          max_workers, model=PullRequest)
+
+    async def new_project(self, name, description, namespace=None, url=None,
+                          avatar_email=None, create_readme=False,
+                          private=False):
+        """
+        Create a new project on the pagure instance
+        :param name: the name of the new project.
+        :param description: A short description of the new project.
+        :param namespace: The namespace of the project to fork
+        :param url: A url providing more information about the project.
+        :param avatar_email: An email address for the avatar of the project.
+        :param create_readme: Boolean to specify if there should be a
+            readme added to the project on creation.
+        :param private: boolean to specify if the project is private
+        :return:
+        """
+        request_url = "{}/api/0/new".format(self.instance)
+
+        payload = {'name': name, 'description': description}
+        if namespace is not None:
+            payload['namespace'] = namespace
+        if url is not None:
+            payload['url'] = url
+        if avatar_email is not None:
+            payload['avatar_email'] = avatar_email
+        payload['create_readme'] = create_readme
+        payload['private'] = private
+
+        return_value = await self._call_api(request_url, data=payload,
+                                            method='POST')
+
+        return return_value['message']
+
+    async def project_branches(self):
+        """
+        List all branches associated with a repository.
+        :return:
+        """
+        request_url = "{}git/branches".format(self.create_basic_url())
+
+        return_value = await self._call_api(request_url)
+
+        return return_value['branches']
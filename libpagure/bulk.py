@@ -0,0 +1,336 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers running many API calls concurrently.
+
+The calls are spread over a bounded pool of threads. Use a client created
+with ``Transport(per_thread_sessions=True)`` to be on the safe side, see
+``libpagure.transport``.
+
+Write operations are described by ``Operation`` objects and applied with
+``run_operations``, which reports the outcome of each of them and can
+record the applied ones in a checkpoint file so that a crashed run can be
+resumed without applying them twice::
+
+    ops = [Operation('change_issue_status', [issue_id, 'Closed'],
+                     {'close_status': 'wontfix'}) for issue_id in stale]
+    report = run_operations(pg, ops, max_workers=8,
+                            checkpoint='triage.checkpoint')
+    failed = [result for result in report if result.status == FAILED]
+
+The rate of the writes is the one allowed by the rate limiter and retry
+policy of the client, see ``libpagure.ratelimit`` and ``libpagure.retry``.
+
+``fan_out`` runs the same call on many repositories::
+
+    for repo, issues, error, elapsed in fan_out(
+            pg, ['foo', {'pagure_repository': 'bar', 'namespace': 'rpms'}],
+            'list_issues', kwargs={'status': 'Open'}):
+        ...
+"""
+
+import json
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from timeit import default_timer
+
+from .tracing import submit
+
+#: statuses of an OperationResult
+DONE = 'done'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+
+class BulkResult(dict):
+    """ The results of a bulk call, keyed by the item they were made for.
+
+    The items whose call failed are left out and their exception is kept
+    in ``errors`` instead.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(BulkResult, self).__init__(*args, **kwargs)
+        self.errors = {}
+
+
+def imap_unordered(func, items, max_workers):
+    """ Call a function on every item, concurrently.
+
+    At most ``max_workers`` calls are in flight, and only as many items
+    are read from ``items``, so it can be a lazy iterable. Exceptions are
+    not raised but handed back with the item they were raised for.
+
+    :arg func: the function to call with each item
+    :arg items: the items
+    :arg max_workers: the number of calls running at the same time
+    :return: a generator of (item, result, error) tuples, in the order the
+        calls complete. ``error`` is None when the call succeeded.
+    """
+    items = iter(items)
+    pending = {}
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        for item in items:
+            pending[submit(executor, func, item)] = item
+            if len(pending) >= max_workers:
+                break
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                error = future.exception()
+                if error is None:
+                    yield item, future.result(), None
+                else:
+                    yield item, None, error
+                for next_item in items:
+                    pending[submit(executor, func, next_item)] = next_item
+                    break
+    finally:
+        # do not start the remaining calls if the caller stopped early
+        for future in list(pending):
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def collect(results):
+    """ Gather the tuples of imap_unordered in a BulkResult. """
+    collected = BulkResult()
+    for item, result, error in results:
+        if error is None:
+            collected[item] = result
+        else:
+            collected.errors[item] = error
+    return collected
+
+
+class Operation(object):
+    """ A call to a method of a Pagure client. """
+
+    __slots__ = ('method', 'args', 'kwargs', 'repo', '_key')
+
+    def __init__(self, method, args=None, kwargs=None, repo=None, key=None):
+        """
+        Describe an operation.
+        :param method: the name of the Pagure method to call
+        :param args: the positional arguments of the call
+        :param kwargs: the keyword arguments of the call
+        :param repo: a dict of for_repo arguments selecting the repository
+            to run the operation on, by default the client's repository
+        :param key: a unique identifier of the operation, used in the
+            checkpoint files. Derived from the other fields by default
+        :return:
+        """
+        if method.startswith('_'):
+            raise ValueError('{} is not a Pagure method'.format(method))
+        if args is not None and not isinstance(args, (list, tuple)):
+            raise ValueError('The args of an operation are a list')
+        if kwargs is not None and not isinstance(kwargs, dict):
+            raise ValueError('The kwargs of an operation are a dict')
+        self.method = method
+        self.args = list(args or [])
+        self.kwargs = dict(kwargs or {})
+        self.repo = dict(repo) if repo else None
+        self._key = key
+
+    @property
+    def key(self):
+        if self._key is None:
+            self._key = json.dumps(self.to_dict(), sort_keys=True)
+        return self._key
+
+    def to_dict(self):
+        """ Return the operation as a dict of JSON compatible values. """
+        operation = {'method': self.method, 'args': self.args,
+                     'kwargs': self.kwargs}
+        if self.repo:
+            operation['repo'] = self.repo
+        if self._key is not None:
+            operation['key'] = self._key
+        return operation
+
+    @classmethod
+    def from_dict(cls, operation):
+        """ Create an operation from the output of to_dict. """
+        return cls(operation['method'], operation.get('args'),
+                   operation.get('kwargs'), operation.get('repo'),
+                   operation.get('key'))
+
+    def __repr__(self):
+        return 'Operation({!r}, {!r}, {!r}, repo={!r})'.format(
+            self.method, self.args, self.kwargs, self.repo)
+
+    def apply(self, client):
+        """
+        Run the operation.
+        :param client: the Pagure client to run it with
+        :return: what the method returned
+        """
+        if self.repo:
+            client = client.for_repo(**self.repo)
+        return getattr(client, self.method)(*self.args, **self.kwargs)
+
+
+OperationResult = namedtuple(
+    'OperationResult', ['operation', 'status', 'result', 'error'])
+
+
+class Checkpoint(object):
+    """ The keys of the operations already applied, kept in a file.
+
+    Each key is appended on its own line and flushed to disk as soon as
+    its operation succeeded, so the file survives a crash of the process.
+    Use it as a context manager, or call close, to release the file.
+    """
+
+    def __init__(self, path):
+        """
+        Open a checkpoint, loading the keys already recorded.
+        :param path: the path of the checkpoint file
+        :return:
+        """
+        self.path = path
+        self._done = set()
+        if os.path.exists(path):
+            with open(path, 'r+') as stream:
+                complete = 0
+                for line in iter(stream.readline, ''):
+                    if not line.endswith('\n'):
+                        # cut by a crash, the operation was not recorded
+                        stream.truncate(complete)
+                        break
+                    self._done.add(json.loads(line))
+                    complete += len(line)
+        self._lock = threading.Lock()
+        self._stream = open(path, 'a')
+
+    def __contains__(self, key):
+        return key in self._done
+
+    def __len__(self):
+        return len(self._done)
+
+    def add(self, key):
+        """
+        Record that an operation was applied.
+        :param key: the key of the operation
+        :return:
+        """
+        with self._lock:
+            self._done.add(key)
+            self._stream.write(json.dumps(key) + '\n')
+            self._stream.flush()
+            os.fsync(self._stream.fileno())
+
+    def close(self):
+        self._stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_operations(client, operations, max_workers=4, checkpoint=None):
+    """ Apply operations concurrently.
+
+    A failed operation does not stop the others.
+
+    :arg client: the Pagure client to run the operations with
+    :arg operations: an iterable of Operation, possibly lazy
+    :kwarg max_workers: the number of operations running at the same time
+    :kwarg checkpoint: a Checkpoint, or the path of one, recording the
+        applied operations. The operations it already holds are skipped
+    :return: a generator of OperationResult, in the order the operations
+        complete
+    """
+    own_checkpoint = checkpoint is not None and \
+        not isinstance(checkpoint, Checkpoint)
+    if own_checkpoint:
+        checkpoint = Checkpoint(checkpoint)
+    skipped = []
+
+    def pending():
+        for operation in operations:
+            if checkpoint is not None and operation.key in checkpoint:
+                skipped.append(operation)
+            else:
+                yield operation
+
+    def apply(operation):
+        result = operation.apply(client)
+        if checkpoint is not None:
+            # recorded by the worker, even when the results are not all read
+            checkpoint.add(operation.key)
+        return result
+
+    results = imap_unordered(apply, pending(), max_workers)
+    try:
+        for operation, result, error in results:
+            while skipped:
+                yield OperationResult(skipped.pop(0), SKIPPED, None, None)
+            if error is not None:
+                yield OperationResult(operation, FAILED, None, error)
+                continue
+            yield OperationResult(operation, DONE, result, None)
+        while skipped:
+            yield OperationResult(skipped.pop(0), SKIPPED, None, None)
+    finally:
+        # wait for the operations in flight before closing the checkpoint
+        results.close()
+        if own_checkpoint:
+            checkpoint.close()
+
+
+def run_operations(client, operations, max_workers=4, checkpoint=None):
+    """ Apply operations concurrently and report on each of them.
+
+    See iter_operations.
+
+    :return: a list of OperationResult, in the order of the operations
+    """
+    operations = list(operations)
+    order = dict((id(operation), index)
+                 for index, operation in enumerate(operations))
+    report = list(iter_operations(client, operations, max_workers,
+                                  checkpoint))
+    report.sort(key=lambda result: order[id(result.operation)])
+    return report
+
+
+RepoResult = namedtuple('RepoResult', ['repo', 'result', 'error', 'elapsed'])
+
+
+def fan_out(client, repos, method, args=None, kwargs=None, max_workers=16):
+    """ Call the same method on many repositories, concurrently.
+
+    The per repository clients are derived with ``client.for_repo`` and
+    share its session, caches and rate limiter.
+
+    :arg client: the Pagure client of the instance
+    :arg repos: an iterable of repositories, either names or dicts of
+        for_repo arguments (pagure_repository, fork_username, namespace)
+    :arg method: the name of the Pagure method to call
+    :kwarg args: the positional arguments of the call
+    :kwarg kwargs: the keyword arguments of the call
+    :kwarg max_workers: the number of repositories queried at the same time
+    :return: a generator of RepoResult (repo as given, result, error,
+        seconds spent), in the order the calls complete
+    """
+    def call(repo):
+        start = default_timer()
+        try:
+            spec = repo if isinstance(repo, dict) \
+                else {'pagure_repository': repo}
+            operation = Operation(method, args, kwargs, repo=spec)
+            return operation.apply(client), None, default_timer() - start
+        except Exception as err:
+            return None, err, default_timer() - start
+
+    for repo, outcome, _ in imap_unordered(call, repos, max_workers):
+        result, error, elapsed = outcome
+        yield RepoResult(repo, result, error, elapsed)
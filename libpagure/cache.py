@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+Caching of the API answers.
+
+``ResponseCache`` keeps the decoded JSON of GET requests along with the
+ETag/Last-Modified validators sent by the server. When a cache is given
+to ``Pagure`` the validators are sent back with the next identical
+request and a ``304 Not Modified`` answer is served from the cache,
+without downloading nor decoding the body again::
+
+    pg = Pagure(pagure_repository="foo", cache=ResponseCache(max_entries=512))
+
+``TTLCache`` memoizes the instance wide endpoints whose answers barely
+change (API version, error codes, users and groups) for a configurable
+time, without asking the server at all::
+
+    pg = Pagure(metadata_cache=TTLCache(ttls={'version': 3600}))
+
+The cached objects are shared between the callers, they must not be
+modified in place.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+try:
+    from urllib.parse import urlencode
+except ImportError:  # Python 2
+    from urllib import urlencode
+
+
+try:
+    _clock = time.monotonic
+except AttributeError:  # Python 2
+    _clock = time.time
+
+
+CacheEntry = namedtuple(
+    'CacheEntry', ['etag', 'last_modified', 'output', 'size', 'expires'])
+# the time, from time.time, until which the answer can be used without
+# asking the server, None when it always has to be revalidated
+CacheEntry.__new__.__defaults__ = (None,)
+
+
+def cache_key(url, params=None, headers=None):
+    """ Build the key identifying a GET request in a cache.
+
+    The params are sorted so that their order does not matter and the
+    authorization header is hashed, answers may depend on who is asking
+    but the token itself should not end up in the cache.
+
+    :arg url: the URL called
+    :kwarg params: the params sent along with the request
+    :kwarg headers: the headers sent along with the request
+    """
+    key = url
+    if params:
+        items = sorted((k, v) for k, v in params.items() if v is not None)
+        key = '{}?{}'.format(key, urlencode(items, doseq=True))
+    authorization = (headers or {}).get('Authorization')
+    if authorization:
+        digest = hashlib.sha1(authorization.encode('utf-8')).hexdigest()
+        key = '{}#{}'.format(key, digest)
+    return key
+
+
+class ResponseCache(object):
+    """ A thread safe in-memory LRU cache of API answers.
+
+    The least recently used entries are evicted once either limit is
+    reached, ``size`` being the length of the body the entry was decoded
+    from.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=None):
+        """
+        Create a cache.
+        :param max_entries: the maximum number of answers to keep
+        :param max_bytes: the maximum total size of the kept answers,
+            None for no limit
+        :return:
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self):
+        """ The total size of the kept answers. """
+        return self._bytes
+
+    def get(self, key):
+        """
+        Get the entry stored for a request.
+        :param key: the key of the request, see cache_key
+        :return: a CacheEntry or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            # mark the entry as the most recently used
+            del self._entries[key]
+            self._entries[key] = entry
+            return entry
+
+    def set(self, key, entry):
+        """
+        Store the entry of a request, evicting older entries if needed.
+        :param key: the key of the request, see cache_key
+        :param entry: a CacheEntry
+        :return:
+        """
+        with self._lock:
+            self._remove(key)
+            if not entry.etag and not entry.last_modified:
+                # nothing to revalidate it with
+                return
+            if self.max_bytes is not None and entry.size > self.max_bytes:
+                return
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while (len(self._entries) > self.max_entries or
+                   (self.max_bytes is not None and
+                    self._bytes > self.max_bytes)):
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, key):
+        """
+        Forget about a request.
+        :param key: the key of the request, see cache_key
+        :return:
+        """
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        """
+        Empty the cache.
+        :return:
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+
+class TTLCache(object):
+    """ A thread safe cache whose entries expire after a fixed time.
+
+    Entries are grouped by endpoint, each endpoint having its own time to
+    live.
+    """
+
+    #: default time to live of the memoized endpoints, in seconds
+    DEFAULT_TTLS = {
+        'version': 3600,
+        'error_codes': 3600,
+        'groups': 300,
+        'users': 300,
+    }
+
+    def __init__(self, ttl=300, ttls=None, clock=_clock):
+        """
+        Create a cache.
+        :param ttl: the time to live of the endpoints not listed in ttls
+        :param ttls: a dict overriding DEFAULT_TTLS, mapping an endpoint
+            name to its time to live in seconds
+        :param clock: the function returning the current time
+        :return:
+        """
+        self.ttl = ttl
+        self.ttls = dict(self.DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        self._clock = clock
+        self._entries = {}
+        self._hits = {}
+        self._misses = {}
+        self._lock = threading.Lock()
+
+    def get(self, endpoint, key):
+        """
+        Get the value stored for a request if it did not expire yet.
+        :param endpoint: the name of the endpoint
+        :param key: the key of the request, see cache_key
+        :return: a (found, value) tuple
+        """
+        with self._lock:
+            entry = self._entries.get((endpoint, key))
+            if entry is not None and entry[0] > self._clock():
+                self._hits[endpoint] = self._hits.get(endpoint, 0) + 1
+                return True, entry[1]
+            self._entries.pop((endpoint, key), None)
+            self._misses[endpoint] = self._misses.get(endpoint, 0) + 1
+            return False, None
+
+    def set(self, endpoint, key, value):
+        """
+        Store the value of a request.
+        :param endpoint: the name of the endpoint
+        :param key: the key of the request, see cache_key
+        :param value: the value to store
+        :return:
+        """
+        ttl = self.ttls.get(endpoint, self.ttl)
+        with self._lock:
+            self._entries[(endpoint, key)] = (self._clock() + ttl, value)
+
+    def invalidate(self, endpoint=None):
+        """
+        Drop the stored values.
+        :param endpoint: only drop the values of this endpoint,
+            by default everything is dropped
+        :return:
+        """
+        with self._lock:
+            if endpoint is None:
+                self._entries.clear()
+            else:
+                for entry_key in list(self._entries):
+                    if entry_key[0] == endpoint:
+                        del self._entries[entry_key]
+
+    def stats(self):
+        """
+        Get the hits, misses and number of stored values of each endpoint.
+        :return: a dict mapping the endpoint names to dicts with the
+            ``hits``, ``misses`` and ``entries`` keys
+        """
+        with self._lock:
+            endpoints = (set(self._hits) | set(self._misses) |
+                         set(endpoint for endpoint, _ in self._entries))
+            return dict(
+                (endpoint, {
+                    'hits': self._hits.get(endpoint, 0),
+                    'misses': self._misses.get(endpoint, 0),
+                    'entries': sum(1 for name, _ in self._entries
+                                   if name == endpoint),
+                })
+                for endpoint in endpoints)
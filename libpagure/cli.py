@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+Run a file of API operations, concurrently.
+
+Each line of the input is a JSON operation, as written by
+``Operation.to_dict``, the repository being either a name or a dict of
+``for_repo`` arguments::
+
+    {"method": "comment_issue", "args": [12, "Fixed in 1.2"], "repo": "foo"}
+    {"method": "flag_request", "kwargs": {"request_id": 3, "username": "ci",
+     "percent": 100, "comment": "ok", "url": "https://ci"},
+     "repo": {"pagure_repository": "bar", "namespace": "rpms"}}
+
+Each line of the output is a JSON result, written as soon as its
+operation completes::
+
+    {"line": 1, "operation": {...}, "status": "done", "result": ...,
+     "error": null}
+
+The operations are run by a pool of ``--workers`` threads sharing one
+client, within the rates given with ``--read-rate`` and ``--write-rate``.
+With ``--checkpoint`` the applied operations are recorded, and skipped
+when the same file is run again::
+
+    $ export PAGURE_TOKEN=...
+    $ libpagure --workers 16 --write-rate 5 --checkpoint ops.done \\
+          ops.jsonl > results.jsonl
+
+The exit status is 1 when an operation failed, 0 otherwise.
+"""
+
+import argparse
+import json
+import os
+import sys
+import types
+from timeit import default_timer
+
+from .bulk import DONE, FAILED, SKIPPED, Operation, iter_operations
+from .models import Model
+
+
+class _Operation(Operation):
+    """ An Operation run entirely by its worker thread. """
+
+    __slots__ = ()
+
+    def apply(self, client):
+        result = super(_Operation, self).apply(client)
+        if isinstance(result, types.GeneratorType):
+            # iterated here rather than by the thread writing the results
+            result = list(result)
+        return result
+
+
+def parse_operation(line):
+    """
+    Parse a line of the input.
+    :param line: a JSON object, see the module documentation
+    :return: an Operation
+    """
+    data = json.loads(line)
+    if not isinstance(data, dict) or 'method' not in data:
+        raise ValueError('An operation is an object with a method')
+    repo = data.get('repo')
+    if repo is not None and not isinstance(repo, dict):
+        repo = {'pagure_repository': repo}
+    return _Operation(data['method'], data.get('args'), data.get('kwargs'),
+                      repo, data.get('key'))
+
+
+def _default(value):
+    if isinstance(value, Model):
+        return value.to_dict()
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    return str(value)
+
+
+def _error(error):
+    return {'type': type(error).__name__, 'message': str(error)}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='libpagure', description=__doc__.split('\n\n')[0],
+        epilog='The input format is described in libpagure.cli.')
+    parser.add_argument('input', nargs='?', default='-',
+                        help='the JSONL file of operations, - for stdin')
+    parser.add_argument('-o', '--output', default='-',
+                        help='the JSONL file of results, - for stdout')
+    parser.add_argument('--instance-url', default='https://pagure.io',
+                        help='the URL of the pagure instance')
+    parser.add_argument('--repo', help='the repository of the operations '
+                        'which do not name one')
+    parser.add_argument('--namespace', help='the namespace of --repo')
+    parser.add_argument('--fork-username', help='the owner of the fork, '
+                        'when --repo is a fork')
+    parser.add_argument('--insecure', action='store_true',
+                        help='do not verify the TLS certificates')
+    parser.add_argument('-w', '--workers', type=int, default=8,
+                        help='the number of operations run at the same time')
+    parser.add_argument('--read-rate', type=float,
+                        help='the maximum number of reads per second')
+    parser.add_argument('--write-rate', type=float,
+                        help='the maximum number of writes per second')
+    parser.add_argument('--rate-file', help='share the write rate with the '
+                        'other processes using this file')
+    parser.add_argument('--retries', type=int, default=3,
+                        help='the maximum number of attempts per request')
+    parser.add_argument('--checkpoint', help='record the applied '
+                        'operations in this file, and skip those it holds')
+    parser.add_argument('--lite', action='store_true',
+                        help='send the requests with http.client rather '
+                        'than requests, see LiteTransport')
+    return parser
+
+
+def build_client(args):
+    """
+    Create the client shared by the workers.
+    :param args: the parsed command line
+    :return: a Pagure instance
+    """
+    from .libpagure import Pagure
+    from .ratelimit import FileTokenBucket, RateLimiter, TokenBucket
+    from .retry import RetryPolicy
+
+    if args.lite:
+        from .lite import LiteTransport
+        transport = LiteTransport()
+    else:
+        from .transport import Transport
+        transport = Transport(pool_maxsize=args.workers,
+                              per_thread_sessions=True,
+                              insecure=args.insecure)
+
+    rate_limiter = None
+    if args.read_rate or args.write_rate:
+        read = TokenBucket(args.read_rate) if args.read_rate else None
+        write = None
+        if args.write_rate and args.rate_file:
+            write = FileTokenBucket(args.rate_file, args.write_rate)
+        elif args.write_rate:
+            write = TokenBucket(args.write_rate)
+        rate_limiter = RateLimiter(read=read, write=write)
+
+    return Pagure(
+        pagure_token=os.environ.get('PAGURE_TOKEN'),
+        pagure_repository=args.repo,
+        fork_username=args.fork_username,
+        namespace=args.namespace,
+        instance_url=args.instance_url.rstrip('/'),
+        insecure=args.insecure,
+        transport=transport,
+        retry=RetryPolicy(max_attempts=args.retries) if args.retries > 1
+        else None,
+        rate_limiter=rate_limiter)
+
+
+def run(client, lines, output, workers=8, checkpoint=None):
+    """
+    Run the operations of the lines, writing a result line for each one.
+    :param client: the Pagure client
+    :param lines: an iterable of the lines of the input, read as needed
+    :param output: the file the results are written to
+    :param workers: the number of operations run at the same time
+    :param checkpoint: the path of the checkpoint file, if any
+    :return: a dict counting the results by status
+    """
+    counts = {}
+    numbers = {}
+
+    def write(number, operation, status, result=None, error=None):
+        counts[status] = counts.get(status, 0) + 1
+        try:
+            line = json.dumps({
+                'line': number, 'operation': operation, 'status': status,
+                'result': result, 'error': error}, default=_default)
+        except (TypeError, ValueError) as err:
+            counts[status] -= 1
+            counts[FAILED] = counts.get(FAILED, 0) + 1
+            line = json.dumps({
+                'line': number, 'operation': operation, 'status': FAILED,
+                'result': None, 'error': _error(err)})
+        output.write(line + '\n')
+        output.flush()
+
+    def operations():
+        # read by the thread writing the results, as the workers free up
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                operation = parse_operation(line)
+            except (TypeError, ValueError) as err:
+                write(number, None, FAILED, error=_error(err))
+                continue
+            numbers[id(operation)] = number
+            yield operation
+
+    for outcome in iter_operations(client, operations(), workers,
+                                   checkpoint):
+        operation = outcome.operation
+        write(numbers.pop(id(operation)), operation.to_dict(),
+              outcome.status, outcome.result,
+              _error(outcome.error) if outcome.error is not None else None)
+    return counts
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    client = build_client(args)
+
+    if args.input == '-':
+        lines = sys.stdin
+    else:
+        lines = open(args.input)
+    output = sys.stdout if args.output == '-' else open(args.output, 'w')
+    start = default_timer()
+    try:
+        counts = run(client, lines, output, args.workers, args.checkpoint)
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+        if output is not sys.stdout:
+            output.close()
+        client.transport.close()
+
+    sys.stderr.write('{} done, {} failed, {} skipped in {:.1f}s\n'.format(
+        counts.get(DONE, 0), counts.get(FAILED, 0), counts.get(SKIPPED, 0),
+        default_timer() - start))
+    return 1 if counts.get(FAILED) else 0
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Coalescing of the identical GET requests made at the same time.
+
+When several threads ask for the same answer while a request for it is
+already in flight, they wait for that request and share its decoded
+answer instead of sending their own::
+
+    flights = SingleFlight()
+    pg = Pagure(pagure_repository="foo", single_flight=flights)
+    # many threads calling pg.request_info(12) at once: one HTTP request
+    ...
+    flights.collapsed  # the number of calls which did not send a request
+
+``AsyncSingleFlight`` does the same for the tasks of an ``AsyncPagure``.
+
+The requests are identical when their URL, params and authorization are,
+see ``libpagure.cache.cache_key``. Only the calls overlapping in time are
+coalesced, nothing is kept once the request is answered; a ResponseCache
+can be used along to avoid downloading the answers again. Like the cached
+ones, the shared answers must not be modified in place. The hooks only
+see the calls which sent a request.
+"""
+
+import threading
+
+try:
+    import asyncio
+except ImportError:  # Python 2
+    asyncio = None
+
+
+class _Flight(object):
+    """ A call in flight, waited for by the identical ones. """
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """ A thread safe group of calls in flight, by key. """
+
+    def __init__(self):
+        #: the number of calls which shared the answer of another
+        self.collapsed = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._flights)
+
+    def do(self, key, func):
+        """
+        Call func, unless a call with the same key is in flight, in which
+        case wait for it and return its result, or raise its exception.
+        :param key: the key identifying the call
+        :param func: the function making the call, without arguments
+        :return: the result of the call
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.collapsed += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = func()
+        except BaseException as err:
+            flight.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+
+class AsyncSingleFlight(object):
+    """ A group of calls in flight, by key, for the tasks of one event
+    loop.
+    """
+
+    def __init__(self):
+        #: the number of calls which shared the answer of another
+        self.collapsed = 0
+        self._flights = {}
+
+    def __len__(self):
+        return len(self._flights)
+
+    def do(self, key, factory):
+        """
+        Run the coroutine made by factory, unless a call with the same key
+        is in flight, in which case wait for that one.
+
+        The call runs in its own task, so cancelling one of the callers
+        does not cancel it for the others.
+
+        :param key: the key identifying the call
+        :param factory: the function making the coroutine of the call,
+            without arguments
+        :return: an awaitable of the result of the call
+        """
+        task = self._flights.get(key)
+        if task is not None:
+            self.collapsed += 1
+        else:
+            task = self._flights[key] = asyncio.ensure_future(factory())
+            task.add_done_callback(lambda task: self._done(key, task))
+        return asyncio.shield(task)
+
+    def _done(self, key, task):
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        if not task.cancelled():
+            # retrieved, even if every caller was cancelled meanwhile
+            task.exception()
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+JSON decoders for the API answers.
+
+A decoder is a function taking the raw body of an answer, as bytes, and
+returning the decoded object. ``Pagure`` uses ``default_decoder`` unless
+told otherwise with its ``json_decoder`` argument: orjson when it is
+installed, the json module of the standard library otherwise. Both decode
+the bytes directly, without building a text copy of the body first.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def stdlib_decoder(content):
+    """ Decode a body with the json module of the standard library. """
+    try:
+        # json detects the encoding of bytes by itself since Python 3.6
+        return json.loads(content)
+    except TypeError:  # older Pythons only take text
+        return json.loads(content.decode('utf-8'))
+
+
+def orjson_decoder(content):
+    """ Decode a body with orjson, which must be installed. """
+    return orjson.loads(content)
+
+
+if orjson is not None:
+    default_decoder = orjson_decoder
+else:
+    default_decoder = stdlib_decoder
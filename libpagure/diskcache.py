@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+"""
+A cache of the API answers kept on disk, surviving the process.
+
+``DiskCache`` has the interface of ``ResponseCache`` and is given to
+``Pagure`` the same way. The answers are stored in a sqlite database,
+shared by every process using the same file::
+
+    pg = Pagure(pagure_repository="foo", cache=DiskCache())
+
+The answers carrying an ETag or a Last-Modified header are revalidated
+with the server, as with ResponseCache. On top of that, the answers of the
+endpoints matching ``ttls`` are used without asking the server at all
+until their time to live expires, so that short lived processes do not
+pay again for the version of the instance or the branches of a project.
+
+The decoded answers are stored as compressed JSON. The least recently
+used ones are evicted once ``max_bytes`` of compressed data, or
+``max_entries``, is reached.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+from .cache import CacheEntry
+from .decoders import default_decoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+#: default time to live of the answers of the URLs matching the regular
+#: expressions, in seconds
+DEFAULT_TTLS = {
+    r'/api/0/version$': 3600,
+    r'/api/0/error_codes$': 3600,
+    r'/api/0/groups$': 300,
+    r'/api/0/users$': 300,
+    r'/git/branches$': 60,
+    r'/(git/)?tags$': 60,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    expires REAL,
+    size INTEGER NOT NULL,
+    stored INTEGER NOT NULL,
+    accessed REAL NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+"""
+
+
+def default_path():
+    """ Return the path of the cache in the cache directory of the user. """
+    base = os.environ.get('XDG_CACHE_HOME') or \
+        os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'libpagure', 'cache.sqlite')
+
+
+def _encode(output):
+    if orjson is not None:
+        data = orjson.dumps(output)
+    else:
+        data = json.dumps(output, separators=(',', ':')).encode('utf-8')
+    return zlib.compress(data)
+
+
+class DiskCache(object):
+    """ A cache of API answers in a sqlite database.
+
+    It is thread safe and several processes can use the same file at the
+    same time.
+    """
+
+    def __init__(self, path=None, max_bytes=64 * 1024 * 1024,
+                 max_entries=None, ttl=0, ttls=None, timeout=30,
+                 json_decoder=None):
+        """
+        Open the cache, creating the database if needed.
+        :param path: the path of the database, see default_path
+        :param max_bytes: the maximum total size of the compressed answers,
+            None for no limit
+        :param max_entries: the maximum number of answers, None for no
+            limit
+        :param ttl: the time to live of the answers of the URLs not
+            matching any of ttls, 0 to always revalidate them
+        :param ttls: a dict overriding DEFAULT_TTLS, mapping regular
+            expressions searched in the URLs to times to live in seconds
+        :param timeout: the seconds to wait for the other processes to
+            release the database
+        :param json_decoder: the function decoding the stored answers,
+            see libpagure.decoders
+        :return:
+        """
+        self.path = path or default_path()
+        directory = os.path.dirname(os.path.abspath(self.path))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        ttls_by_pattern = dict(DEFAULT_TTLS)
+        ttls_by_pattern.update(ttls or {})
+        self.ttls = [(re.compile(pattern), seconds)
+                     for pattern, seconds in ttls_by_pattern.items()]
+        self.timeout = timeout
+        self.json_decoder = json_decoder or default_decoder
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+
+    def _connect(self):
+        # a connection must not be used by the children of a fork
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None,
+                check_same_thread=False)
+            # the readers do not block the writer, nor the other way round
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def close(self):
+        """
+        Close the database, it is opened again when needed.
+        :return:
+        """
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+    def __len__(self):
+        with self._lock:
+            return self._connect().execute(
+                'SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    @property
+    def size(self):
+        """ The total size of the kept answers, compressed. """
+        with self._lock:
+            return self._connect().execute(
+                'SELECT COALESCE(SUM(stored), 0) FROM entries').fetchone()[0]
+
+    def ttl_of(self, key):
+        """
+        Get the time to live of the answer of a request.
+        :param key: the key of the request, see cache_key
+        :return: the time to live in seconds, 0 when the answer has to be
+            revalidated every time
+        """
+        url = key.split('#', 1)[0].split('?', 1)[0]
+        for pattern, seconds in self.ttls:
+            if pattern.search(url):
+                return seconds
+        return self.ttl
+
+    def get(self, key):
+        """
+        Get the entry stored for a request.
+        :param key: the key of the request, see cache_key
+        :return: a CacheEntry or None
+        """
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute(
+                'SELECT etag, last_modified, expires, size, data '
+                'FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is not None and not row[0] and not row[1] and \
+                    (row[2] is None or row[2] <= now):
+                # expired, and nothing to revalidate it with
+                connection.execute('DELETE FROM entries WHERE key = ?',
+                                   (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            connection.execute('UPDATE entries SET accessed = ? '
+                               'WHERE key = ?', (now, key))
+            self.hits += 1
+
+        etag, last_modified, expires, size, data = row
+        try:
+            output = self.json_decoder(zlib.decompress(bytes(data)))
+        except Exception:
+            self.delete(key)
+            return None
+        return CacheEntry(etag, last_modified, output, size, expires)
+
+    def set(self, key, entry):
+        """
+        Store the entry of a request, evicting older entries if needed.
+
+        The entries which can neither be revalidated nor used for some
+        time are not stored. An entry stored again with the same
+        validators only gets its time to live renewed.
+
+        :param key: the key of the request, see cache_key
+        :param entry: a CacheEntry, its expires is set by the cache
+        :return:
+        """
+        ttl = self.ttl_of(key)
+        if not entry.etag and not entry.last_modified and not ttl:
+            return
+        now = time.time()
+        expires = now + ttl if ttl else None
+        with self._lock:
+            connection = self._connect()
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                renewed = connection.execute(
+                    'UPDATE entries SET expires = ?, accessed = ? '
+                    'WHERE key = ? AND etag IS ? AND last_modified IS ?',
+                    (expires, now, key, entry.etag, entry.last_modified))
+                if not renewed.rowcount:
+                    self._insert(connection, key, entry, expires, now)
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+
+    def _insert(self, connection, key, entry, expires, now):
+        data = _encode(entry.output)
+        if self.max_bytes is not None and len(data) > self.max_bytes:
+            connection.execute('DELETE FROM entries WHERE key = ?', (key,))
+            return
+        connection.execute(
+            'INSERT OR REPLACE INTO entries (key, etag, last_modified, '
+            'expires, size, stored, accessed, data) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (key, entry.etag, entry.last_modified, expires, entry.size,
+             len(data), now, sqlite3.Binary(data)))
+        self._evict(connection, now)
+
+    def _evict(self, connection, now):
+        # what can not be used anymore goes first
+        connection.execute(
+            'DELETE FROM entries WHERE etag IS NULL AND last_modified IS NULL '
+            'AND expires <= ?', (now,))
+        count, total = connection.execute(
+            'SELECT COUNT(*), COALESCE(SUM(stored), 0) FROM entries'
+        ).fetchone()
+        excess_entries = count - self.max_entries \
+            if self.max_entries is not None else 0
+        excess_bytes = total - self.max_bytes \
+            if self.max_bytes is not None else 0
+        if excess_entries <= 0 and excess_bytes <= 0:
+            return
+        evicted = []
+        for key, stored in connection.execute(
+                'SELECT key, stored FROM entries ORDER BY accessed'):
+            if excess_entries <= 0 and excess_bytes <= 0:
+                break
+            evicted.append((key,))
+            excess_entries -= 1
+            excess_bytes -= stored
+        connection.executemany('DELETE FROM entries WHERE key = ?', evicted)
+
+    def delete(self, key):
+        """
+        Forget about a request.
+        :param key: the key of the request, see cache_key
+        :return:
+        """
+        with self._lock:
+            self._connect().execute('DELETE FROM entries WHERE key = ?',
+                                    (key,))
+
+    def clear(self):
+        """
+        Empty the cache.
+        :return:
+        """
+        with self._lock:
+            self._connect().execute('DELETE FROM entries')
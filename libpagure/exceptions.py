@@ -3,3 +3,25 @@
 
 class APIError(Exception):
     pass
+
+
+class TransportError(Exception):
+    """ A request could not be sent, or its answer could not be received,
+    by the LiteTransport.
+    """
+
+
+class ConnectionFailed(TransportError):
+    pass
+
+
+class ConnectError(ConnectionFailed):
+    """ The connection could not be opened, nothing was sent. """
+
+
+class ConnectTimeout(ConnectError):
+    pass
+
+
+class ReadTimeout(TransportError):
+    pass
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Projection of the answers on a subset of their fields.
+
+The issue and pull request methods take a ``fields`` argument listing the
+keys to keep in each issue or pull request, nested keys being joined with
+dots. Keys of the elements of a list apply to each of them::
+
+    pg.list_issues(status='Open',
+                   fields=['id', 'title', 'user.name', 'comments.comment'])
+
+Everything else is dropped as soon as the answer is parsed, so that long
+running jobs do not keep alive the full issues with their comments and
+custom fields. Missing keys are left out of the result.
+"""
+
+
+class Projection(object):
+    """ Keep only some keys of decoded JSON values. """
+
+    __slots__ = ('fields', '_tree')
+
+    def __init__(self, fields):
+        """
+        Create a projection.
+        :param fields: the keys to keep, nested keys being joined with
+            dots, for instance ``user.name``
+        :return:
+        """
+        if isinstance(fields, str):
+            raise TypeError('fields must be a list of keys, not a string')
+        self.fields = tuple(fields)
+        self._tree = {}
+        for field in self.fields:
+            tree = self._tree
+            parts = field.split('.')
+            for part in parts[:-1]:
+                subtree = tree.setdefault(part, {})
+                if subtree is None:
+                    # the whole value is already kept
+                    break
+                tree = subtree
+            else:
+                tree[parts[-1]] = None
+
+    def __call__(self, value):
+        """
+        Project a value.
+        :param value: a decoded JSON value
+        :return: a new value holding only the projected keys
+        """
+        return _project(value, self._tree)
+
+    def __repr__(self):
+        return 'Projection({!r})'.format(list(self.fields))
+
+    def many(self, values):
+        """
+        Project each value of a list.
+        :param values: a list of decoded JSON values
+        :return: the list of the projected values
+        """
+        return [_project(value, self._tree) for value in values]
+
+
+def _project(value, tree):
+    if tree is None:
+        return value
+    if isinstance(value, dict):
+        return dict((key, _project(value[key], subtree))
+                    for key, subtree in tree.items() if key in value)
+    if isinstance(value, list):
+        return [_project(item, tree) for item in value]
+    # a scalar where an object was expected, e.g. a null assignee
+    return value
+
+
+def projection(fields):
+    """
+    Get the projection of a fields argument.
+    :param fields: a list of keys, a Projection or None
+    :return: a Projection, or None when every field is kept
+    """
+    if fields is None or isinstance(fields, Projection):
+        return fields
+    return Projection(fields)
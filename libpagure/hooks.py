@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+Instrumentation hooks of the API calls.
+
+Every call made by a client created with ``hooks`` goes through each of
+them, in order::
+
+    class SlowCalls(Hook):
+        def after_response(self, call, response):
+            if call.elapsed > 1:
+                LOG.warning('%s %s took %.1fs', call.method, call.url,
+                            call.elapsed)
+
+    pg = Pagure(hooks=[SlowCalls(), MetricsCollector()])
+
+A ``Hook`` can also be created from plain functions:
+``Hook(after_response=lambda call, response: ...)``.
+
+``before_request`` is called before the request is sent, with a ``Call``
+describing it. ``after_response`` is called once the response is received,
+whatever its status, after the retries, and ``on_error`` when the call
+raises, be it a network error, an error returned by pagure or an answer
+which could not be decoded. A call which got a response then failed goes
+through both.
+
+The exceptions raised by the hooks are logged and otherwise ignored, a
+broken hook does not break the calls.
+"""
+
+import logging
+import re
+from timeit import default_timer
+
+LOG = logging.getLogger(__name__)
+
+_REPLACEMENTS = [
+    (re.compile(r'^user/[^/]+'), 'user/{username}'),
+    (re.compile(r'^(user/\{username\}/activity/)(?!stats$)[^/]+$'),
+     r'\1{date}'),
+    (re.compile(r'(^|/)\d+(?=/|$)'), r'\1{id}'),
+]
+
+
+def endpoint_name(client, url):
+    """ Return the endpoint of a URL, without its variable parts.
+
+    The repository, the user names, the dates and the ids are replaced
+    with placeholders so that the endpoints can be used to aggregate the
+    calls, e.g. ``{repo}/issue/{id}/comment`` or ``user/{username}``.
+
+    :arg client: the client making the call
+    :arg url: the URL called
+    """
+    repo_url = client.create_basic_url()
+    api_url = '{}/api/0/'.format(client.instance)
+    if client.repo is not None and url.startswith(repo_url):
+        path = '{repo}/' + url[len(repo_url):]
+    elif url.startswith(api_url):
+        path = url[len(api_url):]
+    else:
+        return url
+    for pattern, replacement in _REPLACEMENTS:
+        path = pattern.sub(replacement, path)
+    return path
+
+
+class Call(object):
+    """ An API call, as seen by the hooks. """
+
+    __slots__ = ('method', 'url', 'params', 'endpoint', 'start', 'elapsed',
+                 'status', 'size', 'attempts', 'error')
+
+    def __init__(self, method, url, params=None, endpoint=None):
+        """
+        Describe a call about to be made.
+        :param method: the HTTP method
+        :param url: the URL called
+        :param params: the query parameters
+        :param endpoint: the endpoint of the URL, see endpoint_name
+        :return:
+        """
+        self.method = method
+        self.url = url
+        self.params = params
+        self.endpoint = endpoint or url
+        self.start = default_timer()
+        #: seconds until the response was received, or the call failed
+        self.elapsed = None
+        #: the HTTP status of the response, None if there was none
+        self.status = None
+        #: the size of the body, None when unknown (streamed answers)
+        self.size = None
+        #: the number of attempts made, see RetryPolicy
+        self.attempts = None
+        #: the exception raised by the call, if any
+        self.error = None
+
+    def __repr__(self):
+        return 'Call({!r}, {!r}, status={!r})'.format(
+            self.method, self.endpoint, self.status)
+
+
+class Hook(object):
+    """ The base class of the hooks, whose methods do nothing.
+
+    Override the methods, or pass functions to the constructor.
+    """
+
+    def __init__(self, before_request=None, after_response=None,
+                 on_error=None):
+        """
+        Create a hook from functions.
+        :param before_request: called with the Call before it is sent
+        :param after_response: called with the Call and the response
+        :param on_error: called with the Call and the exception raised
+        :return:
+        """
+        if before_request is not None:
+            self.before_request = before_request
+        if after_response is not None:
+            self.after_response = after_response
+        if on_error is not None:
+            self.on_error = on_error
+
+    def before_request(self, call):
+        pass
+
+    def after_response(self, call, response):
+        pass
+
+    def on_error(self, call, error):
+        pass
+
+
+class Hooks(object):
+    """ Run a list of hooks, isolating the calls from their failures. """
+
+    def __init__(self, hooks=None):
+        self.hooks = list(hooks or [])
+
+    def __bool__(self):
+        return bool(self.hooks)
+
+    __nonzero__ = __bool__
+
+    def _run(self, name, *args):
+        for hook in self.hooks:
+            try:
+                getattr(hook, name)(*args)
+            except Exception:
+                LOG.exception('The %s hook %r failed', name, hook)
+
+    def start(self, client, method, url, params=None):
+        """
+        Create the Call of a request and run before_request.
+        :return: the Call, None when there are no hooks
+        """
+        if not self.hooks:
+            return None
+        call = Call(method, url, params, endpoint_name(client, url))
+        self._run('before_request', call)
+        return call
+
+    def response(self, call, status, size, attempts, response):
+        """ Record the response of a call and run after_response. """
+        if call is None:
+            return
+        call.elapsed = default_timer() - call.start
+        call.status = status
+        call.size = size
+        call.attempts = attempts
+        self._run('after_response', call, response)
+
+    def error(self, call, error):
+        """ Record the failure of a call and run on_error. """
+        if call is None:
+            return
+        if call.elapsed is None:
+            call.elapsed = default_timer() - call.start
+        call.error = error
+        self._run('on_error', call, error)
@@ -1,9 +1,26 @@
 # -*- coding: utf-8 -*-
 
-import requests
+import copy
+import functools
 import logging
-
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from timeit import default_timer
+
+from .bulk import collect, imap_unordered
+from .cache import CacheEntry, cache_key
+from .decoders import default_decoder
 from .exceptions import APIError
+from .fields import projection
+from .hooks import Hooks
+from .models import Comment, Issue, Project, PullRequest
+from .streaming import ArrayStream
+from .tracing import NO_SPAN, submit, traced
+
+#: the size of the chunks read from the streamed answers
+STREAM_CHUNK_SIZE = 64 * 1024
 
 
 class NullHandler(logging.Handler):
@@ -19,6 +36,71 @@ hand = NullHandler()
 LOG.addHandler(hand)
 
 
+def page_count(output, key):
+    """ Return the number of pages of a paginated API answer.
+
+    Pagure sends a ``pagination`` object along with paginated lists, older
+    instances only send the ``total_<key>`` count and the page size in
+    ``args``. None is returned when neither can be found.
+
+    :arg output: the JSON returned by the API
+    :arg key: the key of the returned JSON holding the items
+    """
+    pagination = output.get('pagination')
+    if pagination and pagination.get('pages') is not None:
+        return int(pagination['pages'])
+    total = output.get('total_{}'.format(key))
+    per_page = (output.get('args') or {}).get('per_page')
+    if total is not None and per_page:
+        return max(1, -(-int(total) // int(per_page)))
+    return None
+
+
+def _last_page(output, key, page, count):
+    """ Tell whether a page of a paginated API answer is the last one.
+
+    Without a count of the pages, the next one is only asked for when the
+    server echoed the page number asked for and this page is full: a
+    server ignoring the page would otherwise send the same items forever.
+
+    :arg output: the JSON returned by the API
+    :arg key: the key of the returned JSON holding the items
+    :arg page: the number of the page asked for
+    :arg count: the number of items of the page
+    """
+    if not count:
+        return True
+    pages = page_count(output, key)
+    if pages is not None:
+        return page >= pages
+    pagination = output.get('pagination') or {}
+    args = output.get('args') or {}
+    echoed = pagination.get('page', args.get('page'))
+    per_page = pagination.get('per_page', args.get('per_page'))
+    try:
+        if echoed is None or int(echoed) != page:
+            return True
+        return per_page is not None and count < int(per_page)
+    except (TypeError, ValueError):
+        return True
+
+
+PageTiming = namedtuple('PageTiming', ['page', 'elapsed', 'count'])
+
+
+class PagedList(list):
+    """ The items of every page of a paginated endpoint, in order.
+
+    ``page_timings`` holds a PageTiming (page number, seconds spent
+    fetching it, number of items) for each page that was fetched.
+    """
+
+    def __init__(self, items=(), page_timings=None):
+        super(PagedList, self).__init__(items)
+        self.page_timings = page_timings or []
+
+
+@traced(exclude=('create_basic_url', 'for_repo'))
 class Pagure(object):
 
     # TODO: add error handling
@@ -30,7 +112,17 @@ class Pagure(object):
             fork_username=None,
             namespace=None,
             instance_url="https://pagure.io",
-            insecure=False):
+            insecure=False,
+            cache=None,
+            metadata_cache=None,
+            transport=None,
+            retry=None,
+            rate_limiter=None,
+            json_decoder=None,
+            models=False,
+            hooks=None,
+            tracer=None,
+            single_flight=None):
         """
         Create an instance.
         :param pagure_token: pagure API token
@@ -38,6 +130,33 @@ class Pagure(object):
         :param fork_username: if this is a fork, it's the username
              of the fork creator
         :param instance_url: the URL of pagure instance name
+        :param cache: a ResponseCache used to revalidate GET requests
+            with their ETag/Last-Modified instead of downloading them again,
+            or a DiskCache keeping them across processes
+        :param metadata_cache: a TTLCache memoizing the instance wide
+            endpoints: api_version, error_codes, list_groups and list_users
+        :param transport: a Transport whose connection pool is shared with
+            other clients, by default a session is created for this instance.
+            A Pagure object can be shared between threads when it uses a
+            Transport created with per_thread_sessions=True. A LiteTransport
+            sends the requests without importing requests
+        :param retry: a RetryPolicy used to retry the transient failures,
+            by default every call makes a single attempt
+        :param rate_limiter: a RateLimiter every request has to go
+            through before being sent
+        :param json_decoder: the function decoding the body of the answers
+            from bytes, see libpagure.decoders. Defaults to orjson when it
+            is installed, to the json module otherwise
+        :param models: whether the issues, pull requests, projects and
+            comments are returned as the compact objects of
+            libpagure.models rather than as dicts
+        :param hooks: a list of Hook called around every API call, see
+            libpagure.hooks and libpagure.metrics
+        :param tracer: a Tracer recording a span for every public method
+            and each page and HTTP attempt, see libpagure.tracing
+        :param single_flight: a SingleFlight through which the identical
+            GET requests made at the same time by several threads share
+            one request and its answer, see libpagure.coalesce
         :return:
         """
         self.token = pagure_token
@@ -45,8 +164,26 @@ class Pagure(object):
         self.username = fork_username
         self.namespace = namespace
         self.instance = instance_url
-        self.session = requests.session()
+        self.transport = transport
+        if transport is not None:
+            self.session = transport.session
+            self._network_errors = transport.errors
+        else:
+            # imported on first use, see LiteTransport to do without
+            import requests
+            self.session = requests.session()
+            self._network_errors = requests.RequestException
         self.insecure = insecure
+        self.cache = cache
+        self.metadata_cache = metadata_cache
+        self.retry = retry
+        self.rate_limiter = rate_limiter
+        self.json_decoder = json_decoder or default_decoder
+        self.models = models
+        self.hooks = Hooks(hooks)
+        self.tracer = tracer
+        self.single_flight = single_flight
+        self._local = threading.local()
         if self.token:
             self.header = {"Authorization": "token " + self.token}
         else:
@@ -65,19 +202,65 @@ class Pagure(object):
         :kwarg data: the data to send to a POST request
 
         """
+        if self.single_flight is not None and method == 'GET':
+            return self.single_flight.do(
+                cache_key(url, params, self.header),
+                lambda: self._request_api(url, method, params, data))
+        return self._request_api(url, method, params, data)
+
+    def _request_api(self, url, method='GET', params=None, data=None):
+        """ Send a request to the API and decode its answer.
+        See _call_api, which coalesces the identical requests.
+        """
+        headers = self.header
+        key = entry = None
+        if self.cache is not None and method == 'GET':
+            key = cache_key(url, params, self.header)
+            entry = self.cache.get(key)
+            if entry is not None and entry.expires is not None and \
+                    entry.expires > time.time():
+                LOG.debug('Using the fresh cached answer of %s', url)
+                return entry.output
+            if entry is not None:
+                headers = dict(self.header or {})
+                if entry.etag:
+                    headers['If-None-Match'] = entry.etag
+                if entry.last_modified:
+                    headers['If-Modified-Since'] = entry.last_modified
+
+        call = self.hooks.start(self, method, url, params)
+        try:
+            req = self._send(method, url, params, headers, data)
+        except Exception as err:
+            self.hooks.error(call, err)
+            raise
+        self.hooks.response(call, req.status_code, len(req.content),
+                            self.last_attempts, req)
 
-        req = self.session.request(
-            method=method,
-            url=url,
-            params=params,
-            headers=self.header,
-            data=data,
-            verify=not self.insecure,
-        )
+        if entry is not None and req.status_code == 304:
+            LOG.debug('Not modified, using the cached answer of %s', url)
+            # stored again, for the cache to renew its time to live
+            self.cache.set(key, entry)
+            return entry.output
+
+        try:
+            with self._span('decode', size=len(req.content)):
+                output = self._decode(req)
+        except Exception as err:
+            self.hooks.error(call, err)
+            raise
+        if req.status_code == 200 and key is not None:
+            # the cache decides what is worth keeping
+            self.cache.set(key, CacheEntry(
+                req.headers.get('ETag'), req.headers.get('Last-Modified'),
+                output, len(req.content)))
+        return output
 
+    def _decode(self, req):
+        """ Decode the body of a response, raising the API errors. """
         output = None
         try:
-            output = req.json()
+            output = self.json_decoder(req.content)
         except Exception as err:
             LOG.debug(req.text)
             # TODO: use a dedicated error class
@@ -89,6 +272,168 @@ class Pagure(object):
                 raise APIError(output['error'])
         return output
 
+    def _stream_api(self, url, key, params=None, fields=None, model=None):
+        """ Call the API and stream the elements of a top level array.
+
+        The body is read and parsed incrementally, so only the element
+        being parsed is held in memory, see libpagure.streaming.
+        The request is sent when the iteration starts.
+
+        :arg url: the URL to call
+        :arg key: the key of the array in the returned JSON
+        :kwarg params: the params to specify to the GET request
+        :kwarg fields: the fields to keep in each element, see
+            libpagure.fields. They are projected as soon as parsed
+        :kwarg model: the class of libpagure.models of the elements
+        :return: a generator of the elements of the array
+        """
+        hook = self._element_hook(fields, model)
+        call = self.hooks.start(self, 'GET', url, params)
+        try:
+            req = self._send('GET', url, params, self.header, None,
+                             stream=True)
+        except Exception as err:
+            self.hooks.error(call, err)
+            raise
+        # the body is not read yet, its size is only known from the headers
+        size = req.headers.get('Content-Length')
+        self.hooks.response(call, req.status_code,
+                            int(size) if size else None, self.last_attempts,
+                            req)
+        try:
+            if req.status_code != 200:
+                # _decode raises the errors of the API, any other answer
+                # is not the array expected either
+                try:
+                    self._decode(req)
+                    raise APIError('Unexpected HTTP status {}'.format(
+                        req.status_code))
+                except Exception as err:
+                    self.hooks.error(call, err)
+                    raise
+
+            stream = ArrayStream(key, object_hook=hook)
+            for chunk in req.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                for item in stream.feed(chunk):
+                    yield item
+                if stream.done:
+                    break
+            for item in stream.close():
+                yield item
+        finally:
+            req.close()
+
+    @property
+    def last_attempts(self):
+        """ The number of requests sent by the last call of this thread.
+
+        More than one means the call was retried, see RetryPolicy.
+        """
+        return getattr(self._local, 'attempts', 0)
+
+    def _get_session(self):
+        """ Return the session to use from the current thread. """
+        if self.transport is not None:
+            return self.transport.get_session()
+        return self.session
+
+    def _send(self, method, url, params, headers, data, stream=False):
+        """ Send a request, retrying it according to the retry policy.
+
+        Every attempt waits for the rate limiter first, if there is one.
+        With stream, the body of the response is left to be read.
+
+        :return: the last response received
+        """
+        attempt = 0
+        waited = 0.0
+        while True:
+            attempt += 1
+            self._local.attempts = attempt
+            if self.rate_limiter is not None:
+                with self._span('rate_limit', method=method):
+                    self.rate_limiter.acquire(method)
+            with self._span('http', method=method, url=url,
+                            attempt=attempt) as span:
+                try:
+                    req = self._get_session().request(
+                        method=method,
+                        url=url,
+                        params=params,
+                        headers=headers,
+                        data=data,
+                        verify=not self.insecure,
+                        stream=stream,
+                    )
+                except self._network_errors as err:
+                    if self.retry is None:
+                        raise
+                    delay = self.retry.next_delay(method, attempt, waited,
+                                                  error=err)
+                    if delay is None:
+                        raise
+                    span.set(error=repr(err))
+                    LOG.debug('%s %s failed (%s), retrying in %.2fs',
+                              method, url, err, delay)
+                else:
+                    span.set(status=req.status_code)
+                    if self.retry is None:
+                        return req
+                    delay = self.retry.next_delay(method, attempt, waited,
+                                                  response=req)
+                    if delay is None:
+                        return req
+                    LOG.debug('%s %s returned %s, retrying in %.2fs',
+                              method, url, req.status_code, delay)
+                    req.close()
+            with self._span('retry', delay=delay):
+                time.sleep(delay)
+            waited += delay
+
+    def _span(self, name, **attributes):
+        """ Open a child span of the active one, see libpagure.tracing.
+        Does nothing when the client has no tracer.
+        """
+        if self.tracer is None:
+            return NO_SPAN
+        return self.tracer.span(name, **attributes)
+
+    def for_repo(self, pagure_repository, fork_username=None, namespace=None):
+        """
+        Get a client for another repository of the same instance.
+
+        The returned client shares the token, the HTTP session and the
+        caches of this one, so it is cheap to create one per repository.
+        :param pagure_repository: pagure project name
+        :param fork_username: if this is a fork, it's the username
+             of the fork creator
+        :param namespace: the namespace of the project
+        :return: a Pagure instance
+        """
+        view = copy.copy(self)
+        view.repo = pagure_repository
+        view.username = fork_username
+        view.namespace = namespace
+        return view
+
+    def _memoized_call(self, endpoint, url, **kwargs):
+        """ Call the API through the metadata cache, if there is one.
+
+        :arg endpoint: the name of the endpoint, used to pick the time to
+            live of the answer
+        :arg url: the URL to call
+        :kwarg kwargs: the arguments to pass to _call_api
+        """
+        if self.metadata_cache is None:
+            return self._call_api(url, **kwargs)
+
+        key = cache_key(url, kwargs.get('params'), self.header)
+        found, return_value = self.metadata_cache.get(endpoint, key)
+        if not found:
+            return_value = self._call_api(url, **kwargs)
+            self.metadata_cache.set(endpoint, key, return_value)
+        return return_value
+
     def create_basic_url(self):
         """ Create URL prefix for API calls based on type of repo.
 
@@ -113,13 +458,152 @@ class Pagure(object):
                     self.instance, self.username, self.namespace, self.repo)
         return request_url
 
+    def _iter_pages(self, url, params, key, fields=None, model=None):
+        """ Follow the pages of a paginated endpoint.
+
+        Yields the items found under ``key`` one at a time and only asks
+        for the next page once the current one has been consumed.
+
+        :arg url: the URL to call
+        :arg params: the params to send along with the page number
+        :arg key: the key of the returned JSON holding the items
+        :kwarg fields: the fields to keep in each item, see
+            libpagure.fields
+        :kwarg model: the class of libpagure.models of the items
+        """
+        hook = self._element_hook(fields, model)
+        page = 1
+        while True:
+            page_params = dict(params)
+            page_params['page'] = page
+            with self._span('page', page=page) as span:
+                return_value = self._call_api(url, params=page_params)
+                items = return_value[key]
+                if hook is not None:
+                    items = [hook(item) for item in items]
+                span.set(items=len(items))
+            last = _last_page(return_value, key, page, len(items))
+            # drop the reference so only one page is alive at a time
+            del return_value
+
+            for item in items:
+                yield item
+
+            if last:
+                return
+            page += 1
+
+    def _fetch_page(self, url, params, key, page):
+        """ Fetch a single page and time it.
+
+        :return: the JSON returned by the API and its PageTiming
+        """
+        page_params = dict(params)
+        page_params['page'] = page
+        with self._span('page', page=page) as span:
+            start = default_timer()
+            return_value = self._call_api(url, params=page_params)
+            timing = PageTiming(page, default_timer() - start,
+                                len(return_value[key]))
+            span.set(items=timing.count)
+        return return_value, timing
+
+    def _list_all_pages(self, url, params, key, max_workers, model=None):
+        """ Fetch every page of a paginated endpoint.
+
+        The first page tells how many pages there are, the remaining ones
+        are then fetched concurrently by at most ``max_workers`` threads.
+        When the number of pages is unknown they are fetched one after
+        the other until the last one, see _last_page.
+
+        :arg url: the URL to call
+        :arg params: the params to send along with the page number
+        :arg key: the key of the returned JSON holding the items
+        :arg max_workers: the number of pages to fetch concurrently
+        :kwarg model: the class of libpagure.models of the items
+        :return: a PagedList of all the items
+        """
+        hook = self._element_hook(None, model)
+        if hook is not None:
+            result = self._list_all_pages(url, params, key, max_workers)
+            return PagedList([hook(item) for item in result],
+                             result.page_timings)
+
+        return_value, timing = self._fetch_page(url, params, key, 1)
+        result = PagedList(return_value[key], [timing])
+        pages = page_count(return_value, key)
+
+        if pages is None:
+            page = 1
+            while not _last_page(return_value, key, page, timing.count):
+                page += 1
+                return_value, timing = self._fetch_page(url, params, key, page)
+                result.extend(return_value[key])
+                result.page_timings.append(timing)
+            return result
+        del return_value
+
+        if pages > 1:
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+            futures = []
+            try:
+                futures = [submit(executor, self._fetch_page, url, params,
+                                  key, page)
+                           for page in range(2, pages + 1)]
+                for future in futures:
+                    return_value, timing = future.result()
+                    result.extend(return_value[key])
+                    result.page_timings.append(timing)
+            finally:
+                # do not fetch the remaining pages once one failed
+                for future in futures:
+                    future.cancel()
+                executor.shutdown(wait=True)
+        return result
+
+    def _element_hook(self, fields, model):
+        """ Get the function applied to each element returned, if any.
+
+        The element is projected on ``fields``, see libpagure.fields, then
+        turned into a ``model`` when the client returns models.
+        """
+        project = projection(fields)
+        if not self.models or model is None:
+            return project
+        if project is None:
+            return model.from_dict
+        return lambda item: model.from_dict(project(item))
+
+    def _project(self, items, fields=None, model=None):
+        """ Apply the element hook to each element of a list.
+        The decoded answer may be cached, it is left untouched.
+        """
+        hook = self._element_hook(fields, model)
+        if hook is None:
+            return items
+        return [hook(item) for item in items]
+
+    def _project_one(self, item, fields=None, model=None):
+        """ Apply the element hook to a single element, see _project. """
+        hook = self._element_hook(fields, model)
+        if hook is None:
+            return item
+        return hook(item)
+
+    @staticmethod
+    def _with_fields(method, fields):
+        """ Bind the fields argument of an info method. """
+        if fields is None:
+            return method
+        return functools.partial(method, fields=projection(fields))
+
     def api_version(self):
         """
         Get Pagure API version.
         :return:
         """
         request_url = "{}/api/0/version".format(self.instance)
-        return_value = self._call_api(request_url)
+        return_value = self._memoized_call('version', request_url)
         return return_value['version']
 
     def list_users(self, pattern=None):
@@ -132,9 +616,23 @@ class Pagure(object):
         params = None
         if pattern:
             params = {'pattern': pattern}
-        return_value = self._call_api(request_url, params=params)
+        return_value = self._memoized_call('users', request_url,
+                                           params=params)
         return return_value['users']
 
+    def stream_users(self, pattern=None):
+        """
+        Stream the users registered on this Pagure instance.
+        The answer is parsed incrementally, see _stream_api.
+        :param pattern: filters the starting letters of the return value
+        :return: a generator of users
+        """
+        request_url = "{}/api/0/users".format(self.instance)
+        params = None
+        if pattern:
+            params = {'pattern': pattern}
+        return self._stream_api(request_url, 'users', params=params)
+
     def list_tags(self, pattern=None):
         """
         List all tags made on this project.
@@ -161,7 +659,8 @@ class Pagure(object):
         if pattern:
             params = {'pattern': pattern}
 
-        return_value = self._call_api(request_url, params=params)
+        return_value = self._memoized_call('groups', request_url,
+                                           params=params)
         return return_value['groups']
 
     def error_codes(self):
@@ -170,15 +669,18 @@ class Pagure(object):
         :return:
         """
         request_url = "{}/api/0/error_codes".format(self.instance)
-        return_value = self._call_api(request_url)
+        return_value = self._memoized_call('error_codes', request_url)
         return return_value
 
-    def list_requests(self, status=None, assignee=None, author=None):
+    def list_requests(self, status=None, assignee=None, author=None,
+                      fields=None):
         """
         Get all pull requests of a project.
         :param status: filters the status of the requests
         :param assignee: filters the assignee of the requests
         :param author: filters the author of the requests
+        :param fields: the fields to keep in each request, see
+            libpagure.fields. Defaults to all of them
         :return:
         """
         request_url = "{}pull-requests".format(self.create_basic_url())
@@ -192,19 +694,100 @@ class Pagure(object):
             payload['author'] = author
 
         return_value = self._call_api(request_url, params=payload)
-        return return_value['requests']
+        return self._project(return_value['requests'], fields, PullRequest)
+
+    def iter_requests(self, status=None, assignee=None, author=None,
+                      per_page=None, fields=None):
+        """
+        Iterate over all pull requests of a project.
+
+        Pages are fetched lazily, see iter_projects.
+        Takes the same filters as list_requests.
+        :param per_page: the number of requests to fetch per request.
+            The maximum is 100
+        :param fields: the fields to keep in each request, see
+            libpagure.fields. Defaults to all of them
+        :return: a generator of pull requests
+        """
+        request_url = "{}pull-requests".format(self.create_basic_url())
+
+        payload = {}
+        if status is not None:
+            payload['status'] = status
+        if assignee is not None:
+            payload['assignee'] = assignee
+        if author is not None:
+            payload['author'] = author
+        if per_page is not None:
+            payload['per_page'] = str(per_page)
+
+        return self._iter_pages(request_url, payload, 'requests',
+                                fields=fields, model=PullRequest)
+
+    def stream_requests(self, status=None, assignee=None, author=None,
+                        fields=None):
+        """
+        Stream the pull requests of a project.
+        The answer is parsed incrementally, see _stream_api.
+        Takes the same filters as list_requests.
+        :param fields: the fields to keep in each request, see
+            libpagure.fields. Defaults to all of them
+        :return: a generator of pull requests
+        """
+        request_url = "{}pull-requests".format(self.create_basic_url())
+
+        payload = {}
+        if status is not None:
+            payload['status'] = status
+        if assignee is not None:
+            payload['assignee'] = assignee
+        if author is not None:
+            payload['author'] = author
 
-    def request_info(self, request_id):
+        return self._stream_api(request_url, 'requests', params=payload,
+                                fields=fields, model=PullRequest)
+
+    def request_info(self, request_id, fields=None):
         """
         Get information of a single pull request.
         :param request_id: the id of the request
+        :param fields: the fields to keep in the request, see
+            libpagure.fields. Defaults to all of them
         :return:
         """
         request_url = "{}pull-request/{}".format(self.create_basic_url(),
                                                  request_id)
 
         return_value = self._call_api(request_url)
-        return return_value
+        return self._project_one(return_value, fields, PullRequest)
+
+    def iter_requests_info(self, request_ids, max_workers=8, fields=None):
+        """
+        Get information of many pull requests, concurrently.
+        :param request_ids: the ids of the requests
+        :param max_workers: the number of requests fetched at the same time
+        :param fields: the fields to keep in each request, see
+            libpagure.fields. Defaults to all of them
+        :return: a generator of (request_id, info, error) tuples in the
+            order the calls complete, error being the exception raised
+            for that id or None
+        """
+        return imap_unordered(self._with_fields(self.request_info, fields),
+                              request_ids, max_workers)
+
+    def requests_info_many(self, request_ids, max_workers=8, fields=None):
+        """
+        Get information of many pull requests, concurrently.
+        A failure does not stop the other calls.
+        :param request_ids: the ids of the requests
+        :param max_workers: the number of requests fetched at the same time
+        :param fields: the fields to keep in each request, see
+            libpagure.fields. Defaults to all of them
+        :return: a BulkResult mapping the request ids to their info, the
+            exceptions raised for the failed ids are in its errors attribute
+        """
+        return collect(self.iter_requests_info(request_ids, max_workers,
+                                               fields))
 
     def merge_request(self, request_id):
         """
@@ -325,7 +908,7 @@ class Pagure(object):
     def list_issues(
             self, status=None, tags=None, assignee=None, author=None,
             milestones=None, priority=None, no_stones=None, since=None,
-            order=None
+            order=None, fields=None
     ):
         """
         List all issues of a project.
@@ -343,10 +926,73 @@ class Pagure(object):
             Y-M-D
         :param order: Set the ordering of the issues. This can be asc or desc.
             Default: desc
+        :param fields: the fields to keep in each issue, see
+            libpagure.fields. Defaults to all of them
         :return:
         """
         request_url = "{}issues".format(self.create_basic_url())
 
+        payload = self._issues_payload(status, tags, assignee, author,
+                                       milestones, priority, no_stones, since,
+                                       order)
+
+        return_value = self._call_api(request_url, params=payload)
+
+        return self._project(return_value['issues'], fields, Issue)
+
+    def iter_issues(
+            self, status=None, tags=None, assignee=None, author=None,
+            milestones=None, priority=None, no_stones=None, since=None,
+            order=None, per_page=None, fields=None
+    ):
+        """
+        Iterate over all issues of a project.
+
+        Pages are fetched lazily, see iter_projects.
+        Takes the same filters as list_issues.
+        :param per_page: the number of issues to fetch per request.
+            The maximum is 100
+        :param fields: the fields to keep in each issue, see
+            libpagure.fields. Defaults to all of them
+        :return: a generator of issues
+        """
+        request_url = "{}issues".format(self.create_basic_url())
+
+        payload = self._issues_payload(status, tags, assignee, author,
+                                       milestones, priority, no_stones, since,
+                                       order)
+        if per_page is not None:
+            payload['per_page'] = str(per_page)
+
+        return self._iter_pages(request_url, payload, 'issues',
+                                fields=fields, model=Issue)
+
+    def stream_issues(
+            self, status=None, tags=None, assignee=None, author=None,
+            milestones=None, priority=None, no_stones=None, since=None,
+            order=None, fields=None
+    ):
+        """
+        Stream the issues of a project.
+        The answer is parsed incrementally, see _stream_api.
+        Takes the same filters as list_issues.
+        :param fields: the fields to keep in each issue, see
+            libpagure.fields. Defaults to all of them
+        :return: a generator of issues
+        """
+        request_url = "{}issues".format(self.create_basic_url())
+
+        payload = self._issues_payload(status, tags, assignee, author,
+                                       milestones, priority, no_stones, since,
+                                       order)
+
+        return self._stream_api(request_url, 'issues', params=payload,
+                                fields=fields, model=Issue)
+
+    @staticmethod
+    def _issues_payload(status, tags, assignee, author, milestones, priority,
+                        no_stones, since, order):
+        """ Build the filters shared by list_issues and iter_issues. """
         payload = {}
         if status is not None:
             payload['status'] = status
@@ -366,22 +1012,48 @@ class Pagure(object):
             payload['since'] = since
         if order is not None:
             payload['order'] = order
+        return payload
 
-        return_value = self._call_api(request_url, params=payload)
-
-        return return_value['issues']
-
-    def issue_info(self, issue_id):
+    def issue_info(self, issue_id, fields=None):
         """
         Get info about a single issue.
         :param issue_id: the id of the issue
+        :param fields: the fields to keep in the issue, see
+            libpagure.fields. Defaults to all of them
         :return:
         """
         request_url = "{}issue/{}".format(self.create_basic_url(), issue_id)
 
         return_value = self._call_api(request_url)
 
-        return return_value
+        return self._project_one(return_value, fields, Issue)
+
+    def iter_issues_info(self, issue_ids, max_workers=8, fields=None):
+        """
+        Get info about many issues, concurrently.
+        :param issue_ids: the ids of the issues
+        :param max_workers: the number of issues fetched at the same time
+        :param fields: the fields to keep in each issue, see
+            libpagure.fields. Defaults to all of them
+        :return: a generator of (issue_id, info, error) tuples in the
+            order the calls complete, error being the exception raised
+            for that id or None
+        """
+        return imap_unordered(self._with_fields(self.issue_info, fields),
+                              issue_ids, max_workers)
+
+    def issues_info_many(self, issue_ids, max_workers=8, fields=None):
+        """
+        Get info about many issues, concurrently.
+        A failure does not stop the other calls.
+        :param issue_ids: the ids of the issues
+        :param max_workers: the number of issues fetched at the same time
+        :param fields: the fields to keep in each issue, see
+            libpagure.fields. Defaults to all of them
+        :return: a BulkResult mapping the issue ids to their info, the
+            exceptions raised for the failed ids are in its errors attribute
+        """
+        return collect(self.iter_issues_info(issue_ids, max_workers, fields))
 
     def get_list_comment(self, issue_id, comment_id):
         """
@@ -395,7 +1067,7 @@ class Pagure(object):
 
         return_value = self._call_api(request_url)
 
-        return return_value
+        return self._project_one(return_value, model=Comment)
 
     def change_issue_status(self, issue_id, new_status, close_status=None):
         """
@@ -484,6 +1156,90 @@ class Pagure(object):
         """
         request_url = "{}/api/0/projects".format(self.instance)
 
+        payload = self._projects_payload(tags, pattern, username, owner,
+                                         namespace, fork, short)
+        if page is not None:
+            payload['page'] = str(page)
+        if per_page is not None:
+            payload['per_page'] = str(per_page)
+
+        return_value = self._call_api(request_url, params=payload)
+
+        return self._project(return_value['projects'], model=Project)
+
+    def iter_projects(self, tags=None, pattern=None, username=None,
+                      owner=None, namespace=None, fork=None, short=None,
+                      per_page=None):
+        """
+        Iterate over all projects on this Pagure instance.
+
+        Pages are fetched lazily, one at a time, so only a single page is
+        held in memory and stopping the iteration early does not fetch the
+        remaining pages.
+        Takes the same filters as list_projects.
+        :param per_page: the number of projects to fetch per request.
+            The maximum is 100
+        :return: a generator of projects
+        """
+        request_url = "{}/api/0/projects".format(self.instance)
+
+        payload = self._projects_payload(tags, pattern, username, owner,
+                                         namespace, fork, short)
+        if per_page is not None:
+            payload['per_page'] = str(per_page)
+
+        return self._iter_pages(request_url, payload, 'projects',
+                                model=Project)
+
+    def stream_projects(self, tags=None, pattern=None, username=None,
+                        owner=None, namespace=None, fork=None, short=None,
+                        page=None, per_page=None):
+        """
+        Stream the projects on this Pagure instance.
+        The answer is parsed incrementally, so listing all the projects of
+        a big instance does not need to hold all of them in memory, see
+        _stream_api. Takes the same filters as list_projects.
+        :return: a generator of projects
+        """
+        request_url = "{}/api/0/projects".format(self.instance)
+
+        payload = self._projects_payload(tags, pattern, username, owner,
+                                         namespace, fork, short)
+        if page is not None:
+            payload['page'] = str(page)
+        if per_page is not None:
+            payload['per_page'] = str(per_page)
+
+        return self._stream_api(request_url, 'projects', params=payload,
+                                model=Project)
+
+    def list_all_projects(self, tags=None, pattern=None, username=None,
+                          owner=None, namespace=None, fork=None, short=None,
+                          per_page=100, max_workers=4):
+        """
+        List all projects on this Pagure instance, fetching the pages
+        concurrently.
+        Takes the same filters as list_projects.
+        :param per_page: the number of projects to fetch per request.
+            The maximum is 100
+        :param max_workers: the number of pages to fetch at the same time
+        :return: a PagedList of projects, with the timing of each page
+            in its page_timings attribute
+        """
+        request_url = "{}/api/0/projects".format(self.instance)
+
+        payload = self._projects_payload(tags, pattern, username, owner,
+                                         namespace, fork, short)
+        if per_page is not None:
+            payload['per_page'] = str(per_page)
+
+        return self._list_all_pages(request_url, payload, 'projects',
+                                    max_workers, model=Project)
+
+    @staticmethod
+    def _projects_payload(tags, pattern, username, owner, namespace, fork,
+                          short):
+        """ Build the filters shared by list_projects and iter_projects. """
         payload = {}
         if tags is not None:
             payload['tags'] = tags
@@ -499,14 +1255,7 @@ class Pagure(object):
             payload['fork'] = fork
         if short is not None:
             payload['short'] = short
-        if page is not None:
-            payload['page'] = str(page)
-        if per_page is not None:
-            payload['per_page'] = str(per_page)
-
-        return_value = self._call_api(request_url, params=payload)
-
-        return return_value['projects']
+        return payload
 
     def user_info(self, username):
         """
@@ -597,7 +1346,61 @@ class Pagure(object):
 
         return_value = self._call_api(request_url, params=payload)
 
-        return return_value['requests']
+        return self._project(return_value['requests'], model=PullRequest)
+
+    def iter_pull_requests(self, username, status=None):
+        """
+        Iterate over the pull-requests filed by user.
+
+        Pages are fetched lazily, see iter_projects.
+
+        Params:
+            username (string): filters the username of the user whose
+                               activity you are interested in.
+            status (string): filter the status of pull requests. Default: Open,
+                             can be Closed, Merged, All.
+
+        Returns:
+            generator: the Pull-Requests filed by a given user for all the
+                       projects for given Pagure instance.
+        """
+        request_url = "{}/api/0/user/{}/requests/filed".format(
+            self.instance, username)
+
+        payload = {'username': username}
+        if status is not None:
+            payload['status'] = status
+
+        return self._iter_pages(request_url, payload, 'requests',
+                                model=PullRequest)
+
+    def list_all_pull_requests(self, username, status=None, max_workers=4):
+        """
+        List all the pull-requests filed by user, fetching the pages
+        concurrently.
+
+        Params:
+            username (string): filters the username of the user whose
+                               activity you are interested in.
+            status (string): filter the status of pull requests. Default: Open,
+                             can be Closed, Merged, All.
+            max_workers (integer): the number of pages to fetch at the same
+                                   time.
+
+        Returns:
+            PagedList: the Pull-Requests filed by a given user for all the
+                       projects for given Pagure instance, with the timing
+                       of each page.
+        """
+        request_url = "{}/api/0/user/{}/requests/filed".format(
+            self.instance, username)
+
+        payload = {'username': username}
+        if status is not None:
+            payload['status'] = status
+
+        return self._list_all_pages(request_url, payload, 'requests',
+                                    max_workers, model=PullRequest)
 
     def list_prs_actionable_by_user(self, username, page, status=None):
         """
@@ -625,7 +1428,62 @@ class Pagure(object):
 
         return_value = self._call_api(request_url, params=payload)
 
-        return return_value['requests']
+        return self._project(return_value['requests'], model=PullRequest)
+
+    def iter_prs_actionable_by_user(self, username, status=None):
+        """
+        Iterate over the PRs actionable by user.
+
+        Pages are fetched lazily, see iter_projects.
+
+        Params:
+            username (string): filters the username of the user whose
+                               activity you are interested in.
+            status (string): filter the status of pull requests. Default: Open,
+                             can be Closed, Merged, All.
+
+        Returns:
+            generator: the Pull-Requests a user is able to action for all the
+                       projects for given Pagure instance.
+        """
+        request_url = "{}/api/0/user/{}/requests/actionable".format(
+            self.instance, username)
+
+        payload = {'username': username}
+        if status is not None:
+            payload['status'] = status
+
+        return self._iter_pages(request_url, payload, 'requests',
+                                model=PullRequest)
+
+    def list_all_prs_actionable_by_user(self, username, status=None,
+                                        max_workers=4):
+        """
+        List all the pull-requests actionable by user, fetching the pages
+        concurrently.
+
+        Params:
+            username (string): filters the username of the user whose
+                               activity you are interested in.
+            status (string): filter the status of pull requests. Default: Open,
+                             can be Closed, Merged, All.
+            max_workers (integer): the number of pages to fetch at the same
+                                   time.
+
+        Returns:
+            PagedList: the Pull-Requests a user is able to action for all
+                       the projects for given Pagure instance, with the
+                       timing of each page.
+        """
+        request_url = "{}/api/0/user/{}/requests/actionable".format(
+            self.instance, username)
+
+        payload = {'username': username}
+        if status is not None:
+            payload['status'] = status
+
+        return self._list_all_pages(request_url, payload, 'requests',
+                                    max_workers, model=PullRequest)
 
     def new_project(self, name, description, namespace=None, url=None,
                     avatar_email=None, create_readme=False, private=False):
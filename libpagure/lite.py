@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+"""
+A minimal transport over http.client, for the short lived processes.
+
+Importing requests, with urllib3, idna, certifi and the charset detection
+it brings along, takes a noticeable part of the run time of a process
+making a single API call, like a git hook. ``LiteTransport`` sends the
+requests with the standard library instead::
+
+    pg = Pagure(pagure_repository="foo", transport=LiteTransport())
+
+It keeps one connection alive per host and thread, closed once the
+thread is gone, so a Pagure object using it can be shared by threads,
+asks for gzip compressed answers and follows the redirects. It does not
+read the proxy settings of the environment and verifies the certificates
+against the CA store of the system rather than certifi's, use
+``Transport`` when this matters.
+
+Its failures raise the subclasses of ``libpagure.exceptions.
+TransportError``, which RetryPolicy knows about.
+"""
+
+import json
+import logging
+import select
+import socket
+import threading
+import weakref
+import zlib
+
+try:
+    import http.client as httplib
+    from urllib.parse import urlencode, urljoin, urlsplit
+except ImportError:  # Python 2
+    import httplib
+    from urllib import urlencode
+    from urlparse import urljoin, urlsplit
+
+from .exceptions import (
+    ConnectError, ConnectTimeout, ConnectionFailed, ReadTimeout,
+    TransportError)
+
+
+LOG = logging.getLogger("libpagure")
+
+#: the statuses of the redirects followed
+REDIRECT_STATUSES = frozenset([301, 302, 303, 307, 308])
+#: the maximum number of redirects followed for a request
+MAX_REDIRECTS = 5
+
+# a reused connection may have been closed by the server meanwhile
+_STALE_ERRORS = (httplib.BadStatusLine, socket.error)
+_IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+
+def _encode(fields):
+    """ Encode params or form data the way requests does: the None values
+    are left out and the lists give one field per element.
+    """
+    if not fields:
+        return ''
+    if isinstance(fields, dict):
+        fields = fields.items()
+    return urlencode([(key, value) for key, value in fields
+                      if value is not None], doseq=True)
+
+
+class LiteResponse(object):
+    """ The subset of requests.Response used by the clients. """
+
+    def __init__(self, response, url, connection):
+        self.status_code = response.status
+        self.reason = response.reason
+        #: the headers, their names are case insensitive
+        self.headers = response.msg
+        self.url = url
+        self._response = response
+        self._connection = connection
+        self._content = None
+        gzipped = (self.headers.get('Content-Encoding') or '').lower() \
+            == 'gzip'
+        self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) \
+            if gzipped else None
+
+    def _decompress(self, data, last=False):
+        if self._decompressor is None:
+            return data
+        data = self._decompressor.decompress(data)
+        if last:
+            data += self._decompressor.flush()
+        return data
+
+    def _read(self, size=None):
+        try:
+            return self._response.read(size) if size is not None \
+                else self._response.read()
+        except socket.timeout as err:
+            self.close()
+            raise ReadTimeout(err)
+        except (socket.error, httplib.HTTPException) as err:
+            self.close()
+            raise ConnectionFailed(err)
+
+    @property
+    def content(self):
+        """ The body of the response, read at once. """
+        if self._content is None:
+            self._content = self._decompress(self._read(), last=True)
+        return self._content
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', 'replace')
+
+    def json(self):
+        return json.loads(self.text)
+
+    def iter_content(self, chunk_size=1):
+        """
+        Read the body by chunks, as it arrives.
+        :param chunk_size: the number of bytes read at a time
+        :return: a generator of bytes
+        """
+        if self._content is not None:
+            for start in range(0, len(self._content), chunk_size):
+                yield self._content[start:start + chunk_size]
+            return
+        while True:
+            chunk = self._read(chunk_size)
+            if not chunk:
+                break
+            chunk = self._decompress(chunk)
+            if chunk:
+                yield chunk
+        chunk = self._decompress(b'', last=True)
+        if chunk:
+            yield chunk
+
+    def close(self):
+        """ Release the connection, closing it if the body is not read. """
+        if not self._response.isclosed():
+            # what is left of the body would be read as the next answer
+            self._response.close()
+            self._connection.close()
+
+
+class _ThreadConnections(dict):
+    """ The connections of a thread, by scheme, host and verify, only
+    referenced by the thread local data so that they are closed once the
+    thread is gone.
+    """
+
+    def __del__(self):
+        for connection in self.values():
+            connection.close()
+
+
+class LiteTransport(object):
+    """ A transport over http.client, with one connection per host and
+    thread.
+    """
+
+    #: the exceptions raised when a request fails, see Pagure._send
+    errors = TransportError
+
+    def __init__(self, timeout=60, keep_alive=True,
+                 user_agent='libpagure'):
+        """
+        Create a transport.
+        :param timeout: the seconds to wait for the connection or for
+            data from the server, None to wait forever
+        :param keep_alive: whether to reuse the connections between
+            requests, when False every request opens a new connection
+        :param user_agent: the User-Agent header sent
+        :return:
+        """
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.user_agent = user_agent
+        self._local = threading.local()
+        # the connections of the live threads, for close
+        self._connections = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        """ What the requests are sent with, the transport itself. """
+        return self
+
+    def get_session(self):
+        return self
+
+    def _connection(self, scheme, netloc, verify):
+        connections = getattr(self._local, 'connections', None)
+        if connections is None:
+            connections = self._local.connections = _ThreadConnections()
+            with self._lock:
+                self._connections[id(connections)] = connections
+        key = (scheme, netloc, verify)
+        connection = connections.get(key)
+        if connection is None:
+            if scheme == 'https':
+                connection = httplib.HTTPSConnection(
+                    netloc, timeout=self.timeout,
+                    context=_ssl_context(verify))
+            elif scheme == 'http':
+                connection = httplib.HTTPConnection(netloc,
+                                                    timeout=self.timeout)
+            else:
+                raise TransportError('Unsupported URL scheme: {}'.format(
+                    scheme))
+            with self._lock:
+                connections[key] = connection
+        return connection
+
+    def request(self, method, url, params=None, headers=None, data=None,
+                verify=True, stream=False):
+        """
+        Send a request, following the redirects.
+        :param method: the HTTP method
+        :param url: the URL to call
+        :param params: the params added to the query string
+        :param headers: the headers to send along
+        :param data: the form to send, a dict
+        :param verify: whether to verify the TLS certificate
+        :param stream: leave the body to be read from the response,
+            otherwise it is read right away
+        :return: a LiteResponse
+        """
+        query = _encode(params)
+        if query:
+            url = '{}{}{}'.format(url, '&' if '?' in url else '?', query)
+        body = _encode(data) or None
+        all_headers = {'User-Agent': self.user_agent,
+                       'Accept-Encoding': 'gzip', 'Accept': '*/*'}
+        if not self.keep_alive:
+            all_headers['Connection'] = 'close'
+        if body is not None:
+            all_headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        all_headers.update(headers or {})
+
+        for _ in range(MAX_REDIRECTS + 1):
+            response = self._send(method, url, all_headers, body, verify)
+            location = response.headers.get('Location')
+            if response.status_code not in REDIRECT_STATUSES or \
+                    not location:
+                break
+            response.content  # noqa, read so that the connection is reused
+            target = urljoin(url, location)
+            LOG.debug('Redirected from %s to %s', url, target)
+            if response.status_code == 303 or (
+                    response.status_code in (301, 302) and
+                    method == 'POST'):
+                method, body = 'GET', None
+                all_headers.pop('Content-Type', None)
+            if urlsplit(target).netloc != urlsplit(url).netloc:
+                # the token is not sent to another host
+                all_headers.pop('Authorization', None)
+            url = target
+        else:
+            raise TransportError('Too many redirects: {}'.format(url))
+
+        if not stream:
+            response.content  # noqa
+        return response
+
+    def _send(self, method, url, headers, body, verify):
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path = '{}?{}'.format(path, parts.query)
+        connection = self._connection(parts.scheme, parts.netloc, verify)
+
+        if connection.sock is not None and _dropped(connection.sock):
+            connection.close()
+        reused = connection.sock is not None
+        if not reused:
+            try:
+                connection.connect()
+            except socket.timeout as err:
+                connection.close()
+                raise ConnectTimeout(err)
+            except (socket.error, httplib.HTTPException) as err:
+                connection.close()
+                raise ConnectError(err)
+        try:
+            try:
+                connection.request(method, path, body, headers)
+                response = connection.getresponse()
+            except _STALE_ERRORS as err:
+                # sending again is only safe when it changes nothing
+                if not reused or isinstance(err, socket.timeout) or \
+                        method not in _IDEMPOTENT_METHODS:
+                    raise
+                LOG.debug('Reconnecting to %s: %s', parts.netloc, err)
+                connection.close()
+                connection.request(method, path, body, headers)
+                response = connection.getresponse()
+        except socket.timeout as err:
+            connection.close()
+            raise ReadTimeout(err)
+        except (socket.error, httplib.HTTPException) as err:
+            connection.close()
+            raise ConnectionFailed(err)
+        return LiteResponse(response, url, connection)
+
+    def close(self):
+        """
+        Close the connections, of every thread.
+        :return:
+        """
+        with self._lock:
+            connections = [connection
+                           for owned in self._connections.values()
+                           for connection in owned.values()]
+            self._connections.clear()
+        self._local = threading.local()
+        for connection in connections:
+            connection.close()
+
+
+def _dropped(sock):
+    """ Tell whether the server closed an idle connection: there is
+    nothing to read from it until a request is sent, but the end of
+    the stream.
+    """
+    try:
+        readable = select.select([sock], [], [], 0)[0]
+    except (ValueError, socket.error):
+        return True
+    return bool(readable)
+
+
+_SSL_CONTEXTS = {}
+
+
+def _ssl_context(verify):
+    context = _SSL_CONTEXTS.get(verify)
+    if context is None:
+        import ssl
+        context = ssl.create_default_context()
+        if not verify:
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        _SSL_CONTEXTS[verify] = context
+    return context
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+In-process metrics of the API calls.
+
+``MetricsCollector`` is a hook, see ``libpagure.hooks``, counting the calls
+of each endpoint along with their status codes, errors, bytes received
+and a histogram of their latencies::
+
+    metrics = MetricsCollector()
+    pg = Pagure(hooks=[metrics])
+    ...
+    metrics.snapshot()['GET {repo}/issues']['p95']
+    print(metrics.to_prometheus())
+
+The latencies are kept in fixed buckets, so the memory used does not grow
+with the number of calls, and the percentiles are interpolated within the
+buckets the way Prometheus' ``histogram_quantile`` does.
+"""
+
+import bisect
+import threading
+
+from .hooks import Hook
+
+#: the upper bounds of the latency buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75,
+                   1.0, 2.5, 5.0, 7.5, 10.0, 30.0, 60.0)
+
+
+class EndpointMetrics(object):
+    """ The metrics of one method and endpoint. """
+
+    __slots__ = ('method', 'endpoint', 'count', 'statuses', 'errors',
+                 'bytes', 'buckets', 'latency_sum')
+
+    def __init__(self, method, endpoint, bucket_count):
+        self.method = method
+        self.endpoint = endpoint
+        self.count = 0
+        self.statuses = {}
+        self.errors = {}
+        self.bytes = 0
+        # one more bucket for the latencies above the last bound
+        self.buckets = [0] * (bucket_count + 1)
+        self.latency_sum = 0.0
+
+
+class MetricsCollector(Hook):
+    """ A thread safe hook aggregating the calls per endpoint. """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix='libpagure'):
+        """
+        Create a collector.
+        :param buckets: the increasing upper bounds of the latency
+            buckets, in seconds
+        :param prefix: the prefix of the names of the Prometheus metrics
+        :return:
+        """
+        super(MetricsCollector, self).__init__()
+        self.bounds = tuple(buckets)
+        self.prefix = prefix
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def _metrics(self, call):
+        key = (call.method, call.endpoint)
+        metrics = self._endpoints.get(key)
+        if metrics is None:
+            metrics = self._endpoints[key] = EndpointMetrics(
+                call.method, call.endpoint, len(self.bounds))
+        return metrics
+
+    def _observe(self, metrics, elapsed):
+        metrics.count += 1
+        metrics.latency_sum += elapsed
+        metrics.buckets[bisect.bisect_left(self.bounds, elapsed)] += 1
+
+    def after_response(self, call, response):
+        with self._lock:
+            metrics = self._metrics(call)
+            self._observe(metrics, call.elapsed)
+            metrics.statuses[call.status] = \
+                metrics.statuses.get(call.status, 0) + 1
+            if call.size:
+                metrics.bytes += call.size
+
+    def on_error(self, call, error):
+        name = type(error).__name__
+        with self._lock:
+            metrics = self._metrics(call)
+            if call.status is None:
+                # no response, the call was not observed yet
+                self._observe(metrics, call.elapsed)
+            metrics.errors[name] = metrics.errors.get(name, 0) + 1
+
+    def reset(self):
+        """
+        Forget everything collected so far.
+        :return:
+        """
+        with self._lock:
+            self._endpoints.clear()
+
+    def quantile(self, q, buckets):
+        """
+        Estimate a quantile from the counts of the buckets.
+        :param q: the quantile, between 0 and 1
+        :param buckets: the count of each bucket
+        :return: the estimated latency in seconds, None without any call
+        """
+        total = sum(buckets)
+        if not total:
+            return None
+        rank = q * total
+        cumulated = 0
+        for index, count in enumerate(buckets):
+            if cumulated + count >= rank and count:
+                if index == len(self.bounds):
+                    # above the last bound, nothing better to answer
+                    return self.bounds[-1]
+                lower = self.bounds[index - 1] if index else 0.0
+                upper = self.bounds[index]
+                return lower + (upper - lower) * (rank - cumulated) / count
+            cumulated += count
+        return self.bounds[-1]
+
+    def snapshot(self):
+        """
+        Get the metrics collected so far.
+        :return: a dict keyed by 'METHOD endpoint' of dicts with the count,
+            statuses, errors, bytes, latency_sum and the p50, p95 and p99
+            latencies in seconds
+        """
+        with self._lock:
+            endpoints = [(metrics.method, metrics.endpoint, metrics.count,
+                          dict(metrics.statuses), dict(metrics.errors),
+                          metrics.bytes, metrics.latency_sum,
+                          list(metrics.buckets))
+                         for metrics in self._endpoints.values()]
+        snapshot = {}
+        for method, endpoint, count, statuses, errors, size, latency_sum, \
+                buckets in endpoints:
+            snapshot['{} {}'.format(method, endpoint)] = {
+                'method': method,
+                'endpoint': endpoint,
+                'count': count,
+                'statuses': statuses,
+                'errors': errors,
+                'bytes': size,
+                'latency_sum': latency_sum,
+                'p50': self.quantile(0.50, buckets),
+                'p95': self.quantile(0.95, buckets),
+                'p99': self.quantile(0.99, buckets),
+            }
+        return snapshot
+
+    def to_prometheus(self):
+        """
+        Export the metrics in the Prometheus text format.
+        :return: the text of the metrics
+        """
+        with self._lock:
+            endpoints = sorted(
+                ((metrics.method, metrics.endpoint, dict(metrics.statuses),
+                  dict(metrics.errors), metrics.bytes, list(metrics.buckets),
+                  metrics.latency_sum, metrics.count)
+                 for metrics in self._endpoints.values()),
+                key=lambda item: item[:2])
+
+        name = (self.prefix + '_{}').format
+        request_lines = _header(name('requests_total'), 'counter',
+                                'API calls which got a response.')
+        error_lines = _header(name('errors_total'), 'counter',
+                              'API calls which raised.')
+        size_lines = _header(name('response_bytes_total'), 'counter',
+                             'Bytes of the bodies received.')
+        latency_lines = _header(name('request_duration_seconds'), 'histogram',
+                                'Duration of the API calls, retries '
+                                'included.')
+
+        for method, endpoint, statuses, errors, size, buckets, latency_sum, \
+                count in endpoints:
+            labels = {'method': method, 'endpoint': endpoint}
+            for status in sorted(statuses):
+                request_lines.append('{}{} {}'.format(
+                    name('requests_total'),
+                    _labels(labels, status=status), statuses[status]))
+            for error in sorted(errors):
+                error_lines.append('{}{} {}'.format(
+                    name('errors_total'),
+                    _labels(labels, error=error), errors[error]))
+            size_lines.append('{}{} {}'.format(
+                name('response_bytes_total'), _labels(labels), size))
+            cumulated = 0
+            for bound, bucket in zip(self.bounds + ('+Inf',), buckets):
+                cumulated += bucket
+                latency_lines.append('{}{} {}'.format(
+                    name('request_duration_seconds_bucket'),
+                    _labels(labels, le=bound), cumulated))
+            latency_lines.append('{}{} {!r}'.format(
+                name('request_duration_seconds_sum'), _labels(labels),
+                latency_sum))
+            latency_lines.append('{}{} {}'.format(
+                name('request_duration_seconds_count'), _labels(labels),
+                count))
+
+        return '\n'.join(request_lines + error_lines + size_lines +
+                         latency_lines) + '\n'
+
+
+def _header(name, kind, help_text):
+    return ['# HELP {} {}'.format(name, help_text),
+            '# TYPE {} {}'.format(name, kind)]
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n') \
+        .replace('"', '\\"')
+
+
+def _labels(labels, **extra):
+    labels = dict(labels, **extra)
+    return '{' + ','.join('{}="{}"'.format(key, _escape(labels[key]))
+                          for key in sorted(labels)) + '}'
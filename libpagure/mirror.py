@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+Local SQLite mirror of the issues and pull requests of repositories.
+
+The mirror is filled from the API once, then queried locally as many
+times as needed::
+
+    mirror = Mirror('pagure.sqlite')
+    mirror.populate(pg.for_repo('foo'))
+    mirror.issues(repo='foo', status='Open', tag='easyfix')
+    mirror.search('segfault', kind='issue')
+
+Issues and pull requests are stored as returned by the API, along with
+indexed columns for the usual filters (status, author, assignee,
+milestone, priority, tags) and a full text index over their title,
+content and comments. The full text index uses the FTS5 extension of
+SQLite when it is available and falls back to LIKE otherwise.
+"""
+
+import json
+import sqlite3
+import threading
+
+from .models import Model
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    repo TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    title TEXT,
+    status TEXT,
+    author TEXT,
+    assignee TEXT,
+    milestone TEXT,
+    priority INTEGER,
+    date_created INTEGER,
+    last_updated INTEGER,
+    content TEXT,
+    comments TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (repo, kind, id)
+);
+CREATE INDEX IF NOT EXISTS items_status ON items (kind, status);
+CREATE INDEX IF NOT EXISTS items_author ON items (kind, author);
+CREATE INDEX IF NOT EXISTS items_assignee ON items (kind, assignee);
+CREATE INDEX IF NOT EXISTS items_milestone ON items (kind, milestone);
+CREATE INDEX IF NOT EXISTS items_priority ON items (kind, priority);
+CREATE INDEX IF NOT EXISTS items_updated ON items (kind, last_updated);
+CREATE TABLE IF NOT EXISTS item_tags (
+    repo TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (repo, kind, id, tag)
+);
+CREATE INDEX IF NOT EXISTS item_tags_tag ON item_tags (tag, kind);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+    title, content, comments,
+    content='items', content_rowid='rowid'
+);
+"""
+
+#: the kinds of items stored
+ISSUE = 'issue'
+REQUEST = 'request'
+
+
+def repo_name(client):
+    """ Return the name of the repository of a client as used in the
+    mirror: its path in the API, for instance ``rpms/foo`` or
+    ``fork/user/foo``.
+    """
+    prefix = "{}/api/0/".format(client.instance)
+    return client.create_basic_url()[len(prefix):].strip('/')
+
+
+def _user_name(user):
+    if isinstance(user, dict):
+        return user.get('name')
+    return user
+
+
+def _timestamp(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class Mirror(object):
+
+    def __init__(self, path=':memory:'):
+        """
+        Open a mirror, creating its tables if needed.
+        :param path: the path of the SQLite database
+        :return:
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+            try:
+                self._conn.executescript(FTS_SCHEMA)
+                self.has_fts = True
+            except sqlite3.OperationalError:
+                self.has_fts = False
+
+    def close(self):
+        self._conn.close()
+
+    def store(self, repo, kind, items):
+        """
+        Insert or replace items in the mirror.
+        :param repo: the name of the repository, see repo_name
+        :param kind: ISSUE or REQUEST
+        :param items: the issues or pull requests, as returned by the API
+        :return: the number of items stored
+        """
+        count = 0
+        with self._lock, self._conn:
+            for item in items:
+                self._store(repo, kind, item)
+                count += 1
+        return count
+
+    def _store(self, repo, kind, item):
+        if isinstance(item, Model):
+            item = item.to_dict()
+        item_id = int(item['id'])
+        key = (repo, kind, item_id)
+        comments = '\n'.join(comment.get('comment') or ''
+                             for comment in item.get('comments') or [])
+        content = item.get('content', item.get('initial_comment'))
+        if self.has_fts:
+            self._delete_fts(key)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO items (repo, kind, id, title, status, "
+            "author, assignee, milestone, priority, date_created, "
+            "last_updated, content, comments, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            key + (item.get('title'), item.get('status'),
+                   _user_name(item.get('user')),
+                   _user_name(item.get('assignee')),
+                   item.get('milestone'), item.get('priority'),
+                   _timestamp(item.get('date_created')),
+                   _timestamp(item.get('last_updated')),
+                   content, comments, json.dumps(item)))
+        self._conn.execute(
+            "DELETE FROM item_tags WHERE repo = ? AND kind = ? AND id = ?",
+            key)
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO item_tags (repo, kind, id, tag) "
+            "VALUES (?, ?, ?, ?)",
+            [key + (tag,) for tag in item.get('tags') or []])
+        if self.has_fts:
+            self._conn.execute(
+                "INSERT INTO items_fts (rowid, title, content, comments) "
+                "SELECT rowid, title, content, comments FROM items "
+                "WHERE repo = ? AND kind = ? AND id = ?", key)
+
+    def _delete_fts(self, key):
+        # external content FTS tables need the old values to delete a row
+        self._conn.execute(
+            "INSERT INTO items_fts (items_fts, rowid, title, content, "
+            "comments) SELECT 'delete', rowid, title, content, comments "
+            "FROM items WHERE repo = ? AND kind = ? AND id = ?", key)
+
+    def populate(self, client, issues=True, requests=True, status='all'):
+        """
+        Fill the mirror with the issues and pull requests of a repository.
+        :param client: the Pagure client of the repository
+        :param issues: whether to fetch the issues
+        :param requests: whether to fetch the pull requests
+        :param status: the status of the items to fetch, all by default
+        :return: the number of items stored
+        """
+        repo = repo_name(client)
+        count = 0
+        if issues:
+            count += self.store(repo, ISSUE, client.iter_issues(
+                status=status, per_page=100))
+        if requests:
+            count += self.store(repo, REQUEST, client.iter_requests(
+                status=status, per_page=100))
+        return count
+
+    def _query(self, kind, repo=None, status=None, author=None,
+               assignee=None, milestone=None, priority=None, tag=None,
+               text=None, order='last_updated DESC', limit=None):
+        clauses = ['items.kind = ?']
+        args = [kind]
+        for column, value in (('repo', repo), ('status', status),
+                              ('author', author), ('assignee', assignee),
+                              ('milestone', milestone),
+                              ('priority', priority)):
+            if value is not None:
+                clauses.append('items.{} = ?'.format(column))
+                args.append(value)
+        if tag is not None:
+            clauses.append(
+                'EXISTS (SELECT 1 FROM item_tags WHERE item_tags.tag = ? '
+                'AND item_tags.repo = items.repo AND '
+                'item_tags.kind = items.kind AND item_tags.id = items.id)')
+            args.append(tag)
+        if text is not None:
+            if self.has_fts:
+                clauses.append('items.rowid IN (SELECT rowid FROM items_fts '
+                               'WHERE items_fts MATCH ?)')
+                args.append(text)
+            else:
+                clauses.append('(items.title LIKE ? OR items.content LIKE ? '
+                               'OR items.comments LIKE ?)')
+                args.extend(['%{}%'.format(text)] * 3)
+
+        sql = 'SELECT repo, data FROM items WHERE {}'.format(
+            ' AND '.join(clauses))
+        if order:
+            sql += ' ORDER BY {}'.format(order)
+        if limit is not None:
+            sql += ' LIMIT ?'
+            args.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        return [json.loads(row['data']) for row in rows]
+
+    def issues(self, repo=None, status=None, author=None, assignee=None,
+               milestone=None, priority=None, tag=None, text=None,
+               limit=None):
+        """
+        Query the mirrored issues, most recently updated first.
+        :param repo: filters the repository, see repo_name
+        :param status: filters the status of the issues
+        :param author: filters the author of the issues
+        :param assignee: filters the assignee of the issues
+        :param milestone: filters the milestone of the issues
+        :param priority: filters the priority of the issues
+        :param tag: filters the issues having this tag
+        :param text: a full text query over title, content and comments,
+            in the FTS5 syntax when available
+        :param limit: the maximum number of issues to return
+        :return: a list of issues, as returned by the API
+        """
+        return self._query(ISSUE, repo, status, author, assignee, milestone,
+                           priority, tag, text, limit=limit)
+
+    def requests(self, repo=None, status=None, author=None, assignee=None,
+                 tag=None, text=None, limit=None):
+        """
+        Query the mirrored pull requests, most recently updated first.
+        Takes the same filters as issues.
+        :return: a list of pull requests, as returned by the API
+        """
+        return self._query(REQUEST, repo, status, author, assignee, tag=tag,
+                           text=text, limit=limit)
+
+    def search(self, text, kind=ISSUE, repo=None, limit=None):
+        """
+        Full text search over the title, content and comments.
+        :param text: the query, in the FTS5 syntax when available
+        :param kind: ISSUE or REQUEST
+        :param repo: filters the repository
+        :param limit: the maximum number of results
+        :return: a list of issues or pull requests
+        """
+        if self.has_fts:
+            return self._ranked_search(text, kind, repo, limit)
+        return self._query(kind, repo, text=text, limit=limit)
+
+    def _ranked_search(self, text, kind, repo, limit):
+        sql = ('SELECT items.data FROM items_fts JOIN items '
+               'ON items.rowid = items_fts.rowid '
+               'WHERE items_fts MATCH ? AND items.kind = ?')
+        args = [text, kind]
+        if repo is not None:
+            sql += ' AND items.repo = ?'
+            args.append(repo)
+        sql += ' ORDER BY items_fts.rank'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            args.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        return [json.loads(row['data']) for row in rows]
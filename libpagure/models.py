@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+Compact typed models of the answers.
+
+A client created with ``models=True`` returns ``Issue``, ``PullRequest``
+and ``Project`` objects instead of dicts::
+
+    pg = Pagure(pagure_repository='foo', models=True)
+    issue = pg.issue_info(1)
+    issue.title, issue.user.name, issue.comments[0].comment
+    issue.to_dict()
+
+The known keys are stored in ``__slots__``, which takes a fraction of the
+memory of a dict with the same keys, the keys pagure may add later are
+kept in a small dict. The nested objects (users, comments, projects) are
+kept as decoded and only turned into models the first time they are
+accessed, so unused nested values cost nothing more than their JSON.
+``to_dict`` gives back the answer as returned by the API.
+
+A key absent from the answer reads as None, and is left out by
+``to_dict``.
+"""
+
+
+class Nested(object):
+    """ A nested value turned into a model the first time it is read.
+
+    Objects become a model, lists of objects a tuple of models, which is
+    also how an already parsed value is recognised.
+    """
+
+    __slots__ = ('key', 'slot', 'model_name')
+
+    def __init__(self, key, model_name):
+        self.key = key
+        self.slot = '_' + key
+        # the models refer to each other, they are looked up when needed
+        self.model_name = model_name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        try:
+            value = getattr(obj, self.slot)
+        except AttributeError:
+            return None
+        if isinstance(value, (dict, list)):
+            value = self.parse(value)
+            setattr(obj, self.slot, value)
+        return value
+
+    def __set__(self, obj, value):
+        setattr(obj, self.slot, value)
+
+    def parse(self, value):
+        model = MODELS[self.model_name]
+        if isinstance(value, dict):
+            return model.from_dict(value)
+        return tuple(model.from_dict(item) if isinstance(item, dict) else item
+                     for item in value)
+
+
+def _unparse(value):
+    if isinstance(value, Model):
+        return value.to_dict()
+    if isinstance(value, tuple):
+        return [_unparse(item) for item in value]
+    return value
+
+
+class Model(object):
+    """ The base class of the models. """
+
+    __slots__ = ('_extra',)
+
+    #: the keys stored as they are
+    fields = ()
+    #: the keys parsed lazily into other models, see Nested
+    nested = ()
+    #: the slot of each key, filled by the model decorator
+    _known = {}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Create a model from an answer of the API.
+        :param data: the decoded JSON object
+        :return: the model
+        """
+        obj = cls.__new__(cls)
+        known = cls._known
+        extra = None
+        for key, value in data.items():
+            slot = known.get(key)
+            if slot is not None:
+                setattr(obj, slot, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        obj._extra = extra
+        return obj
+
+    @classmethod
+    def many(cls, items):
+        """
+        Create a model from each answer of a list.
+        :param items: the decoded JSON objects
+        :return: the list of the models
+        """
+        return [cls.from_dict(item) for item in items]
+
+    def __getattr__(self, name):
+        # only called for the slots never set: the keys absent from the
+        # answer, and the keys only known to a later pagure
+        if name in type(self)._known:
+            return None
+        extra = object.__getattribute__(self, '_extra')
+        if extra is not None and name in extra:
+            return extra[name]
+        raise AttributeError(name)
+
+    def __getitem__(self, key):
+        value = getattr(self, key)
+        if value is None and key not in self:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        slot = type(self)._known.get(key)
+        if slot is not None:
+            try:
+                object.__getattribute__(self, slot)
+            except AttributeError:
+                return False
+            return True
+        return self._extra is not None and key in self._extra
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def to_dict(self):
+        """
+        Convert the model back into the answer of the API.
+        :return: a new dict, nested models converted too
+        """
+        data = {}
+        for key, slot in type(self)._known.items():
+            try:
+                value = object.__getattribute__(self, slot)
+            except AttributeError:
+                continue
+            data[key] = _unparse(value)
+        if self._extra is not None:
+            data.update(self._extra)
+        return data
+
+    def __eq__(self, other):
+        if type(self) is not type(other):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        identifier = 'id'
+        if 'id' not in type(self)._known:
+            identifier = 'name'
+        return '{}({}={!r})'.format(type(self).__name__, identifier,
+                                    getattr(self, identifier))
+
+
+def model(cls):
+    """ Class decorator listing the keys of a model from its slots. """
+    nested = [key for key, value in vars(cls).items()
+              if isinstance(value, Nested)]
+    cls.nested = tuple(sorted(nested))
+    cls.fields = tuple(slot for slot in cls.__slots__
+                       if slot.lstrip('_') not in nested)
+    cls._known = dict([(key, key) for key in cls.fields] +
+                      [(key, '_' + key) for key in cls.nested])
+    MODELS[cls.__name__] = cls
+    return cls
+
+
+#: the models by name, for Nested
+MODELS = {}
+
+
+@model
+class User(Model):
+    """ A user, as found in the other answers. """
+
+    __slots__ = ('name', 'fullname', 'url_path', 'full_url',
+                 'default_email', 'emails')
+
+
+@model
+class Comment(Model):
+    """ A comment of an issue or pull request. """
+
+    __slots__ = ('id', 'comment', 'date_created', 'edited_on',
+                 'notification', 'parent', 'reactions', '_user', '_editor')
+
+    user = Nested('user', 'User')
+    editor = Nested('editor', 'User')
+
+
+@model
+class Project(Model):
+    """ A project, as returned by list_projects. """
+
+    __slots__ = ('id', 'name', 'namespace', 'fullname', 'url_path',
+                 'full_url', 'description', 'date_created', 'date_modified',
+                 'milestones', 'priorities', 'tags', 'close_status',
+                 'custom_keys', 'access_users', 'access_groups', '_user',
+                 '_parent')
+
+    user = Nested('user', 'User')
+    parent = Nested('parent', 'Project')
+
+
+@model
+class Issue(Model):
+    """ An issue, as returned by issue_info and list_issues. """
+
+    __slots__ = ('id', 'title', 'content', 'status', 'close_status',
+                 'date_created', 'last_updated', 'closed_at', 'private',
+                 'priority', 'milestone', 'tags', 'depends', 'blocks',
+                 'custom_fields', 'related_prs', 'full_url', '_user',
+                 '_assignee', '_closed_by', '_comments')
+
+    user = Nested('user', 'User')
+    assignee = Nested('assignee', 'User')
+    closed_by = Nested('closed_by', 'User')
+    comments = Nested('comments', 'Comment')
+
+
+@model
+class PullRequest(Model):
+    """ A pull request, as returned by request_info and list_requests. """
+
+    __slots__ = ('id', 'uid', 'title', 'initial_comment', 'status',
+                 'branch', 'branch_from', 'commit_start', 'commit_stop',
+                 'date_created', 'last_updated', 'updated_on', 'closed_at',
+                 'tags', 'threshold_reached', 'cached_merge_status',
+                 'remote_git', 'full_url', '_user', '_assignee',
+                 '_closed_by', '_project', '_repo_from', '_comments')
+
+    user = Nested('user', 'User')
+    assignee = Nested('assignee', 'User')
+    closed_by = Nested('closed_by', 'User')
+    project = Nested('project', 'Project')
+    repo_from = Nested('repo_from', 'Project')
+    comments = Nested('comments', 'Comment')
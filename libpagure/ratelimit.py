@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+Client side rate limiting.
+
+A ``RateLimiter`` makes every request take a token from a bucket before
+being sent, with separate buckets for reads and writes, so that many
+workers together stay under the rate allowed by the pagure instance::
+
+    limiter = RateLimiter(read=TokenBucket(rate=20, capacity=40),
+                          write=FileTokenBucket('/tmp/pagure-writes',
+                                                rate=2))
+    pg = Pagure(rate_limiter=limiter)
+
+``TokenBucket`` is shared between the threads of a process,
+``FileTokenBucket`` keeps its state in a locked file and is shared
+between all the processes of a host using the same path.
+"""
+
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    _clock = time.monotonic
+except AttributeError:  # Python 2
+    _clock = time.time
+
+
+class TokenBucket(object):
+    """ A thread safe token bucket. """
+
+    def __init__(self, rate, capacity=None, clock=_clock, sleep=time.sleep):
+        """
+        Create a bucket, initially full.
+        :param rate: the number of tokens added per second
+        :param capacity: the maximum number of tokens, which is the size
+            of the bursts allowed. Defaults to rate
+        :param clock: the function returning the current time
+        :param sleep: the function used to wait for tokens
+        :return:
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _take(self, tokens):
+        """ Take tokens if there are enough of them.
+
+        :return: 0 if the tokens were taken, otherwise the time to wait
+            before there are enough of them
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens +
+                               (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0
+            return (tokens - self._tokens) / self.rate
+
+    def try_acquire(self, tokens=1):
+        """
+        Take tokens without waiting.
+        :param tokens: the number of tokens to take
+        :return: whether the tokens were taken
+        """
+        return self._take(tokens) == 0
+
+    def acquire(self, tokens=1):
+        """
+        Take tokens, waiting until there are enough of them.
+        :param tokens: the number of tokens to take
+        :return: the time spent waiting
+        """
+        waited = 0
+        delay = self._take(tokens)
+        while delay:
+            self._sleep(delay)
+            waited += delay
+            delay = self._take(tokens)
+        return waited
+
+
+class FileTokenBucket(TokenBucket):
+    """ A token bucket shared between processes through a locked file.
+
+    The file holds the number of tokens left and the time it was last
+    updated. It is created full if it does not exist. Only available on
+    platforms providing fcntl.
+    """
+
+    def __init__(self, path, rate, capacity=None, sleep=time.sleep):
+        """
+        Create a bucket.
+        :param path: the path of the file holding the state of the bucket
+        :param rate: the number of tokens added per second
+        :param capacity: the maximum number of tokens, which is the size
+            of the bursts allowed. Defaults to rate
+        :param sleep: the function used to wait for tokens
+        :return:
+        """
+        if fcntl is None:
+            raise NotImplementedError(
+                'FileTokenBucket needs fcntl, use TokenBucket instead')
+        # the processes must agree on the time, hence the wall clock
+        super(FileTokenBucket, self).__init__(
+            rate, capacity, clock=time.time, sleep=sleep)
+        self.path = path
+
+    def _take(self, tokens):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            content = os.read(fd, 64).split()
+            now = self._clock()
+            if len(content) == 2:
+                available = min(self.capacity, float(content[0]) +
+                                (now - float(content[1])) * self.rate)
+            else:
+                available = self.capacity
+
+            delay = 0
+            if available >= tokens:
+                available -= tokens
+            else:
+                delay = (tokens - available) / self.rate
+
+            state = '{0!r} {1!r}'.format(available, now).encode('ascii')
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, state)
+            return delay
+        finally:
+            os.close(fd)
+
+
+class RateLimiter(object):
+    """ Pick the bucket of a request according to its method. """
+
+    #: methods counted as reads, all the others are writes
+    READ_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+
+    def __init__(self, read=None, write=None):
+        """
+        Create a rate limiter.
+        :param read: the bucket of the read requests, None for no limit
+        :param write: the bucket of the write requests, None for no limit
+        :return:
+        """
+        self.read = read
+        self.write = write
+
+    def acquire(self, method):
+        """
+        Wait until a request can be sent.
+        :param method: the HTTP method of the request
+        :return: the time spent waiting
+        """
+        if method.upper() in self.READ_METHODS:
+            bucket = self.read
+        else:
+            bucket = self.write
+        if bucket is None:
+            return 0
+        return bucket.acquire()
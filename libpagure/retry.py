@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Retry policy for the API calls.
+
+By default a failed call is reported right away. With a ``RetryPolicy``
+the transient failures (connection errors, 429, 502, 503, 504) are
+retried with an exponential backoff::
+
+    pg = Pagure(retry=RetryPolicy(max_attempts=5, max_total_delay=30))
+    pg.list_issues()
+    pg.last_attempts  # how many requests the call above needed
+"""
+
+import calendar
+import random
+from email.utils import parsedate_tz, mktime_tz
+import time
+
+from .exceptions import ConnectError, ConnectionFailed, ReadTimeout, \
+    TransportError
+
+
+def parse_retry_after(value, now=None):
+    """ Parse the value of a Retry-After header.
+
+    :arg value: the header, either a number of seconds or an HTTP date
+    :kwarg now: the current timestamp, used with HTTP dates
+    :return: the number of seconds to wait or None if it can't be parsed
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    parsed = parsedate_tz(value)
+    if parsed is None:
+        return None
+    if now is None:
+        now = calendar.timegm(time.gmtime())
+    return max(0.0, mktime_tz(parsed) - now)
+
+
+def _connect_failed(error):
+    """ Tell whether a requests exception was raised while opening the
+    connection, before anything was sent.
+    """
+    # the error comes from requests, it is imported already
+    import requests
+    from requests.packages.urllib3.exceptions import ConnectTimeoutError
+
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.ConnectionError) or not error.args:
+        return False
+    # the connection errors of urllib3 are wrapped in a MaxRetryError
+    reason = getattr(error.args[0], 'reason', error.args[0])
+    return isinstance(reason, ConnectTimeoutError)
+
+
+class RetryPolicy(object):
+
+    #: methods which can safely be sent again whatever happened
+    IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT',
+                                    'DELETE'])
+    #: statuses worth retrying for idempotent methods
+    RETRY_STATUSES = frozenset([429, 502, 503, 504])
+    #: statuses telling that the request was not processed, and can be
+    #: retried whatever the method
+    REJECTED_STATUSES = frozenset([429])
+
+    def __init__(self, max_attempts=3, backoff_factor=0.5, max_backoff=30,
+                 max_total_delay=60, jitter=True, retry_statuses=None,
+                 idempotent_methods=None):
+        """
+        Create a retry policy.
+        :param max_attempts: the maximum number of requests sent for a
+            single call, including the first one
+        :param backoff_factor: the delay before the first retry, doubled
+            for each following one
+        :param max_backoff: the maximum delay between two attempts
+        :param max_total_delay: the maximum time spent waiting between
+            the attempts of a single call, retrying stops once it would
+            be exceeded
+        :param jitter: pick a random delay between 0 and the backoff
+            to spread the retries of concurrent clients
+        :param retry_statuses: the statuses to retry, defaults to
+            RETRY_STATUSES
+        :param idempotent_methods: the methods retried on any failure,
+            defaults to IDEMPOTENT_METHODS. The others are only retried
+            when the connection could not be opened, so nothing was sent,
+            or when the request was rejected with a 429
+        :return:
+        """
+        self.max_attempts = max_attempts
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.max_total_delay = max_total_delay
+        self.jitter = jitter
+        self.retry_statuses = frozenset(
+            retry_statuses if retry_statuses is not None
+            else self.RETRY_STATUSES)
+        self.idempotent_methods = frozenset(
+            idempotent_methods if idempotent_methods is not None
+            else self.IDEMPOTENT_METHODS)
+
+    def backoff(self, attempt):
+        """
+        Get the delay to wait after a given failed attempt.
+        :param attempt: the number of the attempt which failed, from 1
+        :return: the delay in seconds
+        """
+        delay = min(self.max_backoff,
+                    self.backoff_factor * (2 ** (attempt - 1)))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    def is_retryable(self, method, response=None, error=None):
+        """
+        Tell whether a failed attempt may be retried.
+        :param method: the HTTP method of the request
+        :param response: the response received, if any
+        :param error: the exception raised while sending the request
+        :return: a boolean
+        """
+        idempotent = method.upper() in self.idempotent_methods
+        if error is not None:
+            if isinstance(error, TransportError):
+                connect_failed = isinstance(error, ConnectError)
+                transient = (ConnectionFailed, ReadTimeout)
+            else:
+                connect_failed = _connect_failed(error)
+                import requests
+                transient = (requests.ConnectionError, requests.Timeout)
+            if connect_failed:
+                # nothing was sent, whatever the method
+                return True
+            return idempotent and isinstance(error, transient)
+        if response.status_code in self.REJECTED_STATUSES:
+            return response.status_code in self.retry_statuses
+        return idempotent and response.status_code in self.retry_statuses
+
+    def next_delay(self, method, attempt, waited, response=None, error=None):
+        """
+        Decide what to do after an attempt.
+        :param method: the HTTP method of the request
+        :param attempt: the number of the attempt, from 1
+        :param waited: the time already spent waiting between the
+            previous attempts
+        :param response: the response received, if any
+        :param error: the exception raised while sending the request
+        :return: the delay to wait before the next attempt, or None if
+            the call should not be retried
+        """
+        if attempt >= self.max_attempts:
+            return None
+        if not self.is_retryable(method, response=response, error=error):
+            return None
+
+        delay = None
+        if response is not None:
+            delay = parse_retry_after(response.headers.get('Retry-After'))
+        if delay is None:
+            delay = self.backoff(attempt)
+        if waited + delay > self.max_total_delay:
+            return None
+        return delay
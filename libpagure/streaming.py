@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental parsing of the big list answers.
+
+``ArrayStream`` is fed the body of an answer chunk after chunk and hands
+back the elements of one of its top level arrays (``projects``,
+``issues``, ``requests``, ``users``...) as soon as each of them has been
+received, so that only the element being parsed is held in memory rather
+than the whole answer::
+
+    stream = ArrayStream('projects')
+    for chunk in response.iter_content(65536):
+        for project in stream.feed(chunk):
+            ...
+    stream.close()
+
+The other keys of the answer are parsed and dropped, everything after the
+array is ignored.
+"""
+
+import codecs
+import json
+
+
+class _Incomplete(object):
+    pass
+
+
+_INCOMPLETE = _Incomplete()
+_WHITESPACE = ' \t\n\r'
+
+# parser states
+_START, _KEY, _COLON, _VALUE, _AFTER_VALUE, _FIRST_ITEM, _ITEM, \
+    _AFTER_ITEM, _DONE = range(9)
+
+
+class ArrayStream(object):
+
+    def __init__(self, key, object_hook=None):
+        """
+        Create a parser.
+        :param key: the key of the top level array to extract
+        :param object_hook: a function called with each element parsed,
+            whose result is returned instead of the element
+        :return:
+        """
+        self.key = key
+        self.object_hook = object_hook
+        self.found = False
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._state = _START
+        self._current_key = None
+
+    @property
+    def done(self):
+        """ Whether the end of the array has been reached. """
+        return self._state == _DONE
+
+    def feed(self, chunk):
+        """
+        Parse a chunk of the body.
+        :param chunk: the next bytes of the body
+        :return: the list of the elements completed by this chunk
+        """
+        if self._state == _DONE:
+            return []
+        self._buffer += self._text.decode(chunk)
+        return self._parse(final=False)
+
+    def close(self):
+        """
+        Signal the end of the body.
+        :return: the list of the last elements
+        :raise ValueError: if the body is not valid JSON
+        :raise KeyError: if the body has no such top level key
+        """
+        items = []
+        if self._state != _DONE:
+            self._buffer += self._text.decode(b'', final=True)
+            items = self._parse(final=True)
+        if not self.found:
+            raise KeyError(self.key)
+        if self._state != _DONE:
+            raise ValueError('Truncated JSON document')
+        return items
+
+    def _value(self, final):
+        """ Parse the value at the current position if it is complete. """
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except ValueError:
+            if final:
+                raise
+            return _INCOMPLETE
+        if end == len(self._buffer) and not final:
+            # a number may go on in the next chunk, and a value is always
+            # followed by at least one character in a valid document
+            return _INCOMPLETE
+        self._pos = end
+        return value
+
+    def _expect(self, char, expected):
+        if char not in expected:
+            raise ValueError('Expecting {!r} at {!r}'.format(
+                expected, self._buffer[self._pos:self._pos + 20]))
+        self._pos += 1
+
+    def _parse(self, final):
+        items = []
+        buffer = self._buffer
+        while self._state != _DONE:
+            while self._pos < len(buffer) and buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos >= len(buffer):
+                break
+            char = buffer[self._pos]
+            state = self._state
+
+            if state == _START:
+                self._expect(char, '{')
+                self._state = _KEY
+            elif state == _KEY:
+                if char == '}':
+                    self._pos += 1
+                    self._state = _DONE
+                    break
+                key = self._value(final)
+                if key is _INCOMPLETE:
+                    break
+                self._current_key = key
+                self._state = _COLON
+            elif state == _COLON:
+                self._expect(char, ':')
+                self._state = _VALUE
+            elif state == _VALUE:
+                if self._current_key == self.key:
+                    self._expect(char, '[')
+                    self.found = True
+                    self._state = _FIRST_ITEM
+                    continue
+                if self._value(final) is _INCOMPLETE:
+                    break
+                self._state = _AFTER_VALUE
+            elif state == _AFTER_VALUE:
+                self._expect(char, ',}')
+                self._state = _KEY if char == ',' else _DONE
+            elif state in (_FIRST_ITEM, _ITEM):
+                if char == ']' and state == _FIRST_ITEM:
+                    self._pos += 1
+                    self._state = _DONE
+                    break
+                item = self._value(final)
+                if item is _INCOMPLETE:
+                    break
+                if self.object_hook is not None:
+                    item = self.object_hook(item)
+                items.append(item)
+                self._state = _AFTER_ITEM
+            elif state == _AFTER_ITEM:
+                self._expect(char, ',]')
+                self._state = _ITEM if char == ',' else _DONE
+
+        # forget what was parsed so only the pending element is kept
+        self._buffer = buffer[self._pos:]
+        self._pos = 0
+        return items
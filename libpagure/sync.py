@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental synchronisation of the issues of repositories.
+
+``IssueSync`` keeps a local copy of the issues of each repository along
+with a high-water mark: the most recent ``last_updated`` it has seen. Each
+``sync`` only asks pagure for the issues updated since that mark, merges
+them into the local copy and returns what changed::
+
+    syncer = IssueSync(pg, path='issues.json')
+    delta = syncer.sync('foo')
+    for issue in delta.closed:
+        ...
+    syncer.save()
+
+The first sync of a repository downloads all of its issues and reports
+them as created.
+"""
+
+import json
+import os
+import threading
+from collections import namedtuple
+
+from .models import Model
+
+
+class SyncDelta(namedtuple('SyncDelta', ['created', 'updated', 'closed'])):
+    """ The issues which changed since the previous sync.
+
+    ``closed`` holds the issues which were closed since then, ``updated``
+    every other modified issue, reopened ones included.
+    """
+
+    def __bool__(self):
+        return bool(self.created or self.updated or self.closed)
+
+    __nonzero__ = __bool__
+
+
+class IssueSync(object):
+
+    def __init__(self, client, path=None):
+        """
+        Create a synchroniser.
+        :param client: the Pagure client of the instance
+        :param path: a JSON file the state is loaded from and saved to,
+            by default the state only lives in memory
+        :return:
+        """
+        self.client = client
+        self.path = path
+        self.state = {}
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            with open(path) as stream:
+                self.state = json.load(stream)
+
+    def _repo_client(self, repo, fork_username, namespace):
+        if repo is None:
+            return self.client
+        return self.client.for_repo(repo, fork_username=fork_username,
+                                    namespace=namespace)
+
+    def _repo_state(self, client):
+        # the API URL identifies both the instance and the repository
+        key = client.create_basic_url()
+        with self._lock:
+            return self.state.setdefault(
+                key, {'watermark': None, 'issues': {}})
+
+    def issues(self, repo=None, fork_username=None, namespace=None):
+        """
+        Get the local copy of the issues of a repository.
+        :param repo: the repository, defaults to the one of the client
+        :param fork_username: if this is a fork, it's the username
+             of the fork creator
+        :param namespace: the namespace of the repository
+        :return: a dict mapping the issue ids, as strings, to the issues
+        """
+        client = self._repo_client(repo, fork_username, namespace)
+        return self._repo_state(client)['issues']
+
+    def watermark(self, repo=None, fork_username=None, namespace=None):
+        """
+        Get the high-water mark of a repository.
+        :return: the most recent last_updated timestamp seen, None if the
+            repository was never synced
+        """
+        client = self._repo_client(repo, fork_username, namespace)
+        return self._repo_state(client)['watermark']
+
+    def sync(self, repo=None, fork_username=None, namespace=None):
+        """
+        Fetch the issues updated since the previous sync and merge them.
+        :param repo: the repository, defaults to the one of the client
+        :param fork_username: if this is a fork, it's the username
+             of the fork creator
+        :param namespace: the namespace of the repository
+        :return: a SyncDelta
+        """
+        client = self._repo_client(repo, fork_username, namespace)
+        state = self._repo_state(client)
+        watermark = state['watermark']
+        issues = state['issues']
+        delta = SyncDelta([], [], [])
+
+        # since is inclusive, the issues seen at the watermark come back
+        # and are recognised as unchanged below
+        for issue in client.iter_issues(status='all', since=watermark,
+                                        per_page=100):
+            if isinstance(issue, Model):
+                # the state is saved as JSON
+                issue = issue.to_dict()
+            issue_id = str(issue['id'])
+            previous = issues.get(issue_id)
+            if previous is None:
+                delta.created.append(issue)
+            elif previous.get('last_updated') == issue.get('last_updated'):
+                continue
+            elif (issue.get('status') == 'Closed' and
+                    previous.get('status') != 'Closed'):
+                delta.closed.append(issue)
+            else:
+                delta.updated.append(issue)
+            issues[issue_id] = issue
+
+            last_updated = issue.get('last_updated')
+            if last_updated is not None:
+                watermark = max(int(last_updated), watermark or 0)
+
+        state['watermark'] = watermark
+        return delta
+
+    def save(self):
+        """
+        Write the state to its file, atomically.
+        :return:
+        """
+        if self.path is None:
+            raise ValueError('IssueSync was created without a path')
+        tmp_path = '{}.tmp'.format(self.path)
+        with self._lock:
+            with open(tmp_path, 'w') as stream:
+                json.dump(self.state, stream)
+        os.rename(tmp_path, self.path)
@@ -0,0 +1,381 @@
+# -*- coding: utf-8 -*-
+"""
+Lightweight tracing of the API calls, without any external service.
+
+A client created with a ``Tracer`` opens a span for each of its public
+methods, with child spans for the pages fetched, each HTTP attempt, the
+waits of the retries and of the rate limiter, and the decoding of the
+answers. The spans opened in the threads of the bulk helpers and in the
+tasks of AsyncPagure keep their parent, so one job gives one tree::
+
+    exporter = InMemoryExporter()
+    pg = Pagure(tracer=Tracer(exporter))
+    with pg.tracer.span('triage'):
+        for number, info, error in pg.iter_requests_info(ids):
+            pg.flag_request(number, ...)
+    for span in critical_path(exporter.spans):
+        print(span.name, span.duration, span.attributes)
+
+``JSONFileExporter`` appends the spans to a file, one JSON object per
+line, to be read back with ``read_spans``.
+"""
+
+import functools
+import inspect
+import json
+import random
+import threading
+import time
+import types
+from timeit import default_timer
+
+try:
+    import contextvars
+except ImportError:  # Python < 3.7, the spans only follow the threads
+    contextvars = None
+
+
+class _ThreadLocalVar(object):
+    """ The subset of ContextVar used here, over a thread local. """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def get(self):
+        return getattr(self._local, 'value', None)
+
+    def set(self, value):
+        previous = self.get()
+        self._local.value = value
+        return previous
+
+    def reset(self, token):
+        self._local.value = token
+
+
+if contextvars is not None:
+    _CURRENT = contextvars.ContextVar('libpagure_span', default=None)
+else:
+    _CURRENT = _ThreadLocalVar()
+
+
+def current_span():
+    """ Return the span active in this thread or task, if any. """
+    return _CURRENT.get()
+
+
+def submit(executor, func, *args):
+    """ Submit a call to an executor, keeping the active span as parent
+    of the spans it opens.
+    """
+    if contextvars is None:
+        return executor.submit(func, *args)
+    return executor.submit(contextvars.copy_context().run, func, *args)
+
+
+def _new_id():
+    return '{:016x}'.format(random.getrandbits(64))
+
+
+class Span(object):
+    """ A timed operation. """
+
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'start',
+                 'duration', 'attributes', 'error', 'thread', '_started')
+
+    def __init__(self, name, parent=None, attributes=None):
+        """
+        Start a span.
+        :param name: the name of the operation
+        :param parent: the parent span, None for the root of a trace
+        :param attributes: a dict of details about the operation
+        :return:
+        """
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else _new_id()
+        self.span_id = _new_id()
+        self.parent_id = parent.span_id if parent is not None else None
+        #: the wall clock time the span started at
+        self.start = time.time()
+        #: the seconds the span lasted, None until it is finished
+        self.duration = None
+        self.attributes = attributes or {}
+        self.error = None
+        self.thread = threading.current_thread().name
+        self._started = default_timer()
+
+    @property
+    def end(self):
+        if self.duration is None:
+            return None
+        return self.start + self.duration
+
+    def set(self, **attributes):
+        """
+        Add details about the operation.
+        :return:
+        """
+        self.attributes.update(attributes)
+
+    def fail(self, error):
+        """
+        Record the exception which ended the span.
+        :param error: the exception
+        :return:
+        """
+        self.error = '{}: {}'.format(type(error).__name__, error)
+
+    def finish(self):
+        if self.duration is None:
+            self.duration = default_timer() - self._started
+
+    def to_dict(self):
+        return {'name': self.name, 'trace_id': self.trace_id,
+                'span_id': self.span_id, 'parent_id': self.parent_id,
+                'start': self.start, 'duration': self.duration,
+                'attributes': self.attributes, 'error': self.error,
+                'thread': self.thread}
+
+    @classmethod
+    def from_dict(cls, data):
+        span = cls.__new__(cls)
+        for key in ('name', 'trace_id', 'span_id', 'parent_id', 'start',
+                    'duration', 'attributes', 'error', 'thread'):
+            setattr(span, key, data.get(key))
+        span._started = None
+        return span
+
+    def __repr__(self):
+        return 'Span({!r}, duration={!r}, attributes={!r})'.format(
+            self.name, self.duration, self.attributes)
+
+
+class _NoSpan(object):
+    """ What the spans are replaced with when tracing is disabled. """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+NO_SPAN = _NoSpan()
+
+
+class _ActiveSpan(object):
+
+    __slots__ = ('tracer', 'span', 'finish', '_token')
+
+    def __init__(self, tracer, span, finish):
+        self.tracer = tracer
+        self.span = span
+        self.finish = finish
+
+    def __enter__(self):
+        self._token = _CURRENT.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _CURRENT.reset(self._token)
+        if exc_value is not None and not isinstance(exc_value,
+                                                    GeneratorExit):
+            self.span.fail(exc_value)
+        if self.finish:
+            self.tracer.finish(self.span)
+        return False
+
+
+class Tracer(object):
+    """ Create the spans and hand them to an exporter once finished. """
+
+    def __init__(self, exporter=None):
+        """
+        Create a tracer.
+        :param exporter: where the finished spans are sent, an
+            InMemoryExporter by default
+        :return:
+        """
+        self.exporter = exporter if exporter is not None \
+            else InMemoryExporter()
+
+    def start(self, name, **attributes):
+        """
+        Start a span, child of the active one, without activating it.
+        :param name: the name of the operation
+        :return: the Span
+        """
+        return Span(name, _CURRENT.get(), attributes)
+
+    def use(self, span):
+        """
+        Activate a span: the spans started meanwhile are its children.
+        :return: a context manager
+        """
+        return _ActiveSpan(self, span, finish=False)
+
+    def finish(self, span):
+        """
+        Finish a span and export it.
+        :return:
+        """
+        span.finish()
+        self.exporter.export(span)
+
+    def span(self, name, **attributes):
+        """
+        Start a span, active and finished by a with statement::
+
+            with tracer.span('triage', repo='foo') as span:
+                ...
+
+        :param name: the name of the operation
+        :return: a context manager giving the Span
+        """
+        return _ActiveSpan(self, self.start(name, **attributes), finish=True)
+
+    def iterate(self, span, iterator):
+        """
+        Iterate with a span active, finishing it with the iteration.
+        :param span: the span, see start
+        :param iterator: the iterator
+        :return: a generator of the items of the iterator
+        """
+        try:
+            while True:
+                with self.use(span):
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        return
+                yield item
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                close()
+            self.finish(span)
+
+
+def _traced(func):
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        tracer = self.tracer
+        if tracer is None:
+            return func(self, *args, **kwargs)
+        span = tracer.start(name)
+        with tracer.use(span):
+            try:
+                result = func(self, *args, **kwargs)
+            except BaseException:
+                tracer.finish(span)
+                raise
+        if isinstance(result, types.GeneratorType):
+            # the work is done while iterating
+            return tracer.iterate(span, result)
+        tracer.finish(span)
+        return result
+
+    return wrapper
+
+
+def traced(exclude=(), wrap=_traced):
+    """ Class decorator opening a span for every public method.
+
+    The instances must have a ``tracer`` attribute, nothing is traced
+    when it is None.
+
+    :kwarg exclude: the names of the methods not to trace
+    :kwarg wrap: the function wrapping a method, the coroutines of
+        AsyncPagure are wrapped by libpagure.aio
+    """
+    def decorate(cls):
+        for name, value in list(vars(cls).items()):
+            if name.startswith('_') or name in exclude or \
+                    not inspect.isfunction(value):
+                continue
+            setattr(cls, name, wrap(value))
+        return cls
+    return decorate
+
+
+class InMemoryExporter(object):
+    """ Keep the finished spans in a list. """
+
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def clear(self):
+        with self._lock:
+            del self.spans[:]
+
+
+class JSONFileExporter(object):
+    """ Append the finished spans to a file, one JSON object per line. """
+
+    def __init__(self, path):
+        """
+        Open the file.
+        :param path: the path of the file, created if needed
+        :return:
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._stream = open(path, 'a')
+
+    def export(self, span):
+        line = json.dumps(span.to_dict(), default=repr) + '\n'
+        with self._lock:
+            self._stream.write(line)
+            self._stream.flush()
+
+    def close(self):
+        self._stream.close()
+
+
+def read_spans(path):
+    """
+    Read the spans written by a JSONFileExporter.
+    :param path: the path of the file
+    :return: a list of Span
+    """
+    with open(path) as stream:
+        return [Span.from_dict(json.loads(line)) for line in stream
+                if line.strip()]
+
+
+def critical_path(spans, root=None):
+    """
+    Follow the spans which determined the end of their parent.
+
+    Starting from the root, the child ending last is the one the parent
+    waited for, and so on down to a span without children.
+
+    :param spans: the finished spans of a trace
+    :param root: the span to start from, by default the longest root span
+    :return: the list of the spans of the path, from the root
+    """
+    spans = [span for span in spans if span.duration is not None]
+    if root is None:
+        roots = [span for span in spans if span.parent_id is None]
+        if not roots:
+            return []
+        root = max(roots, key=lambda span: span.duration)
+    children = {}
+    for span in spans:
+        children.setdefault(span.parent_id, []).append(span)
+
+    path = [root]
+    while children.get(path[-1].span_id):
+        path.append(max(children[path[-1].span_id],
+                        key=lambda span: span.end))
+    return path
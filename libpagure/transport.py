@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP transport shared between Pagure clients.
+
+Every ``Pagure`` object creates its own requests session by default, which
+means its own connection pool, TLS handshakes and idle sockets. A
+``Transport`` holds a single session with a tunable connection pool that
+many clients can use::
+
+    transport = Transport(pool_maxsize=20, warm_up=["https://pagure.io"])
+    pg = Pagure(transport=transport)
+    repos = [pg.for_repo(name) for name in ("foo", "bar", "baz")]
+
+Thread safety: requests does not guarantee that a session can be used by
+several threads at once. A transport created with
+``per_thread_sessions=True`` gives each thread its own session, configured
+the same way, closed once the thread is gone, and a ``Pagure`` object
+using it can then be shared by all the threads of a ThreadPoolExecutor::
+
+    pg = Pagure(transport=Transport(per_thread_sessions=True))
+    with ThreadPoolExecutor(max_workers=64) as executor:
+        issues = list(executor.map(pg.issue_info, issue_ids))
+"""
+
+import logging
+import threading
+import weakref
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+LOG = logging.getLogger("libpagure")
+
+
+class _ThreadSession(object):
+    """ The session of a thread, only referenced by the thread local data
+    so that it is closed once the thread is gone.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    def __del__(self):
+        self.session.close()
+
+
+class Transport(object):
+
+    #: the exceptions raised when a request fails, see Pagure._send
+    errors = requests.RequestException
+
+    def __init__(self, pool_connections=10, pool_maxsize=10,
+                 keep_alive=True, warm_up=None, insecure=False,
+                 per_thread_sessions=False):
+        """
+        Create a transport.
+        :param pool_connections: the number of hosts to keep a connection
+            pool for
+        :param pool_maxsize: the maximum number of connections kept open
+            per host
+        :param keep_alive: whether to reuse the connections between
+            requests, when False every request opens a new connection
+        :param warm_up: a list of URLs to open a connection to right away,
+            so that the first API calls do not pay for the handshakes.
+            Ignored with per_thread_sessions, the connections would only
+            be opened for the session of the current thread
+        :param insecure: do not verify the TLS certificates when warming up
+        :param per_thread_sessions: give each thread its own session, and
+            connection pool, instead of sharing a single one
+        :return:
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self.insecure = insecure
+        self.per_thread_sessions = per_thread_sessions
+        self._local = threading.local()
+        self._session = None
+        # the sessions of the live threads, for close
+        self._thread_sessions = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        if warm_up and not per_thread_sessions:
+            self.warm_up(warm_up)
+        elif warm_up:
+            LOG.debug('No warm up with per thread sessions')
+
+    @property
+    def session(self):
+        """ The session to use from the current thread. """
+        return self.get_session()
+
+    def get_session(self):
+        """
+        Get the session to use from the current thread.
+        :return: a requests session
+        """
+        if self.per_thread_sessions:
+            owned = getattr(self._local, 'owned', None)
+            if owned is None:
+                owned = self._local.owned = _ThreadSession(
+                    self._create_session())
+                with self._lock:
+                    self._thread_sessions[id(owned)] = owned
+            return owned.session
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    def _create_session(self):
+        session = requests.session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections,
+                              pool_maxsize=self.pool_maxsize)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        if not self.keep_alive:
+            session.headers['Connection'] = 'close'
+        return session
+
+    def warm_up(self, urls):
+        """
+        Open a connection to each of the given URLs so it is ready in the
+        pool. Failures are only logged, the API calls will report them.
+        With per_thread_sessions only the session of the current thread
+        is warmed up, call it from each worker thread.
+        :param urls: the URLs to connect to, usually the instance URL
+        :return:
+        """
+        for url in urls:
+            try:
+                self.session.head(url, verify=not self.insecure, timeout=10)
+            except requests.RequestException as err:
+                LOG.debug('Could not warm up %s: %s', url, err)
+
+    def close(self):
+        """
+        Close all the connections of the pool, of every thread.
+        :return:
+        """
+        with self._lock:
+            sessions = [owned.session
+                        for owned in self._thread_sessions.values()]
+            if self._session is not None:
+                sessions.append(self._session)
+            self._session = None
+            self._thread_sessions.clear()
+        self._local = threading.local()
+        for session in sessions:
+            session.close()
@@ -41,5 +41,12 @@ setup(
     ],
     license='GNU General Public License v2.0',
     install_requires=get_install_requires(),
+    extras_require={
+        'async': ['aiohttp'],
+        'fast': ['orjson'],
+    },
     test_requires=get_test_requires(),
+    entry_points={
+        'console_scripts': ['libpagure = libpagure.cli:main'],
+    },
 )
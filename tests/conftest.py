@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+from libpagure import Pagure
+
+
+class FakeResponse(object):
+    """ The subset of requests.Response read by the client. """
+
+    def __init__(self, status_code=200, output=None, headers=None):
+        self.status_code = status_code
+        self.text = json.dumps(output if output is not None else {})
+        self.content = self.text.encode('utf-8')
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.text)
+
+    def iter_content(self, chunk_size):
+        yield self.content
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def make_pg(mocker):
+    """ Return a function creating a client of the testrepo project, its
+    session answering with the given responses or exceptions in turn
+    """
+    def make(responses=None, **kwargs):
+        kwargs.setdefault('pagure_repository', 'testrepo')
+        pg = Pagure(**kwargs)
+        mocker.patch.object(pg, 'session')
+        pg.session.request.side_effect = responses
+        return pg
+    return make
@@ -0,0 +1,286 @@
+import asyncio
+
+import pytest
+
+aiohttp = pytest.importorskip('aiohttp')
+
+from aiohttp import web  # noqa: E402
+
+from libpagure import APIError, AsyncPagure  # noqa: E402
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def async_return(value):
+    async def _call_api(*args, **kwargs):
+        return value
+    return _call_api
+
+
+def test_async_pagure_object():
+    """ Test the async pagure object creation """
+    pg = AsyncPagure(pagure_token="a token", pagure_repository="test_repo",
+                     fork_username="auser", namespace="ns")
+    assert pg.header == {"Authorization": "token a token"}
+    assert pg.create_basic_url() == \
+        'https://pagure.io/api/0/fork/auser/ns/test_repo/'
+
+
+def test_list_issues(mocker):
+    """ Test the async API call to list all issues of a project """
+    pg = AsyncPagure(pagure_repository="testrepo")
+    mock = mocker.patch.object(pg, '_call_api',
+                               side_effect=async_return({'issues': [1]}))
+    assert run(pg.list_issues(status='Open')) == [1]
+    mock.assert_called_once_with(
+        'https://pagure.io/api/0/testrepo/issues', params={'status': 'Open'})
+
+
+def test_flag_request(mocker):
+    """ Test the async API call to flag a pull-request """
+    pg = AsyncPagure(pagure_repository="testrepo")
+    mock = mocker.patch.object(pg, '_call_api', side_effect=async_return({}))
+    run(pg.flag_request('123', 'ci', 100, 'ok', 'http://ci'))
+    mock.assert_called_once_with(
+        'https://pagure.io/api/0/testrepo/pull-request/123/flag',
+        method='POST', data={'username': 'ci', 'percent': 100,
+                             'comment': 'ok', 'url': 'http://ci'})
+
+
+def test_same_public_methods():
+    """ Every public method of Pagure has an async counterpart """
+    from libpagure import Pagure
+    sync_methods = set(name for name, value in vars(Pagure).items()
+                       if not name.startswith('_') and callable(value))
+    assert sync_methods <= set(dir(AsyncPagure))
+
+
+async def _serve(handler, client_coro):
+    app = web.Application()
+    app.router.add_route('*', '/{tail:.*}', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    try:
+        async with AsyncPagure(
+                pagure_repository="testrepo",
+                pagure_token="a token",
+                instance_url="http://127.0.0.1:{}".format(port)) as pg:
+            return await client_coro(pg)
+    finally:
+        await runner.cleanup()
+
+
+def test_concurrent_calls_over_http():
+    """ Test many calls in flight against a local server """
+    seen = []
+
+    async def handler(request):
+        seen.append((request.path, request.query.get('status'),
+                     request.headers.get('Authorization')))
+        await asyncio.sleep(0.01)
+        return web.json_response({'issues': [request.path]})
+
+    async def client(pg):
+        return await asyncio.gather(
+            *[pg.list_issues(status='Open') for _ in range(20)])
+
+    results = run(_serve(handler, client))
+    assert results == [['/api/0/testrepo/issues']] * 20
+    assert set(seen) == {('/api/0/testrepo/issues', 'Open', 'token a token')}
+
+
+def test_single_flight_over_http():
+    """ Test that identical concurrent calls send a single request """
+    from libpagure import AsyncSingleFlight
+    seen = []
+
+    async def handler(request):
+        seen.append(request.query.get('status'))
+        await asyncio.sleep(0.01)
+        return web.json_response({'issues': [request.query['status']]})
+
+    async def client(pg):
+        pg.single_flight = AsyncSingleFlight()
+        results = await asyncio.gather(
+            *[pg.list_issues(status='Open') for _ in range(20)],
+            pg.list_issues(status='Closed'))
+        return results, pg.single_flight.collapsed
+
+    results, collapsed = run(_serve(handler, client))
+    assert results == [['Open']] * 20 + [['Closed']]
+    assert sorted(seen) == ['Closed', 'Open']
+    assert collapsed == 19
+
+
+def test_api_error_over_http():
+    """ Test that pagure errors are raised as APIError """
+    async def handler(request):
+        return web.json_response({'error': 'Issue not found',
+                                  'error_code': 'ENOISSUE'}, status=404)
+
+    async def client(pg):
+        return await pg.issue_info(1)
+
+    with pytest.raises(APIError):
+        run(_serve(handler, client))
+
+
+def test_iter_projects(mocker):
+    """ Test the async iteration over the pages of projects """
+    pg = AsyncPagure()
+    pages = iter([
+        {'projects': [1, 2], 'pagination': {'page': 1, 'pages': 2}},
+        {'projects': [3], 'pagination': {'page': 2, 'pages': 2}},
+    ])
+
+    async def _call_api(*args, **kwargs):
+        return next(pages)
+    mocker.patch.object(pg, '_call_api', side_effect=_call_api)
+
+    async def collect():
+        return [project async for project in pg.iter_projects()]
+
+    assert run(collect()) == [1, 2, 3]
+
+
+def test_iter_pages_without_metadata(mocker):
+    """ Test that the iteration stops when the server ignores the page """
+    pg = AsyncPagure()
+
+    async def _call_api(*args, **kwargs):
+        return {'projects': [1, 2]}
+    mocker.patch.object(pg, '_call_api', side_effect=_call_api)
+
+    async def collect():
+        return [project async for project in pg.iter_projects()]
+
+    assert run(collect()) == [1, 2]
+    assert pg._call_api.call_count == 1
+
+
+def test_list_all_projects_error(mocker):
+    """ Test that the remaining pages are not fetched once one failed """
+    pg = AsyncPagure()
+
+    async def _call_api(url, params):
+        if params['page'] == 2:
+            raise APIError('Internal error')
+        await asyncio.sleep(0.01)
+        return {'projects': [params['page']],
+                'pagination': {'page': params['page'], 'pages': 100}}
+    mocker.patch.object(pg, '_call_api', side_effect=_call_api)
+
+    async def list_all():
+        with pytest.raises(APIError):
+            await pg.list_all_projects(max_workers=2)
+        await asyncio.sleep(0.05)
+
+    run(list_all())
+    assert pg._call_api.call_count < 10
+
+
+def test_issues_info_many(mocker):
+    """ Test the async hydration of issues with failures """
+    pg = AsyncPagure(pagure_repository="testrepo")
+
+    async def issue_info(issue_id):
+        if issue_id == 3:
+            raise APIError('Issue not found')
+        return {'id': issue_id}
+    mocker.patch.object(pg, 'issue_info', side_effect=issue_info)
+
+    issues = run(pg.issues_info_many(range(1, 6), max_workers=2))
+    assert issues == {1: {'id': 1}, 2: {'id': 2}, 4: {'id': 4},
+                      5: {'id': 5}}
+    assert list(issues.errors) == [3]
+
+
+def test_stream_issues_over_http():
+    """ Test that the issues are streamed from the body """
+    async def handler(request):
+        response = web.StreamResponse()
+        await response.prepare(request)
+        await response.write(b'{"total_issues": 2, "issues": [{"id": 1},')
+        await response.write(b' {"id": 2}]}')
+        return response
+
+    async def client(pg):
+        return [issue async for issue in pg.stream_issues(status='Open')]
+
+    assert run(_serve(handler, client)) == [{'id': 1}, {'id': 2}]
+
+
+def test_stream_issues_unexpected_status():
+    """ Test that an answer other than 200 without an error is raised """
+    async def handler(request):
+        return web.json_response({'issues': [{'id': 1}]}, status=202)
+
+    async def client(pg):
+        return [issue async for issue in pg.stream_issues(status='Open')]
+
+    with pytest.raises(APIError, match='Unexpected HTTP status 202'):
+        run(_serve(handler, client))
+
+
+def test_list_requests_fields(mocker):
+    """ Test the projection of the async list methods """
+    pg = AsyncPagure(pagure_repository="testrepo")
+    mocker.patch.object(pg, '_call_api', side_effect=async_return(
+        {'requests': [{'id': 1, 'title': 'Fix', 'user': {'name': 'ann'}}]}))
+    assert run(pg.list_requests(fields=['id', 'user.name'])) == \
+        [{'id': 1, 'user': {'name': 'ann'}}]
+
+
+def test_hooks_over_http():
+    """ Test that the async calls go through the hooks """
+    from libpagure import MetricsCollector
+
+    async def handler(request):
+        if request.path.endswith('/issue/2'):
+            return web.json_response({'error': 'Issue not found',
+                                      'error_code': 'ENOISSUE'}, status=404)
+        return web.json_response({'id': 1})
+
+    metrics = MetricsCollector()
+
+    async def client(pg):
+        pg.hooks.hooks.append(metrics)
+        await pg.issue_info(1)
+        with pytest.raises(APIError):
+            await pg.issue_info(2)
+
+    run(_serve(handler, client))
+    info = metrics.snapshot()['GET {repo}/issue/{id}']
+    assert info['statuses'] == {200: 1, 404: 1}
+    assert info['errors'] == {'APIError': 1}
+
+
+def test_tracing_over_http():
+    """ Test the spans of concurrent async calls """
+    from libpagure.tracing import Tracer
+
+    async def handler(request):
+        return web.json_response({'id': 1})
+
+    tracer = Tracer()
+
+    async def client(pg):
+        pg.tracer = tracer
+        with tracer.span('job'):
+            return await pg.issues_info_many([1, 2, 3], max_workers=2)
+
+    assert len(run(_serve(handler, client))) == 3
+    spans = tracer.exporter.spans
+    by_id = dict((span.span_id, span) for span in spans)
+    infos = [span for span in spans if span.name == 'issue_info']
+    assert len(infos) == 3
+    assert set(by_id[span.parent_id].name for span in infos) == \
+        {'iter_issues_info'}
+    http = [span for span in spans if span.name == 'http']
+    assert set(by_id[span.parent_id].name for span in http) == \
+        {'issue_info'}
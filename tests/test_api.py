@@ -1,6 +1,8 @@
+import time
+
 import pytest
 
-from libpagure import Pagure
+from libpagure import APIError, Pagure
 
 
 @pytest.fixture(scope='module')
@@ -313,3 +315,120 @@ def test_list_prs_actionable_by_user(mocker, simple_pg):
     expected = {'username': 'auser', 'page': 1}
     Pagure._call_api.assert_called_once_with(
         'https://pagure.io/api/0/user/auser/requests/actionable', params=expected)
+
+
+def test_iter_projects(mocker, simple_pg):
+    """ Test that iter_projects follows the pages lazily """
+    pages = [
+        {'projects': [1, 2], 'pagination': {'page': 1, 'pages': 3}},
+        {'projects': [3, 4], 'pagination': {'page': 2, 'pages': 3}},
+        {'projects': [5], 'pagination': {'page': 3, 'pages': 3}},
+    ]
+    mocker.patch('libpagure.Pagure._call_api', side_effect=pages)
+    projects = simple_pg.iter_projects(namespace='rpms', per_page=2)
+    assert Pagure._call_api.call_count == 0
+    assert list(projects) == [1, 2, 3, 4, 5]
+    assert Pagure._call_api.call_count == 3
+    Pagure._call_api.assert_called_with(
+        'https://pagure.io/api/0/projects',
+        params={'namespace': 'rpms', 'per_page': '2', 'page': 3})
+
+
+def test_iter_projects_stop_early(mocker, simple_pg):
+    """ Test that stopping the iteration does not fetch other pages """
+    mocker.patch('libpagure.Pagure._call_api', return_value={
+        'projects': [1, 2], 'pagination': {'page': 1, 'pages': 100}})
+    projects = simple_pg.iter_projects()
+    assert next(projects) == 1
+    assert next(projects) == 2
+    assert Pagure._call_api.call_count == 1
+
+
+def test_iter_pull_requests(mocker, simple_pg):
+    """ Test the iteration over the pull-requests filed by a user """
+    pages = [
+        {'requests': [1, 2], 'total_requests': 3,
+         'args': {'page': 1, 'per_page': 2}},
+        {'requests': [3], 'total_requests': 3,
+         'args': {'page': 2, 'per_page': 2}},
+    ]
+    mocker.patch('libpagure.Pagure._call_api', side_effect=pages)
+    assert list(simple_pg.iter_pull_requests('auser', status='All')) == \
+        [1, 2, 3]
+    Pagure._call_api.assert_called_with(
+        'https://pagure.io/api/0/user/auser/requests/filed',
+        params={'username': 'auser', 'status': 'All', 'page': 2})
+
+
+def test_iter_prs_actionable_by_user(mocker, simple_pg):
+    """ Test that the iteration stops on an empty page """
+    pages = [{'requests': [1], 'args': {'page': 1}},
+             {'requests': [], 'args': {'page': 2}}]
+    mocker.patch('libpagure.Pagure._call_api', side_effect=pages)
+    assert list(simple_pg.iter_prs_actionable_by_user('auser')) == [1]
+    assert Pagure._call_api.call_count == 2
+
+
+def test_iter_pages_without_metadata(mocker, simple_pg):
+    """ Test that the iteration stops when the server ignores the page
+    or sends a page that is not full
+    """
+    mocker.patch('libpagure.Pagure._call_api',
+                 return_value={'requests': [1, 2]})
+    assert list(simple_pg.iter_prs_actionable_by_user('auser')) == [1, 2]
+    assert Pagure._call_api.call_count == 1
+
+    pages = [{'requests': [1, 2], 'args': {'page': 1, 'per_page': 2}},
+             {'requests': [3], 'args': {'page': 2, 'per_page': 2}}]
+    mocker.patch('libpagure.Pagure._call_api', side_effect=pages)
+    assert list(simple_pg.iter_prs_actionable_by_user('auser')) == [1, 2, 3]
+    assert Pagure._call_api.call_count == 2
+
+
+def test_list_all_projects(mocker, simple_pg):
+    """ Test that list_all_projects returns every page in order """
+    def fake_call_api(url, params):
+        page = params['page']
+        return {'projects': [page * 10, page * 10 + 1],
+                'pagination': {'page': page, 'pages': 5}}
+    mocker.patch('libpagure.Pagure._call_api', side_effect=fake_call_api)
+    projects = simple_pg.list_all_projects(short=True, max_workers=3)
+    assert projects == [10, 11, 20, 21, 30, 31, 40, 41, 50, 51]
+    assert [timing.page for timing in projects.page_timings] == \
+        [1, 2, 3, 4, 5]
+    assert all(timing.count == 2 for timing in projects.page_timings)
+    Pagure._call_api.assert_any_call(
+        'https://pagure.io/api/0/projects',
+        params={'short': True, 'per_page': '100', 'page': 1})
+
+
+def test_list_all_projects_error(mocker, simple_pg):
+    """ Test that the remaining pages are not fetched once one failed """
+    def fake_call_api(url, params):
+        if params['page'] == 2:
+            raise APIError('Internal error')
+        time.sleep(0.01)
+        return {'projects': [params['page']],
+                'pagination': {'page': params['page'], 'pages': 100}}
+    mocker.patch('libpagure.Pagure._call_api', side_effect=fake_call_api)
+    with pytest.raises(APIError):
+        simple_pg.list_all_projects(max_workers=2)
+    assert Pagure._call_api.call_count < 10
+
+
+def test_list_all_pull_requests_unknown_pages(mocker, simple_pg):
+    """ Test that pages are fetched until an empty one without metadata """
+    pages = [{'requests': [1, 2], 'args': {'page': 1}},
+             {'requests': [3], 'args': {'page': 2}},
+             {'requests': [], 'args': {'page': 3}}]
+    mocker.patch('libpagure.Pagure._call_api', side_effect=pages)
+    requests = simple_pg.list_all_pull_requests('auser')
+    assert requests == [1, 2, 3]
+    assert len(requests.page_timings) == 3
+
+    # a server ignoring the page
+    mocker.patch('libpagure.Pagure._call_api',
+                 return_value={'requests': [1, 2]})
+    requests = simple_pg.list_all_pull_requests('auser')
+    assert requests == [1, 2]
+    assert Pagure._call_api.call_count == 1
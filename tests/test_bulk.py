@@ -0,0 +1,174 @@
+import threading
+import time
+
+import pytest
+
+from libpagure import APIError, Pagure
+from libpagure.bulk import (
+    DONE, FAILED, SKIPPED, Checkpoint, Operation, fan_out, imap_unordered,
+    iter_operations, run_operations)
+
+
+def fake_issue_info(issue_id):
+    if issue_id % 100 == 0:
+        raise APIError('Issue not found')
+    return {'id': issue_id}
+
+
+def test_imap_unordered_bounded():
+    """ Test that at most max_workers calls run at the same time """
+    lock = threading.Lock()
+    running = [0]
+    peak = [0]
+
+    def func(item):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.001)
+        with lock:
+            running[0] -= 1
+        return item * 2
+
+    results = list(imap_unordered(func, range(50), 4))
+    assert sorted(results) == [(i, i * 2, None) for i in range(50)]
+    assert peak[0] <= 4
+
+
+def test_imap_unordered_stop_early():
+    """ Test that stopping early does not call the remaining items """
+    called = []
+
+    def func(item):
+        called.append(item)
+        return item
+
+    results = imap_unordered(func, range(1000), 2)
+    next(results)
+    results.close()
+    assert len(called) < 10
+
+
+def test_issues_info_many(mocker):
+    """ Test that failures are collected instead of raised """
+    pg = Pagure(pagure_repository='testrepo')
+    mocker.patch.object(pg, 'issue_info', side_effect=fake_issue_info)
+    issues = pg.issues_info_many(range(1, 2001), max_workers=16)
+    assert len(issues) == 1980
+    assert issues[42] == {'id': 42}
+    assert sorted(issues.errors) == list(range(100, 2001, 100))
+    assert isinstance(issues.errors[100], APIError)
+
+
+def test_iter_requests_info(mocker):
+    """ Test the streaming of the pull-requests info """
+    pg = Pagure(pagure_repository='testrepo')
+    mocker.patch.object(pg, '_call_api', side_effect=lambda url: url)
+    results = sorted(pg.iter_requests_info([1, 2]))
+    assert results == [
+        (1, 'https://pagure.io/api/0/testrepo/pull-request/1', None),
+        (2, 'https://pagure.io/api/0/testrepo/pull-request/2', None),
+    ]
+
+
+def test_operation_key():
+    """ Test that the default key identifies the call """
+    op = Operation('change_issue_status', [1, 'Closed'],
+                   {'close_status': 'wontfix'})
+    assert op.key == Operation.from_dict(op.to_dict()).key
+    assert op.key != Operation('change_issue_status', [2, 'Closed']).key
+    assert Operation('comment_issue', [1, 'a'], key='c1').key == 'c1'
+    with pytest.raises(ValueError):
+        Operation('_call_api', ['https://pagure.io'])
+    with pytest.raises(ValueError):
+        Operation('list_issues', 'abc')
+    with pytest.raises(ValueError):
+        Operation('list_issues', kwargs=[('status', 'Open')])
+
+
+def test_run_operations(mocker):
+    """ Test the report of a bulk triage with a failure """
+    pg = Pagure(pagure_repository='testrepo')
+    mocker.patch.object(pg, '_call_api')
+    pg._call_api.side_effect = \
+        lambda url, **kwargs: fake_issue_info(int(url.split('/')[-2]))
+    ops = [Operation('change_issue_status', [issue_id, 'Closed'])
+           for issue_id in range(95, 105)]
+    ops.append(Operation('comment_issue', [1, 'done'],
+                         repo={'pagure_repository': 'other'}))
+    report = run_operations(pg, ops, max_workers=4)
+
+    assert [result.operation for result in report] == ops
+    statuses = [result.status for result in report]
+    assert statuses == [DONE] * 5 + [FAILED] + [DONE] * 5
+    assert isinstance(report[5].error, APIError)
+    pg._call_api.assert_any_call(
+        'https://pagure.io/api/0/other/issue/1/comment', method='POST',
+        data={'comment': 'done'})
+
+
+def test_run_operations_checkpoint(mocker, tmpdir):
+    """ Test that a resumed run skips the operations already applied """
+    path = str(tmpdir.join('checkpoint'))
+    pg = Pagure(pagure_repository='testrepo')
+    mocker.patch.object(pg, '_call_api')
+    ops = [Operation('comment_issue', [issue_id, 'stale'])
+           for issue_id in range(10)]
+
+    # crash after a few operations
+    results = iter_operations(pg, ops, max_workers=2, checkpoint=path)
+    for _ in range(3):
+        next(results)
+    results.close()
+    # the operation in flight is recorded too, though its result was not read
+    applied = pg._call_api.call_count
+    assert applied == 4
+    with Checkpoint(path) as checkpoint:
+        assert len(checkpoint) == applied
+
+    # simulate a line cut by the crash
+    with open(path, 'a') as stream:
+        stream.write('"partial')
+
+    pg._call_api.reset_mock()
+    report = run_operations(pg, ops, max_workers=4, checkpoint=path)
+    statuses = [result.status for result in report]
+    assert statuses[:applied] == [SKIPPED] * applied
+    assert statuses[applied:] == [DONE] * (10 - applied)
+    assert pg._call_api.call_count == 10 - applied
+    with Checkpoint(path) as checkpoint:
+        assert len(checkpoint) == 10
+
+
+def test_fan_out(mocker):
+    """ Test a query run on many repositories """
+    pg = Pagure()
+
+    def fake_call_api(url, params):
+        if '/broken/' in url:
+            raise APIError('Project not found')
+        return {'issues': [url]}
+    mocker.patch.object(pg, '_call_api', side_effect=fake_call_api)
+
+    repos = ['repo{}'.format(i) for i in range(30)]
+    repos += [{'pagure_repository': 'pkg', 'namespace': 'rpms'}, 'broken']
+    results = list(fan_out(pg, repos, 'list_issues',
+                           kwargs={'status': 'Open'}, max_workers=8))
+
+    assert len(results) == 32
+    by_repo = dict((str(result.repo), result) for result in results)
+    assert by_repo['repo7'].result == \
+        ['https://pagure.io/api/0/repo7/issues']
+    assert by_repo[str(repos[30])].result == \
+        ['https://pagure.io/api/0/rpms/pkg/issues']
+    assert isinstance(by_repo['broken'].error, APIError)
+    assert all(result.elapsed >= 0 for result in results)
+    pg._call_api.assert_any_call('https://pagure.io/api/0/repo0/issues',
+                                 params={'status': 'Open'})
+
+
+def test_fan_out_invalid_method():
+    """ Test that an invalid method is reported for every repository """
+    results = list(fan_out(Pagure(), ['foo', 'bar'], '_call_api'))
+    assert sorted(result.repo for result in results) == ['bar', 'foo']
+    assert all(isinstance(result.error, ValueError) for result in results)
@@ -0,0 +1,115 @@
+from conftest import FakeResponse
+from libpagure import Pagure, ResponseCache, TTLCache
+from libpagure.cache import CacheEntry, cache_key
+
+
+def test_cache_key():
+    """ Test that the key ignores the params order and hides the token """
+    key = cache_key('https://pagure.io/api/0/test/issues',
+                    {'status': 'Open', 'author': 'me', 'tags': None},
+                    {'Authorization': 'token secret'})
+    assert key == cache_key('https://pagure.io/api/0/test/issues',
+                            {'author': 'me', 'status': 'Open'},
+                            {'Authorization': 'token secret'})
+    assert key.startswith(
+        'https://pagure.io/api/0/test/issues?author=me&status=Open#')
+    assert 'secret' not in key
+    assert key != cache_key('https://pagure.io/api/0/test/issues',
+                            {'author': 'me', 'status': 'Open'})
+
+
+def test_lru_eviction():
+    """ Test that the least recently used entries are evicted first """
+    cache = ResponseCache(max_entries=2, max_bytes=100)
+    cache.set('a', CacheEntry('1', None, 'a', 10))
+    cache.set('b', CacheEntry('2', None, 'b', 10))
+    cache.get('a')
+    cache.set('c', CacheEntry('3', None, 'c', 10))
+    assert cache.get('b') is None
+    assert cache.get('a').output == 'a'
+    cache.set('d', CacheEntry('4', None, 'd', 85))
+    assert cache.get('c') is None
+    assert len(cache) == 2
+    assert cache.size == 95
+    cache.set('e', CacheEntry('5', None, 'e', 101))
+    assert cache.get('e') is None
+
+
+def test_without_validators():
+    """ Test that the answers which can not be revalidated are not kept """
+    cache = ResponseCache()
+    cache.set('a', CacheEntry(None, None, 'a', 10))
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def test_revalidation(make_pg):
+    """ Test that a 304 answer is served from the cache """
+    cache = ResponseCache()
+    pg = make_pg(pagure_token='a token', cache=cache)
+    pg.session.request.return_value = FakeResponse(
+        output={'branches': ['main']}, headers={'ETag': '"abc"'})
+    assert pg.project_branches() == ['main']
+
+    pg.session.request.return_value = FakeResponse(304)
+    assert pg.project_branches() == ['main']
+    headers = pg.session.request.call_args[1]['headers']
+    assert headers == {'Authorization': 'token a token',
+                       'If-None-Match': '"abc"'}
+    assert cache.hits == 1
+
+
+def test_no_cache_for_post(make_pg):
+    """ Test that only GET requests are cached """
+    cache = ResponseCache()
+    pg = make_pg(cache=cache)
+    pg.session.request.return_value = FakeResponse(
+        output={'message': 'ok'}, headers={'ETag': '"abc"'})
+    pg.comment_issue(1, 'hello')
+    assert len(cache) == 0
+    assert pg.session.request.call_args[1]['headers'] is None
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_metadata_cache(mocker):
+    """ Test that the instance wide endpoints are memoized until expiry """
+    clock = FakeClock()
+    cache = TTLCache(ttls={'users': 10}, clock=clock)
+    pg = Pagure(metadata_cache=cache)
+    mocker.patch.object(pg, '_call_api', return_value={'users': ['me']})
+
+    assert pg.list_users('m') == ['me']
+    assert pg.list_users('m') == ['me']
+    assert pg._call_api.call_count == 1
+    pg.list_users('x')
+    assert pg._call_api.call_count == 2
+
+    clock.now = 11
+    pg.list_users('m')
+    assert pg._call_api.call_count == 3
+    assert cache.stats() == {'users': {'hits': 1, 'misses': 3,
+                                       'entries': 2}}
+
+
+def test_metadata_cache_invalidate(mocker):
+    """ Test the explicit invalidation of the memoized endpoints """
+    cache = TTLCache()
+    pg = Pagure(metadata_cache=cache)
+    mocker.patch.object(pg, '_call_api',
+                        return_value={'version': '0.8', 'groups': []})
+    pg.api_version()
+    pg.list_groups()
+    cache.invalidate('version')
+    pg.api_version()
+    pg.list_groups()
+    assert pg._call_api.call_count == 3
+    cache.invalidate()
+    assert cache.stats()['groups']['entries'] == 0
@@ -0,0 +1,131 @@
+import io
+import json
+
+import pytest
+
+from benchmarks.server import FakePagure
+from libpagure import Pagure
+from libpagure.cli import (
+    build_client, build_parser, main, parse_operation, run)
+
+
+@pytest.fixture
+def server():
+    with FakePagure(total=50, latency=0.01) as server:
+        yield server
+
+
+def write_operations(path, operations):
+    with open(path, 'w') as stream:
+        for operation in operations:
+            if not isinstance(operation, str):
+                operation = json.dumps(operation)
+            stream.write(operation + '\n')
+
+
+def read_results(path):
+    with open(path) as stream:
+        return sorted((json.loads(line) for line in stream),
+                      key=lambda result: result['line'])
+
+
+def test_parse_operation():
+    """ Test the repositories given by name or as for_repo arguments """
+    operation = parse_operation(
+        '{"method": "comment_issue", "args": [1, "hi"], "repo": "foo"}')
+    assert operation.repo == {'pagure_repository': 'foo'}
+    operation = parse_operation(
+        '{"method": "issue_info", "kwargs": {"issue_id": 1}, '
+        '"repo": {"pagure_repository": "foo", "namespace": "rpms"}}')
+    assert operation.kwargs == {'issue_id': 1}
+    assert operation.repo['namespace'] == 'rpms'
+    for line in ('[1]', '{"args": []}', '{"method": "_call_api"}', 'nope',
+                 '{"method": "list_issues", "args": "abc"}',
+                 '{"method": "list_issues", "kwargs": [1]}'):
+        with pytest.raises(ValueError):
+            parse_operation(line)
+
+
+def test_main(server, tmpdir, capsys):
+    """ Test a run with successes and failures of every kind """
+    source = str(tmpdir.join('ops.jsonl'))
+    output = str(tmpdir.join('results.jsonl'))
+    write_operations(source, [
+        {'method': 'comment_issue', 'args': [1, 'hi'], 'repo': 'foo'},
+        {'method': 'issue_info', 'args': [2]},
+        '',
+        'not json',
+        {'method': 'issue_info', 'args': [51]},
+        {'method': 'stream_issues', 'repo': {'pagure_repository': 'bar',
+                                             'namespace': 'rpms'}},
+        {'method': 'no_such_method'},
+        {'method': 'list_issues', 'args': 'abc'},
+    ])
+    status = main([source, '-o', output, '--instance-url', server.url,
+                   '--repo', 'testrepo', '--workers', '3',
+                   '--write-rate', '100', '--retries', '1'])
+    assert status == 1
+
+    results = read_results(output)
+    assert [(result['line'], result['status']) for result in results] == [
+        (1, 'done'), (2, 'done'), (4, 'failed'), (5, 'failed'),
+        (6, 'done'), (7, 'failed'), (8, 'failed')]
+    assert results[1]['result']['id'] == 2
+    assert results[1]['operation'] == {'method': 'issue_info', 'args': [2],
+                                       'kwargs': {}}
+    assert results[2]['error']['type'] == 'JSONDecodeError'
+    assert results[3]['error'] == {'type': 'APIError',
+                                   'message': 'Issue not found'}
+    assert len(results[4]['result']) == 20
+    assert results[5]['error']['type'] == 'AttributeError'
+    assert results[6]['error'] == {
+        'type': 'ValueError',
+        'message': 'The args of an operation are a list'}
+    assert server.hits['message'] == 1
+    assert '3 done, 4 failed, 0 skipped' in capsys.readouterr().err
+
+
+def test_checkpoint(server, tmpdir):
+    """ Test that a second run skips the operations applied by the first """
+    source = str(tmpdir.join('ops.jsonl'))
+    output = str(tmpdir.join('results.jsonl'))
+    checkpoint = str(tmpdir.join('ops.done'))
+    write_operations(source, [
+        {'method': 'comment_issue', 'args': [number, 'hi']}
+        for number in range(1, 21)])
+    argv = [source, '-o', output, '--instance-url', server.url, '--repo',
+            'testrepo', '--checkpoint', checkpoint, '--lite']
+    assert main(argv) == 0
+    assert main(argv) == 0
+    assert set(result['status'] for result in read_results(output)) == \
+        {'skipped'}
+    assert server.hits['message'] == 20
+
+
+def test_run_streams(server):
+    """ Test that the results are written while the input is being read """
+    client = Pagure(pagure_repository='testrepo', instance_url=server.url)
+    output = io.StringIO()
+    written = []
+
+    def lines():
+        for number in range(1, 11):
+            written.append(output.getvalue().count('\n'))
+            yield json.dumps({'method': 'issue_info', 'args': [number]})
+
+    counts = run(client, lines(), output, workers=2)
+    assert counts == {'done': 10}
+    assert written[-1] > 0
+
+
+def test_build_client():
+    """ Test the client created from the command line """
+    args = build_parser().parse_args([
+        '--repo', 'foo', '--namespace', 'rpms', '--read-rate', '10',
+        '--write-rate', '2', '--retries', '5', '--lite'])
+    client = build_client(args)
+    assert client.create_basic_url() == 'https://pagure.io/api/0/rpms/foo/'
+    assert client.rate_limiter.read.rate == 10
+    assert client.rate_limiter.write.rate == 2
+    assert client.retry.max_attempts == 5
+    assert type(client.transport).__name__ == 'LiteTransport'
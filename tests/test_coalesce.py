@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from benchmarks.server import FakePagure
+from libpagure import AsyncSingleFlight, Pagure, SingleFlight
+
+
+def test_single_flight_collapses():
+    """ Test that the calls overlapping in time share one call """
+    flights = SingleFlight()
+    started = threading.Event()
+    calls = []
+
+    def func():
+        calls.append(1)
+        started.set()
+        time.sleep(0.05)
+        return {'id': 1}
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        first = executor.submit(flights.do, 'key', func)
+        started.wait()
+        others = [executor.submit(flights.do, 'key', func)
+                  for _ in range(7)]
+        results = [first.result()] + [future.result() for future in others]
+
+    assert calls == [1]
+    assert all(result is results[0] for result in results)
+    assert flights.collapsed == 7
+    assert len(flights) == 0
+    # nothing is kept once answered
+    assert flights.do('key', lambda: 'again') == 'again'
+
+
+def test_single_flight_error():
+    """ Test that the exception of the call is raised to every caller """
+    flights = SingleFlight()
+    started = threading.Event()
+
+    def func():
+        started.set()
+        time.sleep(0.05)
+        raise ValueError('boom')
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(flights.do, 'key', func)
+        started.wait()
+        second = executor.submit(flights.do, 'key', func)
+        for future in (first, second):
+            with pytest.raises(ValueError):
+                future.result()
+    assert len(flights) == 0
+
+
+def test_pagure_coalesces_gets():
+    """ Test that identical concurrent GETs send a single request """
+    with FakePagure(latency=0.1) as server:
+        flights = SingleFlight()
+        pg = Pagure(pagure_repository='testrepo', instance_url=server.url,
+                    single_flight=flights)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            infos = list(executor.map(pg.request_info, [1] * 8))
+            executor.map(pg.request_info, [2, 3])
+        assert [info['id'] for info in infos] == [1] * 8
+        # the views of other repositories share the flights
+        pg.for_repo('other').request_info(1)
+    assert server.hits['request'] == 4
+    assert flights.collapsed == 7
+
+
+def test_pagure_does_not_coalesce_posts(mocker):
+    """ Test that the other methods are always sent """
+    flights = SingleFlight()
+    pg = Pagure(pagure_repository='testrepo', single_flight=flights)
+    mock = mocker.patch.object(pg, '_request_api', return_value={})
+    pg.comment_issue(1, 'a comment')
+    assert mock.call_count == 1
+    assert flights.collapsed == 0
+
+
+def test_async_single_flight():
+    """ Test that concurrent tasks share one call, even if one of them
+    is cancelled
+    """
+    flights = AsyncSingleFlight()
+    calls = []
+
+    async def func():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {'id': 1}
+
+    async def main():
+        first = asyncio.ensure_future(flights.do('key', func))
+        await asyncio.sleep(0)
+        first.cancel()
+        results = await asyncio.gather(
+            *[flights.do('key', func) for _ in range(4)])
+        assert first.cancelled()
+        return results
+
+    results = asyncio.run(main())
+    assert calls == [1]
+    assert results == [{'id': 1}] * 4
+    assert flights.collapsed == 4
+    assert len(flights) == 0
+
+
+def test_async_single_flight_error():
+    """ Test that the exception of the call is raised to every task """
+    flights = AsyncSingleFlight()
+
+    async def func():
+        await asyncio.sleep(0.01)
+        raise ValueError('boom')
+
+    async def main():
+        return await asyncio.gather(
+            *[flights.do('key', func) for _ in range(3)],
+            return_exceptions=True)
+
+    errors = asyncio.run(main())
+    assert [type(error) for error in errors] == [ValueError] * 3
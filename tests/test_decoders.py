@@ -0,0 +1,35 @@
+import pytest
+
+from libpagure import Pagure
+from libpagure import decoders
+
+
+@pytest.mark.parametrize('decoder', [
+    decoders.stdlib_decoder,
+    pytest.param(decoders.orjson_decoder, marks=pytest.mark.skipif(
+        decoders.orjson is None, reason='orjson is not installed')),
+])
+def test_decoders(decoder):
+    """ Test that the decoders take the raw bytes """
+    assert decoder(u'{"title": "café", "id": [1]}'.encode('utf-8')) == \
+        {'title': u'café', 'id': [1]}
+
+
+def test_default_decoder():
+    """ Test that orjson is preferred when it is installed """
+    if decoders.orjson is None:
+        assert decoders.default_decoder is decoders.stdlib_decoder
+    else:
+        assert decoders.default_decoder is decoders.orjson_decoder
+    assert Pagure().json_decoder is decoders.default_decoder
+
+
+def test_custom_decoder(mocker):
+    """ Test that _call_api hands the body bytes to the decoder """
+    decoder = mocker.Mock(return_value={'version': '0.8'})
+    pg = Pagure(json_decoder=decoder)
+    mocker.patch.object(pg, 'session')
+    pg.session.request.return_value.status_code = 200
+    pg.session.request.return_value.content = b'{"version": "0.8"}'
+    assert pg.api_version() == '0.8'
+    decoder.assert_called_once_with(b'{"version": "0.8"}')
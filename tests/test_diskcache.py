@@ -0,0 +1,156 @@
+import multiprocessing
+import random
+import sqlite3
+
+import pytest
+
+from benchmarks.server import FakePagure
+from libpagure import DiskCache, MetricsCollector, Pagure
+from libpagure.cache import CacheEntry
+
+URL = 'https://pagure.io/api/0/test/issues'
+
+
+@pytest.fixture
+def path(tmpdir):
+    return str(tmpdir.join('cache.sqlite'))
+
+
+def test_round_trip(path):
+    """ Test that the entries survive the cache object """
+    cache = DiskCache(path)
+    output = {'issues': [{'id': number, 'title': u'été', 'status': 'Open'}
+                         for number in range(50)], 'total': 50}
+    cache.set(URL, CacheEntry('"abc"', None, output, 120))
+    cache.close()
+
+    cache = DiskCache(path)
+    entry = cache.get(URL)
+    assert entry == CacheEntry('"abc"', None, output, 120, None)
+    assert cache.get(URL + '?page=2') is None
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert len(cache) == 1
+    # stored compressed
+    assert 0 < cache.size < len(repr(output))
+
+
+def test_without_validators(path):
+    """ Test that only the entries which can be used are stored """
+    cache = DiskCache(path, ttls={r'/version$': 10})
+    cache.set(URL, CacheEntry(None, None, {'issues': []}, 10))
+    assert cache.get(URL) is None
+    version = 'https://pagure.io/api/0/version'
+    cache.set(version, CacheEntry(None, None, {'version': '5'}, 10))
+    entry = cache.get(version)
+    assert entry.output == {'version': '5'}
+    assert entry.expires is not None
+
+
+def test_ttl_expiry(path, mocker):
+    """ Test that the expired entries are only kept with validators """
+    clock = mocker.patch('libpagure.diskcache.time.time', return_value=100)
+    cache = DiskCache(path, ttl=10)
+    cache.set(URL, CacheEntry(None, None, 'a', 1))
+    cache.set(URL + '/2', CacheEntry('"b"', None, 'b', 1))
+    assert cache.get(URL).expires == 110
+    clock.return_value = 111
+    assert cache.get(URL) is None
+    entry = cache.get(URL + '/2')
+    assert entry.expires == 110 and entry.output == 'b'
+    # stored again with the same validators: renewed
+    cache.set(URL + '/2', entry)
+    assert cache.get(URL + '/2').expires == 121
+
+
+def test_ttl_of(path):
+    """ Test the matching of the times to live on the URLs """
+    cache = DiskCache(path, ttl=5, ttls={r'/issues$': 30})
+    assert cache.ttl_of('https://pagure.io/api/0/version') == 3600
+    assert cache.ttl_of('https://pagure.io/api/0/foo/git/tags') == 60
+    assert cache.ttl_of(URL + '?page=2#a1b2') == 30
+    assert cache.ttl_of('https://pagure.io/api/0/foo/issue/1') == 5
+
+
+def test_eviction(path):
+    """ Test that the least recently used entries are evicted first """
+    cache = DiskCache(path, max_entries=2)
+    cache.set('a', CacheEntry('1', None, 'a', 10))
+    cache.set('b', CacheEntry('2', None, 'b', 10))
+    cache.get('a')
+    cache.set('c', CacheEntry('3', None, 'c', 10))
+    assert cache.get('b') is None
+    assert cache.get('a').output == 'a'
+    assert len(cache) == 2
+
+    rng = random.Random(0)
+    cache = DiskCache(path, max_bytes=cache.size + 200)
+    cache.set('d', CacheEntry('4', None, [rng.random()
+                                          for _ in range(100)], 2000))
+    assert cache.get('d') is None
+    cache.get('c')
+    cache.set('e', CacheEntry('5', None, [rng.random()
+                                          for _ in range(20)], 200))
+    assert cache.size <= cache.max_bytes
+    assert cache.get('a') is None
+    assert cache.get('c').output == 'c'
+
+
+def test_corrupted_entry(path):
+    """ Test that an entry which can not be read is dropped """
+    cache = DiskCache(path)
+    cache.set(URL, CacheEntry('"abc"', None, [1], 3))
+    connection = sqlite3.connect(path)
+    connection.execute("UPDATE entries SET data = x'00'")
+    connection.commit()
+    connection.close()
+    assert cache.get(URL) is None
+    assert len(cache) == 0
+
+
+def _write(args):
+    path, worker = args
+    cache = DiskCache(path, max_entries=50)
+    for number in range(40):
+        key = '{}/{}'.format(URL, number)
+        cache.set(key, CacheEntry(str(worker), None, [worker, number], 10))
+        entry = cache.get(key)
+        assert entry is None or entry.output[1] == number
+    return worker
+
+
+def test_processes(path):
+    """ Test several processes writing to the same cache at once """
+    DiskCache(path).clear()
+    pool = multiprocessing.Pool(4)
+    try:
+        assert sorted(pool.map(_write, [(path, i) for i in range(8)])) == \
+            list(range(8))
+    finally:
+        pool.close()
+        pool.join()
+    cache = DiskCache(path)
+    assert len(cache) == 40
+    assert cache.get(URL + '/3').output[1] == 3
+
+
+def test_pagure_across_processes(path):
+    """ Test that a new client, as in a new process, does not download
+    the answers again
+    """
+    with FakePagure() as server:
+        for _ in range(2):
+            metrics = MetricsCollector()
+            pg = Pagure(pagure_repository='testrepo',
+                        instance_url=server.url, hooks=[metrics],
+                        cache=DiskCache(path))
+            assert pg.api_version() == '5'
+            assert pg.project_branches() == ['main', 'stable']
+            assert pg.issue_info(1)['id'] == 1
+        snapshot = metrics.snapshot()
+    # used without asking the server
+    assert server.hits['version'] == 1
+    assert server.hits['branches'] == 1
+    assert 'GET version' not in snapshot
+    # revalidated
+    assert server.hits['issue'] == 2
+    assert snapshot['GET {repo}/issue/{id}']['statuses'] == {304: 1}
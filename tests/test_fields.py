@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+from libpagure import Pagure, Projection, ResponseCache
+
+ISSUE = {
+    'id': 1,
+    'title': 'Crash',
+    'status': 'Open',
+    'last_updated': '1500000000',
+    'content': 'a long description',
+    'user': {'name': 'ann', 'fullname': 'Ann', 'url_path': 'user/ann'},
+    'assignee': None,
+    'comments': [
+        {'id': 10, 'comment': 'me too', 'user': {'name': 'bob'}},
+        {'id': 11, 'comment': 'fixed', 'user': {'name': 'ann'}},
+    ],
+    'custom_fields': [{'name': 'severity', 'value': 'high'}],
+}
+
+
+def test_projection():
+    """ Test the nested keys, the lists and the missing keys """
+    project = Projection(['id', 'user.name', 'assignee.name',
+                          'comments.comment', 'missing', 'title.upper'])
+    assert project(ISSUE) == {
+        'id': 1,
+        'title': 'Crash',
+        'user': {'name': 'ann'},
+        'assignee': None,
+        'comments': [{'comment': 'me too'}, {'comment': 'fixed'}],
+    }
+    assert ISSUE['user']['fullname'] == 'Ann'
+
+
+def test_projection_whole_value():
+    """ Test that a key kept whole wins over its nested keys """
+    expected = {'user': ISSUE['user']}
+    assert Projection(['user.name', 'user'])(ISSUE) == expected
+    assert Projection(['user', 'user.name'])(ISSUE) == expected
+
+
+def test_projection_string():
+    """ Test that a single string is refused rather than split in chars """
+    with pytest.raises(TypeError):
+        Projection('id')
+
+
+def test_list_issues_fields(mocker):
+    """ Test that each issue is projected and the cache left untouched """
+    pg = Pagure(pagure_repository='testrepo', cache=ResponseCache())
+    mocker.patch.object(pg, 'session')
+    response = pg.session.request.return_value
+    response.status_code = 200
+    response.headers = {'ETag': '"v1"'}
+    response.content = json.dumps({'issues': [ISSUE, ISSUE]}).encode('utf-8')
+
+    issues = pg.list_issues(fields=['id', 'status'])
+    assert issues == [{'id': 1, 'status': 'Open'}] * 2
+    response.status_code = 304
+    assert pg.list_issues() == [ISSUE, ISSUE]
+
+
+def test_iter_issues_fields(mocker):
+    """ Test that the pages are projected """
+    pg = Pagure(pagure_repository='testrepo')
+    mocker.patch.object(pg, '_call_api', return_value={
+        'issues': [ISSUE], 'pagination': {'page': 1, 'pages': 1}})
+    assert list(pg.iter_issues(fields=['id', 'comments.user.name'])) == [
+        {'id': 1, 'comments': [{'user': {'name': 'bob'}},
+                               {'user': {'name': 'ann'}}]}]
+
+
+def test_stream_requests_fields(mocker):
+    """ Test that the streamed elements are projected as parsed """
+    pg = Pagure(pagure_repository='testrepo')
+    mocker.patch.object(pg, 'session')
+    response = pg.session.request.return_value
+    response.status_code = 200
+    response.iter_content.return_value = iter(
+        [json.dumps({'requests': [ISSUE]}).encode('utf-8')])
+    assert list(pg.stream_requests(fields=['title'])) == [{'title': 'Crash'}]
+
+
+def test_info_fields(mocker):
+    """ Test the projection of the info methods """
+    pg = Pagure(pagure_repository='testrepo')
+    mocker.patch.object(pg, '_call_api', return_value=ISSUE)
+    assert pg.issue_info(1, fields=['id']) == {'id': 1}
+    assert pg.request_info(1, fields=['status']) == {'status': 'Open'}
+    issues = pg.issues_info_many([1, 2], fields=['id', 'user.name'])
+    assert issues == {1: {'id': 1, 'user': {'name': 'ann'}},
+                      2: {'id': 1, 'user': {'name': 'ann'}}}
@@ -0,0 +1,189 @@
+import pytest
+import requests
+
+from conftest import FakeResponse
+from libpagure import APIError, Hook, MetricsCollector, Pagure, RetryPolicy
+from libpagure.hooks import Call, endpoint_name
+
+
+class Recorder(Hook):
+
+    def __init__(self):
+        super(Recorder, self).__init__()
+        self.events = []
+
+    def before_request(self, call):
+        self.events.append(('before', call.method, call.endpoint))
+
+    def after_response(self, call, response):
+        self.events.append(('after', call.status, call.size, call.attempts))
+
+    def on_error(self, call, error):
+        self.events.append(('error', type(error).__name__, call.status))
+
+
+@pytest.mark.parametrize('kwargs, url, endpoint', [
+    ({'pagure_repository': 'foo'}, 'issue/12/comment/3',
+     '{repo}/issue/{id}/comment/{id}'),
+    ({'pagure_repository': 'foo', 'namespace': 'rpms',
+      'fork_username': 'ann'}, 'pull-request/4/flag',
+     '{repo}/pull-request/{id}/flag'),
+    ({}, '/api/0/user/ann/activity/2020-01-31',
+     'user/{username}/activity/{date}'),
+    ({}, '/api/0/user/ann/activity/stats', 'user/{username}/activity/stats'),
+    ({'pagure_repository': 'foo'}, '/api/0/projects', 'projects'),
+    ({}, 'https://example.com/x', 'https://example.com/x'),
+])
+def test_endpoint_name(kwargs, url, endpoint):
+    """ Test that the variable parts of the URLs are replaced """
+    pg = Pagure(**kwargs)
+    if url.startswith('/'):
+        url = pg.instance + url
+    elif not url.startswith('https:'):
+        url = pg.create_basic_url() + url
+    assert endpoint_name(pg, url) == endpoint
+
+
+def test_hooks_success(make_pg):
+    """ Test the hooks of a successful call """
+    recorder = Recorder()
+    pg = make_pg([FakeResponse(output={'issues': []})], hooks=[recorder])
+    assert pg.list_issues() == []
+    assert recorder.events == [('before', 'GET', '{repo}/issues'),
+                               ('after', 200, 14, 1)]
+
+
+def test_hooks_api_error(make_pg):
+    """ Test that an error returned by pagure goes through both hooks """
+    recorder = Recorder()
+    pg = make_pg([FakeResponse(404, {'error': 'Not found',
+                                     'error_code': 'ENOISSUE'})],
+                 hooks=[recorder])
+    with pytest.raises(APIError):
+        pg.issue_info(1)
+    assert recorder.events[1:] == [('after', 404, 48, 1),
+                                   ('error', 'APIError', 404)]
+
+
+def test_hooks_network_error(mocker, make_pg):
+    """ Test that a call without response only goes through on_error """
+    recorder = Recorder()
+    pg = make_pg([requests.ConnectionError('reset')] * 2, hooks=[recorder],
+                 retry=RetryPolicy(max_attempts=2, jitter=False))
+    mocker.patch('time.sleep')
+    with pytest.raises(requests.ConnectionError):
+        pg.project_branches()
+    assert recorder.events == [('before', 'GET', '{repo}/git/branches'),
+                               ('error', 'ConnectionError', None)]
+
+
+def test_hooks_retries(mocker, make_pg):
+    """ Test that the hooks see the final response of the retries """
+    recorder = Recorder()
+    pg = make_pg([FakeResponse(503), FakeResponse(output={})],
+                 hooks=[recorder], retry=RetryPolicy(jitter=False))
+    mocker.patch('time.sleep')
+    pg.error_codes()
+    assert recorder.events[1:] == [('after', 200, 2, 2)]
+
+
+def test_broken_hook(make_pg):
+    """ Test that a failing hook does not fail the call """
+    def broken(call, response):
+        raise ValueError('oops')
+
+    recorder = Recorder()
+    pg = make_pg([FakeResponse(output={'tags': ['a']})],
+                 hooks=[Hook(after_response=broken), recorder])
+    assert pg.project_tags() == ['a']
+    assert recorder.events[-1] == ('after', 200, 15, 1)
+
+
+def test_hooks_stream(make_pg):
+    """ Test the hooks of a streamed call """
+    recorder = Recorder()
+    pg = make_pg([FakeResponse(output={'projects': [1]},
+                               headers={'Content-Length': '17'})],
+                 hooks=[recorder])
+    assert list(pg.stream_projects()) == [1]
+    assert recorder.events == [('before', 'GET', 'projects'),
+                               ('after', 200, 17, 1)]
+
+
+def _call(elapsed, status=200, size=10, endpoint='{repo}/issues'):
+    call = Call('GET', 'url', endpoint=endpoint)
+    call.elapsed = elapsed
+    call.status = status
+    call.size = size
+    return call
+
+
+def test_metrics_quantiles():
+    """ Test the interpolation of the percentiles within the buckets """
+    metrics = MetricsCollector(buckets=(0.1, 0.2, 0.4))
+    for _ in range(50):
+        metrics.after_response(_call(0.05), None)
+    for _ in range(50):
+        metrics.after_response(_call(0.15), None)
+    snapshot = metrics.snapshot()['GET {repo}/issues']
+    assert snapshot['count'] == 100
+    assert snapshot['bytes'] == 1000
+    assert snapshot['statuses'] == {200: 100}
+    assert snapshot['p50'] == pytest.approx(0.1)
+    assert snapshot['p95'] == pytest.approx(0.19)
+    assert snapshot['p99'] == pytest.approx(0.198)
+
+    metrics.after_response(_call(3), None)
+    metrics.reset()
+    assert metrics.snapshot() == {}
+    assert metrics.quantile(0.5, [0, 0, 0, 0]) is None
+
+
+def test_metrics_over_calls(make_pg):
+    """ Test the metrics collected from real calls """
+    metrics = MetricsCollector()
+    pg = make_pg([FakeResponse(output={'issues': []}),
+                  FakeResponse(404, {'error': 'Not found',
+                                     'error_code': 'ENOISSUE'}),
+                  requests.ConnectionError('reset')], hooks=[metrics])
+    pg.list_issues()
+    with pytest.raises(APIError):
+        pg.issue_info(1)
+    with pytest.raises(requests.ConnectionError):
+        pg.issue_info(2)
+
+    snapshot = metrics.snapshot()
+    assert snapshot['GET {repo}/issues']['count'] == 1
+    info = snapshot['GET {repo}/issue/{id}']
+    assert info['count'] == 2
+    assert info['statuses'] == {404: 1}
+    assert info['errors'] == {'APIError': 1, 'ConnectionError': 1}
+    assert info['p99'] is not None
+
+
+def test_metrics_prometheus():
+    """ Test the Prometheus text format """
+    metrics = MetricsCollector(buckets=(0.1, 1))
+    metrics.after_response(_call(0.05), None)
+    metrics.after_response(_call(0.5, status=404, endpoint='a"b'), None)
+    error_call = _call(0.5, status=None, size=None)
+    metrics.on_error(error_call, ValueError())
+    text = metrics.to_prometheus()
+    lines = text.splitlines()
+    assert '# TYPE libpagure_requests_total counter' in lines
+    assert '# TYPE libpagure_request_duration_seconds histogram' in lines
+    assert 'libpagure_requests_total{endpoint="{repo}/issues",method="GET",' \
+        'status="200"} 1' in lines
+    assert 'libpagure_requests_total{endpoint="a\\"b",method="GET",' \
+        'status="404"} 1' in lines
+    assert 'libpagure_errors_total{endpoint="{repo}/issues",' \
+        'error="ValueError",method="GET"} 1' in lines
+    assert 'libpagure_response_bytes_total{endpoint="{repo}/issues",' \
+        'method="GET"} 10' in lines
+    assert 'libpagure_request_duration_seconds_bucket{endpoint=' \
+        '"{repo}/issues",le="0.1",method="GET"} 1' in lines
+    assert 'libpagure_request_duration_seconds_bucket{endpoint=' \
+        '"{repo}/issues",le="+Inf",method="GET"} 2' in lines
+    assert 'libpagure_request_duration_seconds_count{endpoint=' \
+        '"{repo}/issues",method="GET"} 2' in lines
+    assert text.endswith('\n')
@@ -0,0 +1,185 @@
+import gc
+import gzip
+import json
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from benchmarks.server import FakePagure
+from libpagure import (
+    APIError, LiteTransport, Pagure, ResponseCache, RetryPolicy)
+from libpagure.exceptions import ConnectError, ConnectionFailed
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+except ImportError:  # Python 2
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _answer(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.dumps({
+            'method': self.command,
+            'path': self.path,
+            'body': self.rfile.read(length).decode('utf-8'),
+            'authorization': self.headers.get('Authorization'),
+            'port': self.client_address[1],
+        }).encode('utf-8')
+        if self.path.startswith('/redirect'):
+            self.send_response(302)
+            self.send_header('Location', '/echo')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        encoding = None
+        if self.path.startswith('/gzip'):
+            body, encoding = gzip.compress(body), 'gzip'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.end_headers()
+        self.wfile.write(body)
+        if self.path.startswith('/drop'):
+            # an idle connection closed by the server
+            self.close_connection = True
+
+    do_GET = do_POST = _answer
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def echo():
+    server = HTTPServer(('127.0.0.1', 0), EchoHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield 'http://127.0.0.1:{}'.format(server.server_address[1])
+    server.shutdown()
+    server.server_close()
+
+
+def test_request(echo):
+    """ Test the encoding of the params, forms and headers """
+    transport = LiteTransport()
+    response = transport.request(
+        'POST', echo + '/echo?a=1', params={'b': 'x y', 'c': None,
+                                            'd': ['1', '2']},
+        data={'title': 'été', 'tags': None},
+        headers={'Authorization': 'token abc'})
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/json'
+    output = response.json()
+    assert output['path'] == '/echo?a=1&b=x+y&d=1&d=2'
+    assert output['body'] == 'title=%C3%A9t%C3%A9'
+    assert output['authorization'] == 'token abc'
+
+
+def test_keep_alive(echo):
+    """ Test that the connection is reused, and reopened once the server
+    closed it
+    """
+    transport = LiteTransport()
+    ports = [transport.request('GET', echo + path).json()['port']
+             for path in ('/echo', '/echo', '/drop', '/echo')]
+    assert ports[0] == ports[1] == ports[2] != ports[3]
+    transport.close()
+    assert len(transport._connections) == 0
+
+
+def test_thread_connections_released(echo):
+    """ Test that the connections of a thread are closed once the thread
+    ends
+    """
+    transport = LiteTransport()
+    connections = []
+
+    def worker():
+        transport.request('GET', echo + '/echo')
+        connections.extend(transport._local.connections.values())
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    gc.collect()
+    try:
+        assert len(connections) == 1
+        assert connections[0].sock is None
+        assert len(transport._connections) == 0
+    finally:
+        # the server answers one connection at a time
+        transport.close()
+
+
+def test_gzip(echo):
+    """ Test that the compressed answers are decompressed """
+    transport = LiteTransport()
+    assert transport.request('GET', echo + '/gzip').json()['path'] == '/gzip'
+    response = transport.request('GET', echo + '/gzip', stream=True)
+    content = b''.join(response.iter_content(chunk_size=7))
+    assert json.loads(content.decode('utf-8'))['path'] == '/gzip'
+
+
+def test_redirect(echo):
+    """ Test that the redirects are followed, the POST becoming a GET """
+    response = LiteTransport().request('POST', echo + '/redirect',
+                                       data={'a': 1})
+    assert response.json()['method'] == 'GET'
+    assert response.json()['path'] == '/echo'
+
+
+def test_connection_refused():
+    """ Test that a failed connection is retried by the retry policy """
+    pg = Pagure(instance_url='http://127.0.0.1:1', transport=LiteTransport(),
+                retry=RetryPolicy(max_attempts=2, backoff_factor=0))
+    with pytest.raises(ConnectionFailed):
+        pg.api_version()
+    assert pg.last_attempts == 2
+    # nothing was sent, so a POST is retried too
+    repo = pg.for_repo('foo')
+    with pytest.raises(ConnectError):
+        repo.comment_issue(1, 'hello')
+    assert repo.last_attempts == 2
+
+
+def test_pagure():
+    """ Test the client over the lite transport against the fake server """
+    with FakePagure(total=150) as server:
+        pg = Pagure(pagure_repository='testrepo', pagure_token='a token',
+                    instance_url=server.url, transport=LiteTransport(),
+                    cache=ResponseCache())
+        assert pg.api_version() == '5'
+        assert len(list(pg.iter_issues(per_page=100))) == 150
+        assert [issue['id'] for issue in pg.stream_issues()][-1] == 20
+        assert pg.issue_info(3) == pg.issue_info(3)
+        assert pg.cache.hits == 1
+        pg.comment_issue(3, 'a comment')
+        with pytest.raises(APIError):
+            pg.issue_info(151)
+    assert server.hits['message'] == 1
+
+
+def test_no_requests_import():
+    """ Test that requests is not imported without a need for it """
+    code = ("import sys, libpagure\n"
+            "pg = libpagure.Pagure(transport=libpagure.LiteTransport(),\n"
+            "                      retry=libpagure.RetryPolicy())\n"
+            "print('requests' in sys.modules, 'aiohttp' in sys.modules)\n")
+    output = subprocess.check_output([sys.executable, '-c', code])
+    assert output.split() == [b'False', b'False']
+
+
+def test_lazy_exports():
+    """ Test that the names of the former star import are still exported """
+    code = ("from libpagure import *\n"
+            "print(LOG.name, NullHandler.__name__, Pagure.__name__)\n")
+    output = subprocess.check_output([sys.executable, '-c', code])
+    assert output.split() == [b'libpagure', b'NullHandler', b'Pagure']
@@ -0,0 +1,89 @@
+import pytest
+
+from libpagure import Pagure
+from libpagure.mirror import ISSUE, REQUEST, Mirror, repo_name
+
+
+def issue(issue_id, title, status='Open', tags=(), assignee=None,
+          milestone=None, priority=None, comments=(), updated=0):
+    return {
+        'id': issue_id, 'title': title, 'content': 'content of ' + title,
+        'status': status, 'tags': list(tags), 'user': {'name': 'author'},
+        'assignee': {'name': assignee} if assignee else None,
+        'milestone': milestone, 'priority': priority,
+        'date_created': '1', 'last_updated': str(updated),
+        'comments': [{'id': i, 'comment': c} for i, c in enumerate(comments)],
+    }
+
+
+@pytest.fixture(params=[True, False], ids=['fts', 'like'])
+def mirror(request):
+    mirror = Mirror()
+    mirror.has_fts = mirror.has_fts and request.param
+    mirror.store('foo', ISSUE, [
+        issue(1, 'Crash on start', tags=['bug', 'easyfix'], assignee='me',
+              comments=['segfault in main'], updated=10),
+        issue(2, 'Add a logo', tags=['design'], milestone='1.0',
+              priority=1, updated=20),
+        issue(3, 'Crash on exit', status='Closed', tags=['bug'], updated=30),
+    ])
+    mirror.store('rpms/bar', REQUEST, [
+        {'id': 7, 'title': 'Fix the crash', 'status': 'Open',
+         'user': {'name': 'dev'}, 'initial_comment': 'see #1',
+         'last_updated': '5'},
+    ])
+    yield mirror
+    mirror.close()
+
+
+def test_repo_name():
+    """ Test the name of the repositories in the mirror """
+    pg = Pagure(pagure_repository='bar', namespace='rpms',
+                fork_username='me', instance_url='https://src.example.org')
+    assert repo_name(pg) == 'fork/me/rpms/bar'
+
+
+def test_filters(mirror):
+    """ Test the indexed filters """
+    ids = lambda items: [item['id'] for item in items]  # noqa: E731
+    assert ids(mirror.issues()) == [3, 2, 1]
+    assert ids(mirror.issues(repo='foo', status='Open')) == [2, 1]
+    assert ids(mirror.issues(tag='bug')) == [3, 1]
+    assert ids(mirror.issues(tag='bug', status='Closed')) == [3]
+    assert ids(mirror.issues(assignee='me')) == [1]
+    assert ids(mirror.issues(milestone='1.0', priority=1)) == [2]
+    assert ids(mirror.issues(author='author', limit=1)) == [3]
+    assert ids(mirror.requests(author='dev')) == [7]
+    assert mirror.issues(repo='rpms/bar') == []
+
+
+def test_full_text(mirror):
+    """ Test the full text search over titles, content and comments """
+    assert [i['id'] for i in mirror.search('segfault')] == [1]
+    assert sorted(i['id'] for i in mirror.search('crash')) == [1, 3]
+    assert [i['id'] for i in mirror.search('crash', kind=REQUEST)] == [7]
+    assert [i['id'] for i in mirror.issues(text='crash',
+                                           status='Open')] == [1]
+
+
+def test_store_replaces(mirror):
+    """ Test that storing an item again updates it and its indexes """
+    mirror.store('foo', ISSUE, [issue(1, 'Hang on start', status='Closed',
+                                      tags=['hang'], updated=40)])
+    assert mirror.issues(tag='easyfix') == []
+    assert [i['id'] for i in mirror.issues(tag='hang')] == [1]
+    assert mirror.search('segfault') == []
+    assert [i['id'] for i in mirror.search('hang')] == [1]
+
+
+def test_populate(mocker, tmpdir):
+    """ Test filling the mirror from the API """
+    pg = Pagure(pagure_repository='foo')
+    mocker.patch.object(pg, 'iter_issues',
+                        return_value=iter([issue(1, 'a'), issue(2, 'b')]))
+    mocker.patch.object(pg, 'iter_requests', return_value=iter([]))
+    mirror = Mirror(str(tmpdir.join('mirror.sqlite')))
+    assert mirror.populate(pg) == 2
+    pg.iter_issues.assert_called_once_with(status='all', per_page=100)
+    mirror.close()
+    assert len(Mirror(str(tmpdir.join('mirror.sqlite'))).issues()) == 2
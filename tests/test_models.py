@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+import copy
+import json
+
+import pytest
+
+from libpagure import Issue, Pagure, PullRequest, User
+from libpagure.mirror import ISSUE, Mirror
+from libpagure.sync import IssueSync
+
+ISSUE_DATA = {
+    'id': 1,
+    'title': 'Crash',
+    'status': 'Open',
+    'last_updated': '1500000000',
+    'user': {'name': 'ann', 'fullname': 'Ann'},
+    'assignee': None,
+    'comments': [
+        {'id': 10, 'comment': 'me too', 'user': {'name': 'bob'}},
+    ],
+    'a_new_key': [1, 2],
+}
+
+
+def test_issue_model():
+    """ Test the fields, the nested models and the unknown keys """
+    issue = Issue.from_dict(copy.deepcopy(ISSUE_DATA))
+    assert not hasattr(issue, '__dict__')
+    assert issue.title == 'Crash'
+    assert issue.closed_at is None
+    assert issue.a_new_key == [1, 2]
+    assert issue.assignee is None
+    assert isinstance(issue.user, User)
+    assert issue.user.name == 'ann'
+    assert issue.comments[0].user.name == 'bob'
+    assert issue['status'] == 'Open'
+    assert issue.get('closed_at', 'missing') == 'missing'
+    with pytest.raises(KeyError):
+        issue['closed_at']
+    with pytest.raises(AttributeError):
+        issue.unknown
+    assert issue.to_dict() == ISSUE_DATA
+
+
+def test_nested_parsed_once():
+    """ Test that nested values are parsed on their first access only """
+    issue = Issue.from_dict(copy.deepcopy(ISSUE_DATA))
+    assert isinstance(issue._comments, list)
+    comments = issue.comments
+    assert isinstance(comments, tuple)
+    assert issue.comments is comments
+    assert issue.comments[0].user is comments[0].user
+
+
+def test_pull_request_model():
+    """ Test a pull request and its projects """
+    data = {'id': 2, 'project': {'name': 'foo', 'parent': None,
+                                 'user': {'name': 'ann'}},
+            'repo_from': {'name': 'foo', 'parent': {'name': 'bar'}}}
+    request = PullRequest.from_dict(copy.deepcopy(data))
+    assert request.project.user.name == 'ann'
+    assert request.repo_from.parent.name == 'bar'
+    assert request.to_dict() == data
+    assert request == PullRequest.from_dict(data)
+    assert repr(request) == 'PullRequest(id=2)'
+
+
+def test_client_models(mocker):
+    """ Test that a client created with models returns them """
+    pg = Pagure(pagure_repository='testrepo', models=True)
+    mocker.patch.object(pg, '_call_api', return_value={
+        'issues': [ISSUE_DATA], 'pagination': {'page': 1, 'pages': 1}})
+    issues = pg.list_issues()
+    assert isinstance(issues[0], Issue)
+    assert [issue.id for issue in pg.iter_issues()] == [1]
+    assert pg.list_issues(fields=['id', 'user.name'])[0].to_dict() == \
+        {'id': 1, 'user': {'name': 'ann'}}
+
+    pg._call_api.return_value = ISSUE_DATA
+    assert isinstance(pg.issue_info(1), Issue)
+    assert isinstance(pg.for_repo('other').request_info(1), PullRequest)
+
+
+def test_stream_models(mocker):
+    """ Test that streamed elements are turned into models """
+    pg = Pagure(pagure_repository='testrepo', models=True)
+    mocker.patch.object(pg, 'session')
+    response = pg.session.request.return_value
+    response.status_code = 200
+    response.iter_content.return_value = iter(
+        [json.dumps({'issues': [ISSUE_DATA]}).encode('utf-8')])
+    issues = list(pg.stream_issues())
+    assert issues == [Issue.from_dict(ISSUE_DATA)]
+
+
+def test_models_mirror_and_sync(mocker):
+    """ Test that the mirror and the sync store dicts """
+    pg = Pagure(pagure_repository='testrepo', models=True)
+    mocker.patch.object(pg, '_call_api', return_value={
+        'issues': [ISSUE_DATA], 'pagination': {'page': 1, 'pages': 1}})
+    mirror = Mirror()
+    assert mirror.populate(pg, requests=False) == 1
+    assert mirror.issues() == [ISSUE_DATA]
+    assert mirror.search('Crash', kind=ISSUE) == [ISSUE_DATA]
+    delta = IssueSync(pg).sync()
+    assert delta.created == [ISSUE_DATA]
@@ -0,0 +1,74 @@
+import threading
+
+from libpagure import FileTokenBucket, Pagure, RateLimiter, TokenBucket
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, delay):
+        self.now += delay
+
+
+def test_token_bucket():
+    """ Test that tokens are refilled at the given rate """
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock, sleep=clock.sleep)
+    assert [bucket.try_acquire() for _ in range(4)] == \
+        [True, True, True, False]
+    assert bucket.acquire() == 0.5
+    clock.now += 10
+    assert bucket.acquire(3) == 0
+    assert not bucket.try_acquire()
+
+
+def test_token_bucket_threads():
+    """ Test that a bucket never hands out more tokens than it has """
+    bucket = TokenBucket(rate=0.001, capacity=50)
+    taken = []
+
+    def worker():
+        for _ in range(20):
+            taken.append(bucket.try_acquire())
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert taken.count(True) == 50
+
+
+def test_file_token_bucket(tmpdir, mocker):
+    """ Test that buckets using the same file share their tokens """
+    path = str(tmpdir.join('bucket'))
+    mocker.patch('time.time', return_value=1000.0)
+    first = FileTokenBucket(path, rate=1, capacity=2)
+    second = FileTokenBucket(path, rate=1, capacity=2)
+    assert first.try_acquire()
+    assert second.try_acquire()
+    assert not first.try_acquire()
+    with open(path) as state:
+        assert state.read() == '0.0 1000.0'
+
+
+def test_rate_limiter(mocker):
+    """ Test that reads and writes use their own bucket """
+    read = mocker.Mock()
+    write = mocker.Mock()
+    limiter = RateLimiter(read=read, write=write)
+    pg = Pagure(pagure_repository='testrepo', rate_limiter=limiter)
+    mocker.patch.object(pg, 'session')
+    pg.session.request.return_value.status_code = 200
+    pg.session.request.return_value.content = b'{"issues": []}'
+    pg.list_issues()
+    pg.comment_issue(1, 'hello')
+    pg.close_request(1)
+    assert read.acquire.call_count == 1
+    assert write.acquire.call_count == 2
+    assert RateLimiter(write=write).acquire('GET') == 0
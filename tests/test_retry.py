@@ -0,0 +1,100 @@
+import pytest
+import requests
+from requests.packages.urllib3.exceptions import (
+    MaxRetryError, NewConnectionError)
+
+from conftest import FakeResponse
+from libpagure import RetryPolicy
+from libpagure.retry import parse_retry_after
+
+
+@pytest.fixture
+def sleep(mocker):
+    return mocker.patch('time.sleep')
+
+
+@pytest.fixture
+def retrying_pg(make_pg):
+    def make(responses, **kwargs):
+        return make_pg(responses, retry=RetryPolicy(jitter=False, **kwargs))
+    return make
+
+
+def test_parse_retry_after():
+    """ Test the parsing of both forms of Retry-After """
+    assert parse_retry_after('120') == 120
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:10 GMT',
+                             now=1445412480) == 10
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after(None) is None
+
+
+def test_backoff():
+    """ Test the exponential backoff and its cap """
+    policy = RetryPolicy(backoff_factor=1, max_backoff=5, jitter=False)
+    assert [policy.backoff(attempt) for attempt in range(1, 5)] == \
+        [1, 2, 4, 5]
+    policy = RetryPolicy(backoff_factor=1, max_backoff=5)
+    assert 0 <= policy.backoff(3) <= 4
+
+
+def test_retry_get(retrying_pg, sleep):
+    """ Test that a transient failure of a GET is retried """
+    pg = retrying_pg([FakeResponse(503),
+                      requests.ConnectionError('reset'),
+                      FakeResponse(output={'branches': ['main']})],
+                     backoff_factor=1)
+    assert pg.project_branches() == ['main']
+    assert pg.last_attempts == 3
+    assert [c[0][0] for c in sleep.call_args_list] == [1, 2]
+
+
+def test_retry_after(retrying_pg, sleep):
+    """ Test that the Retry-After header is honored """
+    pg = retrying_pg([FakeResponse(429, headers={'Retry-After': '7'}),
+                      FakeResponse(output={'message': 'ok'})])
+    pg.comment_issue(1, 'hello')
+    sleep.assert_called_once_with(7.0)
+    assert pg.last_attempts == 2
+
+
+def test_no_retry_post(retrying_pg, sleep):
+    """ Test that a non idempotent request is not retried on a 503 """
+    pg = retrying_pg([FakeResponse(503, {'error': 'down',
+                                         'error_code': 'EDOWN'})])
+    with pytest.raises(Exception):
+        pg.comment_issue(1, 'hello')
+    assert pg.last_attempts == 1
+    assert not sleep.called
+    pg.session.request.side_effect = [requests.ConnectionError('reset')]
+    with pytest.raises(requests.ConnectionError):
+        pg.comment_issue(1, 'hello')
+
+
+def test_retry_post_connect_failed(retrying_pg, sleep):
+    """ Test that a request is retried whatever the method when the
+    connection could not be opened
+    """
+    refused = requests.ConnectionError(MaxRetryError(
+        None, '/', NewConnectionError(None, 'Connection refused')))
+    pg = retrying_pg([refused, requests.ConnectTimeout('timeout'),
+                      FakeResponse(output={'message': 'ok'})])
+    pg.comment_issue(1, 'hello')
+    assert pg.last_attempts == 3
+
+
+def test_retry_budget(retrying_pg, sleep):
+    """ Test that retrying stops at the maximum attempts or total delay """
+    pg = retrying_pg([FakeResponse(502)] * 5, max_attempts=3)
+    with pytest.raises(Exception):
+        pg.project_branches()
+    assert pg.last_attempts == 3
+
+    sleep.reset_mock()
+    pg = retrying_pg([FakeResponse(502, headers={'Retry-After': '50'}),
+                      FakeResponse(502, headers={'Retry-After': '50'})],
+                     max_total_delay=60)
+    with pytest.raises(Exception):
+        pg.project_branches()
+    assert pg.last_attempts == 2
+    sleep.assert_called_once_with(50.0)
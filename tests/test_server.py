@@ -0,0 +1,96 @@
+import pytest
+
+from benchmarks import bench_client
+from benchmarks.server import FakePagure
+from libpagure import APIError, MetricsCollector, Pagure, ResponseCache
+
+
+@pytest.fixture
+def server():
+    with FakePagure(total=250, comments=2) as server:
+        yield server
+
+
+@pytest.fixture
+def pg(server):
+    return Pagure(pagure_token='a token', pagure_repository='testrepo',
+                  instance_url=server.url)
+
+
+def test_issue_info(pg):
+    """ Test a call through the whole client and the server """
+    issue = pg.issue_info(7)
+    assert issue['id'] == 7
+    assert len(issue['comments']) == 2
+
+
+def test_repository_urls(pg, server):
+    """ Test the URLs of the namespaced and forked repositories """
+    assert pg.for_repo('other', namespace='rpms').issue_info(1)['id'] == 1
+    assert pg.for_repo('other', fork_username='ann').request_info(2)['id'] \
+        == 2
+    assert server.hits['issue'] == 1
+    assert server.hits['request'] == 1
+
+
+def test_not_found(pg, server):
+    """ Test that the errors of the server raise APIError """
+    with pytest.raises(APIError):
+        pg.issue_info(251)
+    with pytest.raises(APIError):
+        pg.for_repo('testrepo', namespace='a/b').issue_info(1)
+    assert server.hits[None] == 1
+
+
+def test_pagination(pg, server):
+    """ Test that the pages are followed up to the last one """
+    issues = list(pg.iter_issues(per_page=100))
+    assert [issue['id'] for issue in issues] == list(range(1, 251))
+    assert server.hits['issues'] == 3
+    assert [issue['id'] for issue in pg.stream_issues()] == \
+        list(range(1, 21))
+    projects = pg.list_all_projects(per_page=100, max_workers=2)
+    assert len(projects) == 250
+
+
+def test_writes(pg, server):
+    """ Test that the posted forms reach the server """
+    pg.comment_issue(3, 'a comment')
+    assert server.hits['message'] == 1
+    pg.create_issue('title', 'content')
+    assert server.hits['new_issue'] == 1
+
+
+def test_revalidation(server):
+    """ Test that the cached answers are revalidated with their ETag """
+    metrics = MetricsCollector()
+    pg = Pagure(pagure_repository='testrepo', instance_url=server.url,
+                cache=ResponseCache(), hooks=[metrics])
+    first = pg.issue_info(4)
+    assert pg.issue_info(4) == first
+    assert pg.cache.hits == 1
+    statuses = metrics.snapshot()['GET {repo}/issue/{id}']['statuses']
+    assert statuses == {200: 1, 304: 1}
+
+
+def test_latency(server):
+    """ Test that the latency is waited before each answer """
+    server.latency = 0.05
+    pg = Pagure(instance_url=server.url)
+    metrics = MetricsCollector()
+    pg.hooks.hooks.append(metrics)
+    pg.api_version()
+    assert metrics.snapshot()['GET version']['p50'] >= 0.05
+
+
+def test_bench_client(capsys):
+    """ Test a tiny run of the benchmarks and its comparison """
+    results = bench_client.run(calls=3, total=30, only=['issue_info'])
+    names = [item['name'] for item in results]
+    assert 'issue_info' in names
+    for item in results:
+        assert item['calls'] >= 3
+        assert item['p50'] <= item['p99']
+
+    bench_client.report(results, results)
+    assert 'x1.00' in capsys.readouterr().out
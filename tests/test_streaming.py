@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+from libpagure import APIError, Pagure
+from libpagure.streaming import ArrayStream
+
+DOCUMENT = {
+    'args': {'page': 1, 'per_page': 3, 'tags': ['a', 'b]']},
+    'projects': [
+        {'id': 1, 'name': u'café', 'tags': [], 'description': '{"x": ]'},
+        {'id': 22, 'name': 'bar', 'tags': ['easy'], 'priority': 1.5},
+        {'id': 333, 'name': 'baz', 'user': None, 'fork': False},
+    ],
+    'total_projects': 3,
+}
+
+
+def _parse(body, chunk_size, key='projects'):
+    stream = ArrayStream(key)
+    items = []
+    for start in range(0, len(body), chunk_size):
+        items.extend(stream.feed(body[start:start + chunk_size]))
+    items.extend(stream.close())
+    return items
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 7, 64, 100000])
+def test_array_stream_chunks(chunk_size):
+    """ Test that the elements do not depend on how the body is cut """
+    body = json.dumps(DOCUMENT, indent=1).encode('utf-8')
+    assert _parse(body, chunk_size) == DOCUMENT['projects']
+
+
+def test_array_stream_yields_early():
+    """ Test that the elements are handed back as soon as they end """
+    stream = ArrayStream('issues')
+    assert stream.feed(b'{"total": 2, "issues": [{"id": 1}, {"id"') == \
+        [{'id': 1}]
+    assert stream.feed(b': 2}]') == [{'id': 2}]
+    assert stream.done
+    assert stream.feed(b', "ignored": [}') == []
+    assert stream.close() == []
+
+
+def test_array_stream_numbers():
+    """ Test that a number cut between two chunks is not split """
+    stream = ArrayStream('ids')
+    assert stream.feed(b'{"ids": [12') == []
+    assert stream.feed(b'34, 5') == [1234]
+    assert stream.feed(b']}') == [5]
+
+
+def test_array_stream_empty():
+    """ Test an empty array """
+    assert _parse(b'{"projects": []}', 1) == []
+
+
+def test_array_stream_object_hook():
+    """ Test that the hook is applied to each element """
+    stream = ArrayStream('users', object_hook=str.upper)
+    assert stream.feed(b'{"users": ["ann", "bob"]}') == ['ANN', 'BOB']
+
+
+def test_array_stream_errors():
+    """ Test the missing keys and broken documents """
+    with pytest.raises(KeyError):
+        _parse(b'{"issues": [1, 2]}', 3)
+    with pytest.raises(ValueError):
+        _parse(b'{"projects": [1, 2', 3)
+    with pytest.raises(ValueError):
+        _parse(b'{"projects": [1 2]}', 3)
+
+
+def test_stream_projects(mocker):
+    """ Test that the projects are streamed from the body """
+    pg = Pagure()
+    mocker.patch.object(pg, 'session')
+    response = pg.session.request.return_value
+    response.status_code = 200
+    body = json.dumps(DOCUMENT).encode('utf-8')
+    response.iter_content.return_value = iter(
+        [body[start:start + 10] for start in range(0, len(body), 10)])
+
+    projects = pg.stream_projects(tags=['easy'], per_page=3)
+    assert not pg.session.request.called
+    assert list(projects) == DOCUMENT['projects']
+    pg.session.request.assert_called_once_with(
+        method='GET', url='https://pagure.io/api/0/projects',
+        params={'tags': ['easy'], 'per_page': '3'}, headers=None, data=None,
+        verify=True, stream=True)
+    response.close.assert_called_once_with()
+
+
+def test_stream_api_error(mocker):
+    """ Test that the errors are decoded and raised as usual """
+    pg = Pagure(pagure_repository='testrepo')
+    mocker.patch.object(pg, 'session')
+    response = pg.session.request.return_value
+    response.status_code = 404
+    response.content = \
+        b'{"error": "Project not found", "error_code": "ENOPROJECT"}'
+    with pytest.raises(Exception, match='Project not found'):
+        list(pg.stream_issues(status='Open'))
+    response.close.assert_called_once_with()
+
+
+def test_stream_api_unexpected_status(mocker):
+    """ Test that an answer other than 200 without an error is raised """
+    pg = Pagure(pagure_repository='testrepo')
+    mocker.patch.object(pg, 'session')
+    response = pg.session.request.return_value
+    response.status_code = 500
+    response.content = b'{"message": "Internal Server Error"}'
+    with pytest.raises(APIError, match='Unexpected HTTP status 500'):
+        list(pg.stream_issues(status='Open'))
+    response.close.assert_called_once_with()
@@ -0,0 +1,65 @@
+from libpagure import Pagure
+from libpagure.sync import IssueSync
+
+
+def issue(issue_id, last_updated, status='Open'):
+    return {'id': issue_id, 'last_updated': str(last_updated),
+            'status': status, 'title': 'issue {}'.format(issue_id)}
+
+
+def fake_server(mocker, pg, issues):
+    """ Answer the issues endpoint from a list, honoring since """
+    def fake_call_api(url, params):
+        since = params.get('since') or 0
+        matching = [i for i in issues[url]
+                    if int(i['last_updated']) >= since]
+        return {'issues': matching,
+                'pagination': {'page': params['page'], 'pages': 1}}
+    return mocker.patch.object(pg, '_call_api', side_effect=fake_call_api)
+
+
+def test_incremental_sync(mocker):
+    """ Test that only the issues updated since the watermark are fetched """
+    pg = Pagure(pagure_repository='testrepo')
+    url = 'https://pagure.io/api/0/testrepo/issues'
+    issues = {url: [issue(1, 100), issue(2, 200), issue(3, 300)]}
+    call_api = fake_server(mocker, pg, issues)
+    syncer = IssueSync(pg)
+
+    delta = syncer.sync()
+    assert [i['id'] for i in delta.created] == [1, 2, 3]
+    assert syncer.watermark() == 300
+    call_api.assert_called_with(url, params={'status': 'all',
+                                             'per_page': '100', 'page': 1})
+
+    assert not syncer.sync()
+    assert call_api.call_args[1]['params']['since'] == 300
+
+    issues[url] = [issue(1, 400, 'Closed'), issue(2, 200),
+                   issue(3, 450), issue(4, 500)]
+    delta = syncer.sync()
+    assert [i['id'] for i in delta.created] == [4]
+    assert [i['id'] for i in delta.updated] == [3]
+    assert [i['id'] for i in delta.closed] == [1]
+    assert syncer.watermark() == 500
+    assert syncer.issues()['1']['status'] == 'Closed'
+
+
+def test_sync_many_repos_and_save(mocker, tmpdir):
+    """ Test that each repository has its own state, saved to disk """
+    path = str(tmpdir.join('state.json'))
+    pg = Pagure()
+    fake_server(mocker, pg, {
+        'https://pagure.io/api/0/foo/issues': [issue(1, 10)],
+        'https://pagure.io/api/0/rpms/bar/issues': [issue(1, 20),
+                                                    issue(2, 30)],
+    })
+    syncer = IssueSync(pg, path=path)
+    assert len(syncer.sync('foo').created) == 1
+    assert len(syncer.sync('bar', namespace='rpms').created) == 2
+    syncer.save()
+
+    restored = IssueSync(pg, path=path)
+    assert restored.watermark('foo') == 10
+    assert restored.watermark('bar', namespace='rpms') == 30
+    assert not restored.sync('bar', namespace='rpms')
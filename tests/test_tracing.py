@@ -0,0 +1,158 @@
+import ast
+import os
+import threading
+import time
+
+import pytest
+import requests
+
+import libpagure
+from conftest import FakeResponse
+from libpagure import APIError, RetryPolicy
+from libpagure.tracing import (
+    InMemoryExporter, JSONFileExporter, Span, Tracer, critical_path,
+    read_spans)
+
+
+@pytest.fixture
+def traced_pg(make_pg):
+    def make(responses=None, **kwargs):
+        exporter = InMemoryExporter()
+        return make_pg(responses, tracer=Tracer(exporter), **kwargs), exporter
+    return make
+
+
+def tree(spans):
+    """ Return the spans as nested (name, children) tuples. """
+    children = {}
+    for span in sorted(spans, key=lambda span: span.start):
+        children.setdefault(span.parent_id, []).append(span)
+
+    def build(span):
+        return (span.name, [build(child)
+                            for child in children.get(span.span_id, [])])
+    return [build(span) for span in children.get(None, [])]
+
+
+def page(items, number, pages):
+    return FakeResponse(output={'issues': items,
+                                'pagination': {'page': number,
+                                               'pages': pages}})
+
+
+def test_method_pages_and_attempts(mocker, traced_pg):
+    """ Test the spans of a paginated method and of a retried call """
+    pg, exporter = traced_pg([page([1], 1, 2), FakeResponse(503),
+                              page([2], 2, 2)],
+                             retry=RetryPolicy(jitter=False))
+    mocker.patch('time.sleep')
+    assert list(pg.iter_issues()) == [1, 2]
+    assert tree(exporter.spans) == [
+        ('iter_issues', [
+            ('page', [('http', []), ('decode', [])]),
+            ('page', [('http', []), ('retry', []), ('http', []),
+                      ('decode', [])]),
+        ])]
+    http = [span for span in exporter.spans if span.name == 'http']
+    assert [(span.attributes['attempt'], span.attributes['status'])
+            for span in http] == [(1, 200), (1, 503), (2, 200)]
+    pages = [span.attributes for span in exporter.spans
+             if span.name == 'page']
+    assert pages == [{'page': 1, 'items': 1}, {'page': 2, 'items': 1}]
+    assert len(set(span.trace_id for span in exporter.spans)) == 1
+
+
+def test_fan_out_keeps_parent(traced_pg):
+    """ Test that the calls made from the worker threads keep the parent """
+    pg, exporter = traced_pg()
+    pg.session.request.side_effect = lambda **kwargs: FakeResponse(
+        output={'id': 1})
+    with pg.tracer.span('job') as job:
+        results = pg.issues_info_many(range(10), max_workers=4)
+    assert len(results) == 10
+
+    by_id = dict((span.span_id, span) for span in exporter.spans)
+    many = [span for span in exporter.spans
+            if span.name == 'issues_info_many']
+    assert many[0].parent_id == job.span_id
+    infos = [span for span in exporter.spans if span.name == 'issue_info']
+    assert len(infos) == 10
+    assert set(by_id[span.parent_id].name for span in infos) == \
+        {'iter_issues_info'}
+    assert any(span.thread != threading.current_thread().name
+               for span in infos)
+
+
+def test_error_recorded(traced_pg):
+    """ Test that the exception ending a span is recorded """
+    pg, exporter = traced_pg([
+        FakeResponse(404, {'error': 'Not found', 'error_code': 'ENOISSUE'}),
+        requests.ConnectionError('reset')])
+    with pytest.raises(APIError):
+        pg.issue_info(1)
+    with pytest.raises(requests.ConnectionError):
+        pg.issue_info(2)
+    errors = [(span.name, span.error) for span in exporter.spans
+              if span.error]
+    assert errors == [('decode', 'APIError: Not found'),
+                      ('issue_info', 'APIError: Not found'),
+                      ('http', 'ConnectionError: reset'),
+                      ('issue_info', 'ConnectionError: reset')]
+
+
+def test_no_tracer(make_pg):
+    """ Test that the methods work the same without a tracer """
+    pg = make_pg()
+    pg.session.request.return_value = page([1], 1, 1)
+    assert pg.tracer is None
+    assert list(pg.iter_issues()) == [1]
+    assert pg.iter_issues.__name__ == 'iter_issues'
+
+
+def test_json_file_exporter(tmpdir):
+    """ Test that the spans written can be read back """
+    path = str(tmpdir.join('spans.jsonl'))
+    exporter = JSONFileExporter(path)
+    tracer = Tracer(exporter)
+    with tracer.span('job', repo='foo'):
+        with tracer.span('child'):
+            pass
+    exporter.close()
+    spans = read_spans(path)
+    assert [span.name for span in spans] == ['child', 'job']
+    assert spans[1].attributes == {'repo': 'foo'}
+    assert spans[0].parent_id == spans[1].span_id
+
+
+def test_critical_path():
+    """ Test that the path follows the children ending last """
+    tracer = Tracer()
+    with tracer.span('job'):
+        with tracer.span('fast'):
+            pass
+        with tracer.span('slow'):
+            with tracer.span('slow-child'):
+                time.sleep(0.01)
+        with tracer.span('short'):
+            pass
+    spans = tracer.exporter.spans
+    assert [span.name for span in critical_path(spans)] == ['job', 'short']
+
+    slow = [span for span in spans if span.name == 'slow'][0]
+    assert [span.name for span in critical_path(spans, slow)] == \
+        ['slow', 'slow-child']
+    assert critical_path([]) == []
+    assert Span.from_dict(slow.to_dict()).to_dict() == slow.to_dict()
+
+
+def test_no_async_syntax():
+    """ Test that only libpagure.aio needs a Python with async/await """
+    package = os.path.dirname(libpagure.__file__)
+    nodes = (ast.AsyncFunctionDef, ast.AsyncFor, ast.AsyncWith, ast.Await)
+    for name in os.listdir(package):
+        if not name.endswith('.py') or name == 'aio.py':
+            continue
+        with open(os.path.join(package, name)) as stream:
+            tree = ast.parse(stream.read())
+        assert not [node for node in ast.walk(tree)
+                    if isinstance(node, nodes)], name
@@ -0,0 +1,166 @@
+import gc
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from libpagure import Pagure, ResponseCache, Transport
+
+
+def test_transport_pool():
+    """ Test the configuration of the connection pool """
+    transport = Transport(pool_connections=2, pool_maxsize=32,
+                          keep_alive=False)
+    adapter = transport.session.get_adapter('https://pagure.io')
+    assert adapter._pool_connections == 2
+    assert adapter._pool_maxsize == 32
+    assert transport.session.headers['Connection'] == 'close'
+
+
+def test_transport_warm_up(mocker):
+    """ Test that warming up opens a connection and ignores failures """
+    head = mocker.patch('requests.Session.head',
+                        side_effect=[None, requests.ConnectionError()])
+    Transport(warm_up=['https://pagure.io', 'https://src.example.org'])
+    assert head.call_count == 2
+    head.assert_any_call('https://pagure.io', verify=True, timeout=10)
+
+
+def test_transport_warm_up_per_thread(mocker):
+    """ Test that the session of a worker thread is warmed up by the
+    thread itself, the constructor does not warm up any
+    """
+    head = mocker.patch('requests.Session.head')
+    transport = Transport(per_thread_sessions=True,
+                          warm_up=['https://pagure.io'])
+    assert not head.called
+    assert len(transport._thread_sessions) == 0
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        executor.submit(transport.warm_up, ['https://pagure.io']).result()
+    head.assert_called_once_with('https://pagure.io', verify=True,
+                                 timeout=10)
+
+
+def test_shared_transport():
+    """ Test that clients using the same transport share its session """
+    transport = Transport()
+    pg1 = Pagure(pagure_repository='foo', transport=transport)
+    pg2 = Pagure(pagure_repository='bar', transport=transport)
+    assert pg1.session is pg2.session is transport.session
+
+
+def test_for_repo():
+    """ Test that per repository views share everything but the repo """
+    cache = ResponseCache()
+    pg = Pagure(pagure_token='a token', cache=cache)
+    view = pg.for_repo('testrepo', fork_username='auser', namespace='ns')
+    assert view.create_basic_url() == \
+        'https://pagure.io/api/0/fork/auser/ns/testrepo/'
+    assert view.session is pg.session
+    assert view.cache is cache
+    assert view.header == {"Authorization": "token a token"}
+    assert pg.repo is None
+
+
+class IssueHandler(BaseHTTPRequestHandler):
+    """ Answer /api/0/<repo>/issue/<id> with the repo and id asked. """
+
+    def do_GET(self):
+        parts = self.path.strip('/').split('/')
+        body = json.dumps({'repo': parts[2], 'id': int(parts[4]),
+                           'auth': self.headers.get('Authorization')})
+        body = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def issue_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), IssueHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield 'http://127.0.0.1:{}'.format(server.server_address[1])
+    server.shutdown()
+    server.server_close()
+
+
+def test_per_thread_sessions():
+    """ Test that each thread gets its own session """
+    transport = Transport(per_thread_sessions=True)
+    sessions = []
+
+    def worker():
+        sessions.append(transport.get_session())
+        sessions.append(transport.get_session())
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(map(id, sessions))) == 4
+    transport.close()
+    assert len(transport._thread_sessions) == 0
+
+
+def test_per_thread_sessions_released(mocker):
+    """ Test that the session of a thread is closed once the thread ends,
+    and that close reaches the sessions of the live threads
+    """
+    close = mocker.patch('requests.Session.close')
+    transport = Transport(per_thread_sessions=True)
+    for _ in range(10):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda _: transport.get_session(), range(8)))
+    gc.collect()
+    assert len(transport._thread_sessions) == 0
+    assert 10 <= close.call_count <= 40
+
+    close.reset_mock()
+    transport.get_session()
+    assert len(transport._thread_sessions) == 1
+    transport.close()
+    assert close.call_count >= 1
+    assert len(transport._thread_sessions) == 0
+
+
+def test_thread_safety_stress(issue_server):
+    """ Test a single client shared by 64 threads hydrating issues """
+    transport = Transport(per_thread_sessions=True)
+    pg = Pagure(pagure_token='a token', instance_url=issue_server,
+                transport=transport)
+    repos = [pg.for_repo('repo{}'.format(i)) for i in range(4)]
+    jobs = [(repos[i % 4], i) for i in range(640)]
+
+    sessions = set()
+
+    def hydrate(job):
+        repo, issue_id = job
+        sessions.add(id(transport.session))
+        return repo.repo, issue_id, repo.issue_info(issue_id)
+
+    with ThreadPoolExecutor(max_workers=64) as executor:
+        results = list(executor.map(hydrate, jobs))
+
+    assert len(results) == 640
+    for repo, issue_id, issue in results:
+        assert issue == {'repo': repo, 'id': issue_id,
+                         'auth': 'token a token'}
+    # one session per worker, closed with the executor, only the one of
+    # the main thread is left
+    assert 1 < len(sessions) <= 64
+    assert list(transport._thread_sessions.values())[0].session is \
+        transport.session
+    assert len(transport._thread_sessions) == 1